@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Booking
+from .models import Booking, BookingGroup, InventoryHold
+from .lifecycle import apply_transition
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -43,16 +44,63 @@ class BookingAdmin(admin.ModelAdmin):
     is_active_booking.boolean = True
     is_active_booking.short_description = 'Activa'
     
-    actions = ['confirm_bookings', 'cancel_bookings']
+    actions = ['confirm_bookings', 'cancel_bookings', 'complete_bookings', 'no_show_bookings']
     
     def confirm_bookings(self, request, queryset):
         """Acción para confirmar múltiples reservas"""
-        updated = queryset.filter(status='pending').update(status='confirmed')
-        self.message_user(request, f'{updated} reservas fueron confirmadas.')
+        result = apply_transition('confirm', queryset)
+        self.message_user(request, f'{result["updated"]} reservas fueron confirmadas.')
     confirm_bookings.short_description = "Confirmar reservas seleccionadas"
     
     def cancel_bookings(self, request, queryset):
         """Acción para cancelar múltiples reservas"""
-        updated = queryset.filter(status__in=['pending', 'confirmed']).update(status='cancelled')
-        self.message_user(request, f'{updated} reservas fueron canceladas.')
+        result = apply_transition('cancel', queryset)
+        self.message_user(request, f'{result["updated"]} reservas fueron canceladas.')
     cancel_bookings.short_description = "Cancelar reservas seleccionadas"
+    
+    def complete_bookings(self, request, queryset):
+        """Acción para finalizar múltiples reservas"""
+        result = apply_transition('complete', queryset)
+        self.message_user(request, f'{result["updated"]} reservas fueron finalizadas.')
+    complete_bookings.short_description = "Finalizar reservas seleccionadas"
+    
+    def no_show_bookings(self, request, queryset):
+        """Acción para marcar múltiples reservas como no show"""
+        result = apply_transition('no_show', queryset)
+        self.message_user(request, f'{result["updated"]} reservas fueron marcadas como no show.')
+    no_show_bookings.short_description = "Marcar como no show las reservas seleccionadas"
+
+
+@admin.register(InventoryHold)
+class InventoryHoldAdmin(admin.ModelAdmin):
+    """
+    Bloqueos temporales del asistente de reserva
+    """
+    list_display = ['id', 'room', 'check_in_date', 'check_out_date', 'created_at', 'expires_at']
+    list_filter = ['hotel', 'expires_at']
+    search_fields = ['room__number', 'session_key']
+    readonly_fields = ['created_at']
+
+
+class GroupBookingInline(admin.TabularInline):
+    """
+    Reservas que forman parte del grupo
+    """
+    model = Booking
+    extra = 0
+    fields = ['room', 'status', 'payment_status', 'guests_count', 'total_price']
+    readonly_fields = fields
+    can_delete = False
+    show_change_link = True
+
+
+@admin.register(BookingGroup)
+class BookingGroupAdmin(admin.ModelAdmin):
+    """
+    Reservas grupales (operadores turísticos)
+    """
+    list_display = ['id', 'client', 'hotel', 'reference', 'check_in_date', 'check_out_date', 'created_at']
+    list_filter = ['hotel', 'check_in_date']
+    search_fields = ['reference', 'client__first_name', 'client__last_name', 'client__email']
+    readonly_fields = ['created_at']
+    inlines = [GroupBookingInline]
@@ -1,10 +1,13 @@
 from ninja import Router, Schema
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.core.exceptions import ValidationError
-from .models import Booking
+from .models import Booking, BookingConflictError
+from app.rooms.pricing import price_stay
+from .occupancy import is_room_free
+from .groups import create_group_booking
 from app.clients.models import Client
 from app.rooms.models import Room
 from app.core.services import EmailService
@@ -29,6 +32,33 @@ class BookingResponse(Schema):
     client_id: Optional[int] = None
     total_price: Optional[float] = None
 
+class GroupRoomType(Schema):
+    tipo: str
+    cantidad: int
+
+class CreateGroupBookingRequest(Schema):
+    nombre: str
+    email: str
+    telefono: Optional[str] = None
+    dni: str
+    fecha_inicio: date
+    fecha_fin: date
+    hotel: Optional[int] = None
+    habitaciones: List[int] = []
+    tipos: List[GroupRoomType] = []
+    huespedes_por_habitacion: Optional[int] = None
+    referencia: Optional[str] = None
+    solicitudes_especiales: Optional[str] = None
+
+class GroupBookingResponse(Schema):
+    success: bool
+    message: str
+    group_id: Optional[int] = None
+    client_id: Optional[int] = None
+    booking_ids: List[int] = []
+    total_price: Optional[float] = None
+    email_sent: Optional[bool] = None
+
 @router.post("/reservas/crear-con-cliente/", response=BookingResponse)
 def create_booking_with_client(request, payload: CreateBookingRequest):
     """
@@ -55,10 +85,10 @@ def create_booking_with_client(request, payload: CreateBookingRequest):
                     "total_price": None
                 }
             
-            # Verificar que la habitación existe
+            # Verificar que la habitación existe (sin bloqueo de fila: la doble reserva
+            # la impide la restricción de ocupación de la base de datos)
             try:
-                # Bloqueo de fila para evitar doble reserva en bases que lo soportan
-                room = Room.objects.select_for_update().get(id=payload.habitacion_id)
+                room = Room.objects.get(id=payload.habitacion_id)
             except Room.DoesNotExist:
                 return {
                     "success": False,
@@ -78,15 +108,8 @@ def create_booking_with_client(request, payload: CreateBookingRequest):
                     "total_price": None
                 }
             
-            # Verificar que no haya reservas superpuestas
-            conflicting_bookings = Booking.objects.filter(
-                room=room,
-                status__in=['pending', 'confirmed'],
-                check_in_date__lt=payload.fecha_fin,
-                check_out_date__gt=payload.fecha_inicio
-            )
-            
-            if conflicting_bookings.select_for_update().exists():
+            # Verificación temprana de solapamiento (la garantía final es la restricción)
+            if not is_room_free(room, payload.fecha_inicio, payload.fecha_fin):
                 return {
                     "success": False,
                     "message": "La habitación no está disponible para las fechas solicitadas",
@@ -169,8 +192,7 @@ def create_booking_with_client(request, payload: CreateBookingRequest):
                     client.save()
             
             # Calcular precio total
-            duration = (payload.fecha_fin - payload.fecha_inicio).days
-            total_price = room.price * duration
+            total_price = price_stay(room, payload.fecha_inicio, payload.fecha_fin)
             
             # Crear la reserva
             booking = Booking.objects.create(
@@ -201,6 +223,15 @@ def create_booking_with_client(request, payload: CreateBookingRequest):
                 "email_message": email_result["message"]
             }
             
+    except BookingConflictError:
+        # Otra reserva concurrente ocupó las mismas noches
+        return {
+            "success": False,
+            "message": "La habitación no está disponible para las fechas solicitadas",
+            "booking_id": None,
+            "client_id": None,
+            "total_price": None
+        }
     except ValidationError as e:
         return {
             "success": False,
@@ -258,4 +289,65 @@ def resend_booking_confirmation_email(request, booking_id: int):
         return {
             "success": False,
             "message": f"Error al reenviar email: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+@router.post("/reservas/grupo/", response=GroupBookingResponse)
+def create_group_booking_with_client(request, payload: CreateGroupBookingRequest):
+    """
+    Crea una reserva grupal (varias habitaciones, mismas fechas) de forma atómica.
+    
+    Las habitaciones se indican por id (habitaciones) y/o por tipo y cantidad (tipos).
+    Se verifica la disponibilidad de todas con una sola consulta, se insertan en lote
+    y se envía un único email de confirmación consolidado.
+    """
+    try:
+        hotel = None
+        if payload.hotel is not None:
+            from app.administration.models import Hotel
+            hotel = get_object_or_404(Hotel, id=payload.hotel)
+        
+        with transaction.atomic():
+            # Buscar cliente por email o DNI, o crearlo
+            client = (
+                Client.objects.filter(email=payload.email).first()
+                or Client.objects.filter(dni=payload.dni).first()
+            )
+            if client is None:
+                parts = payload.nombre.split()
+                client = Client.objects.create(
+                    first_name=parts[0] if parts else '',
+                    last_name=' '.join(parts[1:]),
+                    email=payload.email,
+                    phone=payload.telefono,
+                    dni=payload.dni,
+                )
+            
+            group = create_group_booking(
+                client, payload.fecha_inicio, payload.fecha_fin,
+                room_ids=payload.habitaciones,
+                room_types={t.tipo: t.cantidad for t in payload.tipos},
+                hotel=hotel,
+                reference=payload.referencia,
+                guests_per_room=payload.huespedes_por_habitacion,
+                special_requests=payload.solicitudes_especiales,
+            )
+        
+        bookings = list(group.bookings.values_list('id', 'total_price'))
+        email_result = EmailService.send_group_booking_confirmation(group.id)
+        
+        return {
+            "success": True,
+            "message": f"Reserva grupal creada exitosamente ({len(bookings)} habitaciones)",
+            "group_id": group.id,
+            "client_id": client.id,
+            "booking_ids": [booking_id for booking_id, _ in bookings],
+            "total_price": float(sum(price for _, price in bookings)),
+            "email_sent": email_result["success"]
+        }
+        
+    except BookingConflictError as e:
+        return {"success": False, "message": e.messages[0]}
+    except ValidationError as e:
+        return {"success": False, "message": f"Error de validación: {e.messages[0]}"}
+    except Exception as e:
+        return {"success": False, "message": f"Error al crear la reserva grupal: {str(e)}"}
@@ -0,0 +1,133 @@
+"""
+Reservas grupales: muchas habitaciones para el mismo cliente y fechas en una sola pasada.
+
+- Una consulta obtiene las habitaciones pedidas (por id o por tipo) que están
+  libres en el rango; el resto de la validación se hace en memoria.
+- Los precios se calculan en lote con el calendario de tarifas.
+- Las reservas y sus noches se insertan con bulk_create dentro de una
+  transacción. La restricción única de RoomNight sigue siendo la garantía
+  final frente a reservas concurrentes.
+"""
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Booking, BookingConflictError, BookingGroup, RoomNight, is_occupancy_conflict
+from .occupancy import booked_room_ids, nights_between, purge_expired_nights
+from .signals import notify_bookings_bulk_changed
+from app.rooms.models import Room
+from app.rooms.pricing import price_rooms
+
+MAX_GROUP_ROOMS = 50
+
+
+def select_group_rooms(check_in, check_out, room_ids=(), room_types=None, hotel=None):
+    """
+    Elige las habitaciones del grupo entre las libres del rango.
+
+    Args:
+        room_ids: habitaciones pedidas explícitamente
+        room_types: dict tipo -> cantidad de habitaciones de ese tipo
+
+    Raises:
+        BookingConflictError: si alguna habitación pedida no está libre o no alcanzan las de un tipo
+    """
+    room_ids = list(dict.fromkeys(room_ids))
+    room_types = {room_type: qty for room_type, qty in (room_types or {}).items() if qty > 0}
+    wanted = Q(id__in=room_ids) | Q(type__in=list(room_types))
+    free = Room.objects.filter(wanted, status='available', active=True)
+    if hotel is not None:
+        free = free.filter(hotel=hotel)
+    free = list(free.exclude(id__in=booked_room_ids(check_in, check_out)).select_related('hotel'))
+
+    by_id = {room.id: room for room in free}
+    unavailable = [room_id for room_id in room_ids if room_id not in by_id]
+    if unavailable:
+        raise BookingConflictError(f"Habitaciones no disponibles para las fechas solicitadas: {unavailable}")
+
+    selected = [by_id[room_id] for room_id in room_ids]
+    needed = Counter(room_types)
+    for room in free:
+        if needed[room.type] > 0 and room.id not in room_ids:
+            selected.append(room)
+            needed[room.type] -= 1
+    missing = {room_type: qty for room_type, qty in needed.items() if qty > 0}
+    if missing:
+        raise BookingConflictError(f"No hay suficientes habitaciones libres de los tipos: {missing}")
+    return selected
+
+
+def create_group_booking(client, check_in, check_out, room_ids=(), room_types=None, hotel=None,
+                         reference='', guests_per_room=None, special_requests='', status='confirmed'):
+    """
+    Crea una reserva grupal con todas sus reservas de forma atómica.
+
+    Returns:
+        BookingGroup: el grupo creado (con las reservas en group.bookings)
+
+    Raises:
+        ValidationError: fechas inválidas o grupo vacío/demasiado grande
+        BookingConflictError: alguna habitación no está disponible
+    """
+    if check_in >= check_out:
+        raise ValidationError('La fecha de salida debe ser posterior a la fecha de llegada')
+    if check_in < timezone.now().date():
+        raise ValidationError('No se pueden hacer reservas para fechas pasadas')
+    requested = len(set(room_ids)) + sum((room_types or {}).values())
+    if requested <= 0:
+        raise ValidationError('La reserva grupal debe incluir al menos una habitación')
+    if requested > MAX_GROUP_ROOMS:
+        raise ValidationError(f'Una reserva grupal admite como máximo {MAX_GROUP_ROOMS} habitaciones')
+    if hotel is None and any((room_types or {}).values()):
+        raise ValidationError('Indique el hotel para pedir habitaciones por tipo')
+
+    rooms = select_group_rooms(check_in, check_out, room_ids, room_types, hotel)
+    if len({room.hotel_id for room in rooms}) > 1:
+        raise ValidationError('Las habitaciones del grupo deben pertenecer a un mismo hotel')
+    if any(getattr(room.hotel, 'is_blocked', False) for room in rooms) or getattr(hotel, 'is_blocked', False):
+        raise ValidationError('El hotel está bloqueado y no acepta nuevas reservas')
+    prices = price_rooms(rooms, check_in, check_out)
+    nights = nights_between(check_in, check_out)
+    now = timezone.now()
+
+    try:
+        with transaction.atomic():
+            # Las noches de bloqueos vencidos aún no purgados no cuentan como ocupadas
+            purge_expired_nights([room.id for room in rooms], nights)
+            group = BookingGroup.objects.create(
+                hotel=hotel or rooms[0].hotel, client=client, reference=reference or '',
+                check_in_date=check_in, check_out_date=check_out,
+            )
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    hotel=room.hotel, client=client, room=room, group=group,
+                    check_in_date=check_in, check_out_date=check_out,
+                    status=status, payment_status='pending',
+                    guests_count=guests_per_room or room.capacity,
+                    special_requests=special_requests or '',
+                    total_price=prices[room.id],
+                    confirmed_at=now if status == 'confirmed' else None,
+                )
+                for room in rooms
+            ])
+            # bulk_create no pasa por Booking.save: ocupar las noches y ajustar cupos aquí
+            added = [(booking.room_id, d) for booking in bookings for d in nights]
+            RoomNight.objects.bulk_create([
+                RoomNight(room_id=booking.room_id, hotel_id=booking.hotel_id or booking.room.hotel_id,
+                          booking_id=booking.id, date=d)
+                for booking in bookings for d in nights
+            ])
+            from app.rooms.allotments import apply_sold_delta
+            apply_sold_delta(added=added)
+    except IntegrityError as e:
+        if not is_occupancy_conflict(e):
+            raise
+        raise BookingConflictError('Alguna habitación del grupo fue reservada mientras se procesaba la solicitud')
+
+    notify_bookings_bulk_changed(
+        (booking.hotel_id or booking.room.hotel_id, booking.room_id, check_in, check_out) for booking in bookings
+    )
+    return group
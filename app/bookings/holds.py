@@ -0,0 +1,112 @@
+"""
+Bloqueos temporales de inventario durante el asistente de reserva.
+
+Al elegir habitación (booking_step2) se crea un InventoryHold cuyas noches
+ocupan RoomNight con expires_at, de modo que las búsquedas de disponibilidad
+las tratan como ocupadas. create_booking_final convierte el bloqueo en la
+reserva sin volver a calcular solapamientos: libera las noches del bloqueo y
+las ocupa con la reserva dentro de la misma transacción.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Booking, BookingConflictError, InventoryHold, RoomNight, is_occupancy_conflict, validate_bookable_room
+from .occupancy import nights_between, purge_expired_nights
+from .signals import notify_bookings_bulk_changed, notify_bookings_changed
+
+
+def hold_ttl():
+    """Duración de un bloqueo (BOOKING_HOLD_TTL_MINUTES)"""
+    return timedelta(minutes=getattr(settings, 'BOOKING_HOLD_TTL_MINUTES', 15))
+
+
+def _notify_hold_changed(hold):
+    hotel_id = hold.hotel_id or getattr(hold.room, 'hotel_id', None)
+    notify_bookings_changed(hotel_id, {hold.room_id}, hold.check_in_date, hold.check_out_date)
+
+
+def release_session_holds(session_key):
+    """Libera los bloqueos de una sesión (sus noches se borran en cascada)"""
+    if not session_key:
+        return 0
+    holds = list(InventoryHold.objects.filter(session_key=session_key).select_related('room'))
+    for hold in holds:
+        _notify_hold_changed(hold)
+    InventoryHold.objects.filter(id__in=[hold.id for hold in holds]).delete()
+    return len(holds)
+
+
+def place_hold(room, check_in, check_out, session_key):
+    """
+    Bloquea la habitación para la sesión durante hold_ttl().
+    Reemplaza cualquier bloqueo anterior de la misma sesión.
+
+    Raises:
+        ValidationError: si la habitación o su hotel no aceptan reservas
+        BookingConflictError: si alguna noche ya está ocupada
+    """
+    validate_bookable_room(room)
+    nights = nights_between(check_in, check_out)
+    expires_at = timezone.now() + hold_ttl()
+    try:
+        with transaction.atomic():
+            release_session_holds(session_key)
+            purge_expired_nights([room.id], nights)
+            hold = InventoryHold.objects.create(
+                room=room, hotel_id=room.hotel_id, session_key=session_key,
+                check_in_date=check_in, check_out_date=check_out, expires_at=expires_at,
+            )
+            RoomNight.objects.bulk_create([
+                RoomNight(room=room, hotel_id=room.hotel_id, hold=hold, expires_at=expires_at, date=d)
+                for d in nights
+            ])
+    except IntegrityError as e:
+        if not is_occupancy_conflict(e):
+            raise
+        raise BookingConflictError('La habitación no está disponible para las fechas solicitadas')
+    _notify_hold_changed(hold)
+    return hold
+
+
+def convert_hold(hold_id, session_key, room, check_in, check_out, **booking_fields):
+    """
+    Convierte un bloqueo vigente en reserva. Las noches ya están tomadas por el
+    bloqueo, así que solo se vuelven a validar la habitación y el hotel (pueden
+    haber cambiado durante el bloqueo), no los solapamientos.
+
+    Returns:
+        Booking | None: None si el bloqueo no existe, venció o no coincide con la selección
+
+    Raises:
+        ValidationError: si la habitación o su hotel ya no aceptan reservas
+    """
+    with transaction.atomic():
+        hold = InventoryHold.objects.select_for_update().filter(
+            id=hold_id, session_key=session_key, room=room,
+            check_in_date=check_in, check_out_date=check_out,
+            expires_at__gt=timezone.now(),
+        ).first()
+        if hold is None:
+            return None
+        booking = Booking(room=room, check_in_date=check_in, check_out_date=check_out, **booking_fields)
+        validate_bookable_room(room, booking.hotel)
+        hold.delete()
+        booking.save(skip_validation=True)
+    return booking
+
+
+def purge_expired_holds():
+    """Elimina los bloqueos vencidos y sus noches, y avisa a los consumidores de sus hoteles y fechas"""
+    with transaction.atomic():
+        rows = list(
+            InventoryHold.objects.filter(expires_at__lte=timezone.now())
+            .annotate(effective_hotel_id=Coalesce('hotel_id', 'room__hotel_id'))
+            .values_list('id', 'effective_hotel_id', 'room_id', 'check_in_date', 'check_out_date')
+        )
+        InventoryHold.objects.filter(id__in=[row[0] for row in rows]).delete()
+        notify_bookings_bulk_changed(row[1:] for row in rows)
+    return len(rows)
@@ -0,0 +1,121 @@
+"""
+Cambios de estado masivos de reservas (confirmar, cancelar, finalizar, no show).
+
+Equivalen a llamar confirm_booking() / cancel_booking() / complete_booking()
+sobre cada reserva, pero con operaciones por conjunto:
+
+- las reservas elegibles (según su estado actual) se leen y bloquean con una
+  consulta y se actualizan con un UPDATE por lote de ids;
+- las noches ocupadas de las que dejan de estar activas se liberan juntas;
+- el estado de sus habitaciones se cambia con un solo UPDATE, y los avisos
+  que haría el post_save de Room se envían una vez por hotel;
+- los emails de confirmación o cancelación se encolan con un bulk_create y
+  los envía el worker (manage.py send_queued_emails), fuera de la request.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ACTIVE_STATUSES, Booking
+from .occupancy import release_booking_nights
+from .signals import notify_bookings_bulk_changed
+from app.rooms.models import Room
+
+UPDATE_BATCH_SIZE = 1000
+
+Transition = namedtuple('Transition', ['sources', 'status', 'room_status', 'timestamp', 'email'])
+
+TRANSITIONS = {
+    'confirm': Transition(('pending',), 'confirmed', 'reserved', 'confirmed_at', 'confirmation'),
+    'cancel': Transition(ACTIVE_STATUSES, 'cancelled', 'available', 'cancelled_at', 'cancellation'),
+    'complete': Transition(('confirmed',), 'completed', 'cleaning', None, None),
+    'no_show': Transition(ACTIVE_STATUSES, 'no_show', 'available', None, None),
+}
+
+
+def _batches(items, size=UPDATE_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _rooms_changed(hotel_ids):
+    """Avisos que el post_save de Room haría por cada habitación, una vez por hotel"""
+    from app.core.daily_stats import refresh_room_counts
+    from app.core.dashboard_metrics import invalidate_dashboard_counters
+    from app.core.resource_versions import bump_versions
+    from app.rooms.allotments import refresh_allotment_totals
+    from app.rooms.availability_cache import invalidate_hotel
+    from app.rooms.availability_engine import engine
+
+    for hotel_id in hotel_ids:
+        engine.invalidate(hotel_id)
+        invalidate_hotel(hotel_id)
+        refresh_allotment_totals(hotel_id)
+        refresh_room_counts(hotel_id)
+        invalidate_dashboard_counters(hotel_id)
+    bump_versions(('rooms',), hotel_ids)
+    bump_versions(('bookings',), all_scopes=True)
+
+
+def apply_transition(action, bookings, reason='', notify=True, update_rooms=True):
+    """
+    Aplica un cambio de estado a varias reservas.
+
+    Args:
+        action: 'confirm', 'cancel', 'complete' o 'no_show'
+        bookings: queryset de reservas (o lista de ids); se ignoran las que no
+                  están en un estado de origen válido para la acción
+        reason: motivo de cancelación
+        notify: encolar los emails de confirmación / cancelación
+        update_rooms: cambiar el estado de las habitaciones como los métodos individuales
+
+    Returns:
+        dict: action, updated (reservas cambiadas), rooms (habitaciones cambiadas), ids
+
+    Raises:
+        ValueError: acción desconocida
+    """
+    if action not in TRANSITIONS:
+        raise ValueError(f"Acción desconocida: {action}")
+    transition = TRANSITIONS[action]
+    if not hasattr(bookings, 'model'):
+        bookings = Booking.objects.filter(id__in=list(bookings))
+    now = timezone.now()
+
+    fields = {'status': transition.status, 'updated_at': now}
+    if transition.timestamp:
+        fields[transition.timestamp] = now
+    if action == 'cancel':
+        fields['cancellation_reason'] = reason
+
+    with transaction.atomic():
+        rows = list(
+            Booking.objects.select_for_update(of=('self',))
+            .filter(id__in=bookings.filter(status__in=transition.sources).values('id'))
+            .annotate(effective_hotel_id=Coalesce('hotel_id', 'room__hotel_id'))
+            .values_list('id', 'effective_hotel_id', 'room_id', 'check_in_date', 'check_out_date')
+        )
+        ids = [row[0] for row in rows]
+        for batch in _batches(ids):
+            Booking.objects.filter(id__in=batch).update(**fields)
+            # El update no pasa por Booking.save: liberar las noches de las que dejan de estar activas
+            if transition.status not in ACTIVE_STATUSES:
+                release_booking_nights(batch)
+
+        rooms = 0
+        if update_rooms and rows:
+            room_ids = {row[2] for row in rows}
+            rooms_qs = Room.objects.filter(id__in=room_ids).exclude(status=transition.room_status)
+            hotel_ids = set(rooms_qs.values_list('hotel_id', flat=True).distinct())
+            rooms = rooms_qs.update(status=transition.room_status, updated_at=now)
+            if rooms:
+                _rooms_changed(hotel_ids)
+
+        notify_bookings_bulk_changed(row[1:] for row in rows)
+        if notify and transition.email and ids:
+            from app.core.services import EmailService
+            EmailService.queue_booking_notifications(transition.email, ids)
+
+    return {'action': action, 'updated': len(ids), 'rooms': rooms, 'ids': ids}
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:41
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def backfill_room_nights(apps, schema_editor):
+    """Genera las noches ocupadas de las reservas activas existentes"""
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    batch = []
+    rows = Booking.objects.filter(status__in=['pending', 'confirmed']).values_list(
+        'id', 'room_id', 'hotel_id', 'room__hotel_id', 'check_in_date', 'check_out_date'
+    )
+    for booking_id, room_id, hotel_id, room_hotel_id, check_in, check_out in rows.iterator():
+        for i in range((check_out - check_in).days):
+            batch.append(RoomNight(
+                room_id=room_id,
+                hotel_id=hotel_id or room_hotel_id,
+                booking_id=booking_id,
+                date=check_in + timedelta(days=i),
+            ))
+        if len(batch) >= 2000:
+            RoomNight.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        RoomNight.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('bookings', '0003_booking_hotel'),
+        ('rooms', '0003_room_hotel_alter_room_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Noche ocupada')),
+                ('booking', models.ForeignKey(help_text='Reserva que ocupa la noche', on_delete=django.db.models.deletion.CASCADE, related_name='room_nights', to='bookings.booking')),
+                ('hotel', models.ForeignKey(blank=True, help_text='Hotel de la habitación', null=True, on_delete=django.db.models.deletion.CASCADE, to='administration.hotel')),
+                ('room', models.ForeignKey(help_text='Habitación ocupada', on_delete=django.db.models.deletion.CASCADE, related_name='occupied_nights', to='rooms.room')),
+            ],
+            options={
+                'verbose_name': 'Noche ocupada',
+                'verbose_name_plural': 'Noches ocupadas',
+                'ordering': ['room', 'date'],
+                'indexes': [models.Index(fields=['room', 'date'], name='bookings_ro_room_id_3120af_idx'), models.Index(fields=['hotel', 'date'], name='bookings_ro_hotel_i_509c6b_idx'), models.Index(fields=['date', 'room'], name='bookings_ro_date_1da1fa_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_room_nights, migrations.RunPython.noop),
+    ]
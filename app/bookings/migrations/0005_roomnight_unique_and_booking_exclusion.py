@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_overlapping_bookings(apps, schema_editor):
+    """
+    Dobles reservas históricas: detener la migración con la lista de reservas
+    activas que se solapan, en lugar de borrar sus noches. Hay que cancelar o
+    mover una de cada grupo (admin de reservas) y volver a ejecutar migrate.
+    """
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    clashes = RoomNight.objects.values('room_id', 'date').annotate(n=Count('id')).filter(n__gt=1).order_by('room_id', 'date')
+    groups = {}
+    for room_id, date, booking_id in RoomNight.objects.filter(
+        room_id__in={row['room_id'] for row in clashes},
+        date__in={row['date'] for row in clashes},
+    ).order_by('room_id', 'date', 'booking_id').values_list('room_id', 'date', 'booking_id'):
+        groups.setdefault((room_id, date), []).append(booking_id)
+    overlapping = sorted({tuple(ids) for ids in groups.values() if len(ids) > 1})
+    if overlapping:
+        listed = '; '.join(', '.join(str(booking_id) for booking_id in ids) for ids in overlapping[:50])
+        raise RuntimeError(
+            f"Hay {len(overlapping)} grupos de reservas activas que se solapan en la misma habitación "
+            f"(ids: {listed}). Cancele o mueva una reserva de cada grupo y vuelva a ejecutar migrate."
+        )
+
+
+EXCLUSION_SQL = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE bookings_booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist (
+    room_id WITH =,
+    daterange(check_in_date, check_out_date, '[)') WITH &&
+) WHERE (status IN ('pending', 'confirmed'));
+"""
+
+
+def add_booking_exclusion(apps, schema_editor):
+    """Restricción de exclusión por rango de fechas (solo PostgreSQL)"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(EXCLUSION_SQL)
+
+
+def remove_booking_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE bookings_booking DROP CONSTRAINT IF EXISTS booking_no_overlap;")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('bookings', '0004_roomnight'),
+        ('rooms', '0003_room_hotel_alter_room_number_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_overlapping_bookings, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='roomnight',
+            name='bookings_ro_room_id_3120af_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='roomnight',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='uniq_roomnight_room_date'),
+        ),
+        migrations.RunPython(add_booking_exclusion, remove_booking_exclusion),
+    ]
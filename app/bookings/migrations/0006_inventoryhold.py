@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('bookings', '0005_roomnight_unique_and_booking_exclusion'),
+        ('rooms', '0003_room_hotel_alter_room_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomnight',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Vencimiento (solo noches de bloqueos temporales)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='roomnight',
+            name='booking',
+            field=models.ForeignKey(blank=True, help_text='Reserva que ocupa la noche', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='room_nights', to='bookings.booking'),
+        ),
+        migrations.CreateModel(
+            name='InventoryHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.CharField(db_index=True, help_text='Sesión que creó el bloqueo', max_length=40)),
+                ('check_in_date', models.DateField(help_text='Fecha de llegada')),
+                ('check_out_date', models.DateField(help_text='Fecha de salida')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='Vencimiento del bloqueo')),
+                ('hotel', models.ForeignKey(blank=True, help_text='Hotel de la habitación', null=True, on_delete=django.db.models.deletion.CASCADE, to='administration.hotel')),
+                ('room', models.ForeignKey(help_text='Habitación bloqueada', on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='rooms.room')),
+            ],
+            options={
+                'verbose_name': 'Bloqueo temporal',
+                'verbose_name_plural': 'Bloqueos temporales',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='roomnight',
+            name='hold',
+            field=models.ForeignKey(blank=True, help_text='Bloqueo temporal que ocupa la noche', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='room_nights', to='bookings.inventoryhold'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('bookings', '0006_inventoryhold'),
+        ('clients', '0003_client_hotel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(blank=True, help_text='Referencia del operador', max_length=100)),
+                ('check_in_date', models.DateField(help_text='Fecha de llegada')),
+                ('check_out_date', models.DateField(help_text='Fecha de salida')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(help_text='Cliente responsable del grupo', on_delete=django.db.models.deletion.CASCADE, related_name='booking_groups', to='clients.client')),
+                ('hotel', models.ForeignKey(blank=True, help_text='Hotel del grupo', null=True, on_delete=django.db.models.deletion.CASCADE, to='administration.hotel')),
+            ],
+            options={
+                'verbose_name': 'Reserva grupal',
+                'verbose_name_plural': 'Reservas grupales',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='group',
+            field=models.ForeignKey(blank=True, help_text='Reserva grupal a la que pertenece', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='bookings.bookinggroup'),
+        ),
+    ]
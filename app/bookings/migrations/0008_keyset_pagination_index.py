@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('bookings', '0007_bookinggroup'),
+        ('clients', '0003_client_hotel'),
+        ('rooms', '0005_roomtypeallotment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['created_at', 'id'], name='bookings_bo_created_b97bfb_idx'),
+        ),
+    ]
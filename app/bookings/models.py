@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from app.clients.models import Client
@@ -6,6 +6,62 @@ from app.rooms.models import Room
 from app.administration.models import Hotel
 from datetime import timedelta
 
+# Estados que ocupan la habitación
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+# Campos cuyo cambio afecta las noches ocupadas por una reserva
+OCCUPANCY_FIELDS = {'room', 'room_id', 'hotel', 'hotel_id', 'status', 'check_in_date', 'check_out_date'}
+
+# Restricciones que garantizan en base de datos que no haya doble reserva
+OCCUPANCY_CONSTRAINTS = ('uniq_roomnight_room_date', 'booking_no_overlap', 'bookings_roomnight.room_id')
+
+
+class BookingConflictError(ValidationError):
+    """La base de datos rechazó la reserva por solaparse con otra activa"""
+
+
+def validate_bookable_room(room, hotel=None):
+    """
+    Valida que la habitación acepte reservas (sin revisar solapamientos):
+    estado de la habitación, hotel bloqueado y coherencia entre hotel y habitación.
+    """
+    if not room.available_for_booking:
+        raise ValidationError('La habitación no está disponible para reservas')
+    hotel_ref = hotel or getattr(room, 'hotel', None)
+    if hotel_ref and getattr(hotel_ref, 'is_blocked', False):
+        raise ValidationError('El hotel está bloqueado y no acepta nuevas reservas')
+    # Verificar coherencia de hotel si está seteado
+    if hotel and room.hotel_id and room.hotel_id != hotel.id:
+        raise ValidationError('La habitación seleccionada no pertenece al hotel de la reserva')
+
+
+def is_occupancy_conflict(error):
+    """Indica si un IntegrityError proviene de las restricciones de ocupación"""
+    message = str(error)
+    return any(name in message for name in OCCUPANCY_CONSTRAINTS)
+
+
+class BookingGroup(models.Model):
+    """
+    Reserva grupal: varias habitaciones reservadas juntas para un mismo cliente
+    y rango de fechas (p. ej. bloques de operadores turísticos).
+    """
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, null=True, blank=True, help_text="Hotel del grupo")
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='booking_groups', help_text="Cliente responsable del grupo")
+    reference = models.CharField(max_length=100, blank=True, help_text="Referencia del operador")
+    check_in_date = models.DateField(help_text="Fecha de llegada")
+    check_out_date = models.DateField(help_text="Fecha de salida")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Reserva grupal"
+        verbose_name_plural = "Reservas grupales"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Grupo {self.id} - {self.client.full_name} ({self.check_in_date} a {self.check_out_date})"
+
+
 class Booking(models.Model):
     """
     Modelo para representar las reservas del hotel
@@ -29,6 +85,7 @@ class Booking(models.Model):
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, null=True, blank=True, help_text="Hotel de la reserva")
     client = models.ForeignKey(Client, on_delete=models.CASCADE, help_text="Cliente que realiza la reserva")
     room = models.ForeignKey(Room, on_delete=models.CASCADE, help_text="Habitación reservada")
+    group = models.ForeignKey(BookingGroup, on_delete=models.SET_NULL, null=True, blank=True, related_name='bookings', help_text="Reserva grupal a la que pertenece")
     
     # Fechas
     check_in_date = models.DateField(help_text="Fecha de llegada")
@@ -59,6 +116,8 @@ class Booking(models.Model):
             models.Index(fields=['check_in_date', 'check_out_date']),
             models.Index(fields=['status']),
             models.Index(fields=['client']),
+            # Clave de la paginación por cursor de la API
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -85,7 +144,30 @@ class Booking(models.Model):
             self.validate_availability()
             self.calculate_total_price()
         
-        super().save(*args, **kwargs)
+        # Guardar la reserva y sus noches ocupadas de forma atómica: la restricción
+        # única de RoomNight (y la de exclusión en PostgreSQL) rechaza el solapamiento
+        update_fields = kwargs.get('update_fields')
+        sync_nights = update_fields is None or OCCUPANCY_FIELDS.intersection(update_fields)
+        changed_nights = set()
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if sync_nights:
+                    from .occupancy import sync_booking_nights
+                    released, added = sync_booking_nights(self)
+                    changed_nights = released | added
+        except IntegrityError as e:
+            if not is_occupancy_conflict(e):
+                raise
+            if is_new_booking:
+                self.pk = None
+                self._state.adding = True
+            raise BookingConflictError('La habitación no está disponible para las fechas solicitadas')
+        
+        # Cambios de precio sin cambio de noches también afectan a las estadísticas
+        if sync_nights or 'total_price' in update_fields:
+            from .signals import notify_booking_saved
+            notify_booking_saved(self, changed_nights)
         
         # Enviar email de confirmación automáticamente para nuevas reservas confirmadas
         if is_new_booking and self.status == 'confirmed' and not skip_validation:
@@ -107,9 +189,10 @@ class Booking(models.Model):
     
     @property
     def subtotal(self):
-        """Retorna el subtotal de la reserva (precio por noche * duración)"""
+        """Retorna el subtotal de la reserva (suma de las tarifas de cada noche)"""
         if self.room and self.duration > 0:
-            return self.room.price * self.duration
+            from app.rooms.pricing import price_stay
+            return price_stay(self.room, self.check_in_date, self.check_out_date)
         return 0
     
     @property
@@ -121,7 +204,14 @@ class Booking(models.Model):
     @property
     def is_active(self):
         """Verifica si la reserva está activa"""
-        return self.status in ['pending', 'confirmed']
+        return self.status in ACTIVE_STATUSES
+    
+    @property
+    def nights(self):
+        """Retorna la lista de noches (fechas) que ocupa la reserva"""
+        if not (self.check_in_date and self.check_out_date):
+            return []
+        return [self.check_in_date + timedelta(days=i) for i in range(self.duration)]
     
     @property
     def is_confirmed(self):
@@ -131,28 +221,16 @@ class Booking(models.Model):
     def calculate_total_price(self):
         """Calcula el precio total de la reserva"""
         if self.room and self.duration > 0:
-            self.total_price = self.room.price * self.duration
+            from app.rooms.pricing import price_stay
+            self.total_price = price_stay(self.room, self.check_in_date, self.check_out_date)
     
     def validate_availability(self):
         """Valida que la habitación esté disponible para las fechas solicitadas"""
-        if not self.room.available_for_booking:
-            raise ValidationError('La habitación no está disponible para reservas')
-        hotel_ref = self.hotel or getattr(self.room, 'hotel', None)
-        if hotel_ref and getattr(hotel_ref, 'is_blocked', False):
-            raise ValidationError('El hotel está bloqueado y no acepta nuevas reservas')
-        # Verificar coherencia de hotel si está seteado
-        if self.hotel and self.room and hasattr(self.room, 'hotel') and self.room.hotel and self.room.hotel != self.hotel:
-            raise ValidationError('La habitación seleccionada no pertenece al hotel de la reserva')
+        validate_bookable_room(self.room, self.hotel)
         
-        # Verificar si hay conflictos con otras reservas
-        conflicting_bookings = Booking.objects.filter(
-            room=self.room,
-            status__in=['pending', 'confirmed'],
-            check_in_date__lt=self.check_out_date,
-            check_out_date__gt=self.check_in_date
-        )
-        
-        if conflicting_bookings.exists():
+        # Verificar si hay conflictos con otras reservas (índice de noches ocupadas)
+        from .occupancy import is_room_free
+        if not is_room_free(self.room, self.check_in_date, self.check_out_date, exclude_booking=self):
             raise ValidationError('La habitación no está disponible para las fechas solicitadas')
     
     def confirm_booking(self):
@@ -193,3 +271,61 @@ class Booking(models.Model):
         paid = self.paid_amount or Decimal('0')
         due = total - paid
         return due if due > Decimal('0') else Decimal('0')
+
+
+class InventoryHold(models.Model):
+    """
+    Bloqueo temporal de una habitación mientras el cliente completa el asistente de reserva.
+    Sus noches ocupan RoomNight hasta expires_at (ver app.bookings.holds).
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='holds', help_text="Habitación bloqueada")
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, null=True, blank=True, help_text="Hotel de la habitación")
+    session_key = models.CharField(max_length=40, db_index=True, help_text="Sesión que creó el bloqueo")
+    check_in_date = models.DateField(help_text="Fecha de llegada")
+    check_out_date = models.DateField(help_text="Fecha de salida")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True, help_text="Vencimiento del bloqueo")
+    
+    class Meta:
+        verbose_name = "Bloqueo temporal"
+        verbose_name_plural = "Bloqueos temporales"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Bloqueo {self.id} - Habitación {self.room_id} ({self.check_in_date} a {self.check_out_date})"
+    
+    @property
+    def is_expired(self):
+        """Verifica si el bloqueo ya venció"""
+        return self.expires_at <= timezone.now()
+
+
+class RoomNight(models.Model):
+    """
+    Índice de ocupación: una fila por habitación y noche ocupada por una reserva activa
+    o por un bloqueo temporal vigente (expires_at). Se mantiene sincronizado desde
+    Booking.save (ver app.bookings.occupancy) y app.bookings.holds.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='occupied_nights', help_text="Habitación ocupada")
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, null=True, blank=True, help_text="Hotel de la habitación")
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, null=True, blank=True, related_name='room_nights', help_text="Reserva que ocupa la noche")
+    hold = models.ForeignKey(InventoryHold, on_delete=models.CASCADE, null=True, blank=True, related_name='room_nights', help_text="Bloqueo temporal que ocupa la noche")
+    expires_at = models.DateTimeField(null=True, blank=True, help_text="Vencimiento (solo noches de bloqueos temporales)")
+    date = models.DateField(help_text="Noche ocupada")
+    
+    class Meta:
+        verbose_name = "Noche ocupada"
+        verbose_name_plural = "Noches ocupadas"
+        ordering = ['room', 'date']
+        indexes = [
+            models.Index(fields=['hotel', 'date']),
+            models.Index(fields=['date', 'room']),
+        ]
+        constraints = [
+            # Una habitación solo puede estar ocupada por una reserva activa por noche
+            models.UniqueConstraint(fields=['room', 'date'], name='uniq_roomnight_room_date')
+        ]
+    
+    def __str__(self):
+        owner = f"reserva {self.booking_id}" if self.booking_id else f"bloqueo {self.hold_id}"
+        return f"Habitación {self.room_id} - {self.date} ({owner})"
@@ -0,0 +1,168 @@
+"""
+Índice de ocupación por habitación y noche (RoomNight).
+
+Cada reserva activa (pendiente o confirmada) ocupa una fila por noche en
+RoomNight. Las consultas de disponibilidad se resuelven contra este índice
+con búsquedas por igualdad/rango sobre (room, date) en lugar de volver a
+calcular el solapamiento de intervalos sobre toda la tabla de reservas.
+
+Los bloqueos temporales del asistente (InventoryHold) también ocupan filas,
+con expires_at: una vez vencidas dejan de contar como ocupadas.
+"""
+from datetime import timedelta
+from typing import Iterable
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F, Min, Q
+from django.utils import timezone
+
+from .models import Booking, RoomNight, ACTIVE_STATUSES
+
+
+def nights_between(check_in, check_out):
+    """Retorna las noches [check_in, check_out) como lista de fechas"""
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+def active_nights():
+    """Queryset de noches ocupadas: de reservas o de bloqueos temporales no vencidos"""
+    return RoomNight.objects.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
+
+
+def next_hold_expiry(hotel_id=None, start=None, end=None):
+    """Próximo vencimiento de un bloqueo temporal vigente (del hotel y de las noches [start, end)), o None"""
+    qs = RoomNight.objects.filter(expires_at__gt=timezone.now())
+    if hotel_id is not None:
+        qs = qs.filter(hotel_id=hotel_id)
+    if start is not None and end is not None:
+        qs = qs.filter(date__gte=start, date__lt=end)
+    return qs.aggregate(next_expiry=Min('expires_at'))['next_expiry']
+
+
+def purge_expired_nights(room_ids, dates):
+    """Libera las noches de bloqueos vencidos que impedirían ocupar esas fechas en esas habitaciones"""
+    return RoomNight.objects.filter(
+        room_id__in=list(room_ids), date__in=list(dates), expires_at__lte=timezone.now()
+    ).delete()[0]
+
+
+def booking_hotel_id(booking):
+    """Hotel efectivo de la reserva (el de la reserva o el de la habitación)"""
+    if booking.hotel_id:
+        return booking.hotel_id
+    try:
+        return getattr(booking.room, 'hotel_id', None)
+    except ObjectDoesNotExist:
+        return None
+
+
+def sync_booking_nights(booking):
+    """
+    Sincroniza las filas de RoomNight de una reserva con su estado actual.
+
+    Returns:
+        tuple: (noches liberadas, noches ocupadas) como conjuntos de (room_id, fecha)
+    """
+    wanted = set()
+    if booking.status in ACTIVE_STATUSES:
+        wanted = {(booking.room_id, d) for d in booking.nights}
+    current = set(RoomNight.objects.filter(booking_id=booking.pk).values_list('room_id', 'date'))
+
+    released = current - wanted
+    added = wanted - current
+
+    if released:
+        RoomNight.objects.filter(booking_id=booking.pk).filter(
+            ~Q(room_id=booking.room_id) | Q(date__in=[d for _, d in released])
+        ).delete()
+    if added:
+        purge_expired_nights([booking.room_id], [d for _, d in added])
+        hotel_id = booking_hotel_id(booking)
+        RoomNight.objects.bulk_create([
+            RoomNight(room_id=room_id, hotel_id=hotel_id, booking_id=booking.pk, date=d)
+            for room_id, d in sorted(added)
+        ])
+    if released or added:
+        from app.rooms.allotments import apply_sold_delta
+        apply_sold_delta(released, added)
+    return released, added
+
+
+def release_booking_nights(booking_ids: Iterable[int]):
+    """Libera las noches de un conjunto de reservas (p. ej. tras un update masivo)"""
+    from app.rooms.allotments import apply_sold_delta
+
+    nights_qs = RoomNight.objects.filter(booking_id__in=list(booking_ids))
+    released = list(nights_qs.values_list('room_id', 'date'))
+    deleted = nights_qs.delete()[0]
+    apply_sold_delta(released=released)
+    return deleted
+
+
+def booked_room_ids(check_in, check_out, hotel=None, rooms=None, exclude_booking=None):
+    """
+    Queryset de ids de habitaciones con al menos una noche ocupada en [check_in, check_out).
+    Pensado para usarse como subconsulta en Room.objects.exclude(id__in=...).
+    """
+    qs = active_nights().filter(date__gte=check_in, date__lt=check_out)
+    if hotel is not None:
+        qs = qs.filter(hotel=hotel)
+    if rooms is not None:
+        qs = qs.filter(room__in=rooms)
+    if exclude_booking is not None and getattr(exclude_booking, 'pk', None):
+        qs = qs.exclude(booking_id=exclude_booking.pk)
+    return qs.values_list('room_id', flat=True)
+
+
+def is_room_free(room, check_in, check_out, exclude_booking=None):
+    """Indica si la habitación no tiene noches ocupadas en [check_in, check_out)"""
+    qs = active_nights().filter(room=room, date__gte=check_in, date__lt=check_out)
+    if exclude_booking is not None and getattr(exclude_booking, 'pk', None):
+        qs = qs.exclude(booking_id=exclude_booking.pk)
+    return not qs.exists()
+
+
+def occupied_dates(room, start, end):
+    """Conjunto de fechas ocupadas de una habitación entre start y end (inclusive)"""
+    return set(active_nights().filter(room=room, date__gte=start, date__lte=end).values_list('date', flat=True))
+
+
+def rebuild_room_nights(hotel=None, batch_size: int = 2000, stdout=None) -> int:
+    """
+    Reconstruye el índice RoomNight desde las reservas activas.
+    Las noches de reservas históricas solapadas se descartan (restricción única).
+
+    Args:
+        hotel: limitar la reconstrucción a un hotel (opcional)
+        batch_size: tamaño de lote para bulk_create
+
+    Returns:
+        int: cantidad de noches generadas
+    """
+    nights_qs = RoomNight.objects.filter(booking__isnull=False)
+    bookings_qs = Booking.objects.filter(status__in=ACTIVE_STATUSES, check_out_date__gt=F('check_in_date'))
+    if hotel is not None:
+        nights_qs = nights_qs.filter(hotel=hotel)
+        bookings_qs = bookings_qs.filter(Q(hotel=hotel) | Q(hotel__isnull=True, room__hotel=hotel))
+    nights_qs.delete()
+
+    total = 0
+    batch = []
+    rows = bookings_qs.values_list('id', 'room_id', 'hotel_id', 'room__hotel_id', 'check_in_date', 'check_out_date')
+    for booking_id, room_id, hotel_id, room_hotel_id, check_in, check_out in rows.iterator(chunk_size=batch_size):
+        for d in nights_between(check_in, check_out):
+            batch.append(RoomNight(room_id=room_id, hotel_id=hotel_id or room_hotel_id, booking_id=booking_id, date=d))
+        if len(batch) >= batch_size:
+            RoomNight.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+            total += len(batch)
+            batch = []
+            if stdout:
+                stdout.write(f"{total} noches generadas...")
+    if batch:
+        RoomNight.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+        total += len(batch)
+
+    # Los cupos por tipo se regeneran desde el índice en la próxima consulta
+    from app.rooms.allotments import drop_allotments
+    drop_allotments(hotel_id=getattr(hotel, 'id', None), all_hotels=hotel is None)
+    return total
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import pre_delete, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import Booking
+
+# Señal emitida (tras el commit) cuando cambian reservas de un hotel.
+# kwargs: hotel_id, room_ids (set), start, end (rango de noches [start, end))
+bookings_changed = Signal()
+
+
+def notify_bookings_changed(hotel_id, room_ids, start, end):
+    """Programa el envío de bookings_changed cuando se confirme la transacción actual"""
+    if start is None or end is None:
+        return
+    room_ids = set(room_ids)
+    transaction.on_commit(lambda: bookings_changed.send(
+        sender=Booking, hotel_id=hotel_id, room_ids=room_ids, start=start, end=end
+    ))
+
+
+def notify_booking_saved(booking, changed_nights=()):
+    """
+    Notifica el cambio de una reserva individual.
+
+    Args:
+        booking: reserva guardada
+        changed_nights: pares (room_id, fecha) liberados u ocupados por el cambio
+    """
+    from datetime import timedelta
+    from .occupancy import booking_hotel_id
+
+    room_ids = {booking.room_id} | {room_id for room_id, _ in changed_nights}
+    dates = [d for _, d in changed_nights]
+    if booking.check_in_date and booking.check_out_date:
+        dates += [booking.check_in_date, booking.check_out_date - timedelta(days=1)]
+    if not dates:
+        return
+    notify_bookings_changed(booking_hotel_id(booking), room_ids, min(dates), max(dates) + timedelta(days=1))
+
+
+@receiver(pre_delete, sender=Booking)
+def booking_deleting(sender, instance, **kwargs):
+    """Antes del borrado en cascada de sus noches, descontarlas de los cupos por tipo"""
+    from app.rooms.allotments import apply_sold_delta
+    apply_sold_delta(released=instance.room_nights.values_list('room_id', 'date'))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    """Las noches se borran en cascada; avisar a los consumidores del cambio"""
+    notify_booking_saved(instance)
+
+
+def notify_bookings_bulk_changed(rows):
+    """
+    Notifica cambios masivos (updates/bulk_create que no pasan por save).
+
+    Args:
+        rows: iterable de (hotel_id, room_id, check_in_date, check_out_date)
+    """
+    spans = {}
+    for hotel_id, room_id, check_in, check_out in rows:
+        room_ids, start, end = spans.get(hotel_id, (set(), check_in, check_out))
+        room_ids.add(room_id)
+        spans[hotel_id] = (room_ids, min(start, check_in), max(end, check_out))
+    for hotel_id, (room_ids, start, end) in spans.items():
+        notify_bookings_changed(hotel_id, room_ids, start, end)
@@ -1,3 +1,341 @@
 from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from app.administration.models import Hotel
+from app.rooms.models import Room
+from app.clients.models import Client
+from .models import Booking, BookingConflictError, BookingGroup, InventoryHold, RoomNight
+from .occupancy import booked_room_ids, is_room_free, rebuild_room_nights
+from .holds import place_hold, convert_hold, purge_expired_holds
+from .groups import create_group_booking
+
+
+class BookingFixtureMixin:
+    """Hotel, habitación y cliente comunes para los tests de reservas"""
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.room = Room.objects.create(
+            hotel=self.hotel, number='101', type='double', capacity=2,
+            price=Decimal('100.00'), status='available', active=True
+        )
+        self.guest = Client.objects.create(
+            first_name='Ana', last_name='López', email='ana@example.com', dni='12345678'
+        )
+        self.check_in = timezone.now().date() + timedelta(days=5)
+
+    def create_booking(self, nights=3, status='pending', skip_validation=False):
+        booking = Booking(
+            hotel=self.hotel, client=self.guest, room=self.room,
+            check_in_date=self.check_in, check_out_date=self.check_in + timedelta(days=nights),
+            total_price=Decimal('0'), status=status
+        )
+        booking.save(skip_validation=skip_validation)
+        return booking
+
+
+class RoomNightIndexTestCase(BookingFixtureMixin, TestCase):
+    """Tests del índice de noches ocupadas (RoomNight)"""
+
+    def test_new_booking_creates_one_row_per_night(self):
+        """Una reserva activa genera una fila por noche"""
+        booking = self.create_booking(nights=3)
+        dates = list(RoomNight.objects.filter(booking=booking).values_list('date', flat=True))
+        self.assertEqual(dates, booking.nights)
+
+    def test_cancel_releases_nights(self):
+        """Cancelar la reserva libera las noches"""
+        booking = self.create_booking(status='confirmed')
+        booking.cancel_booking('test')
+        self.assertFalse(RoomNight.objects.filter(booking=booking).exists())
+
+    def test_date_change_resyncs_nights(self):
+        """Cambiar fechas recalcula únicamente las noches afectadas"""
+        booking = self.create_booking(nights=2)
+        booking.check_out_date = booking.check_out_date + timedelta(days=2)
+        booking.save()
+        self.assertEqual(RoomNight.objects.filter(booking=booking).count(), 4)
+
+    def test_overlap_is_rejected(self):
+        """validate_availability usa el índice para detectar solapamientos"""
+        self.create_booking(nights=3)
+        with self.assertRaises(ValidationError):
+            Booking.objects.create(
+                hotel=self.hotel, client=self.guest, room=self.room,
+                check_in_date=self.check_in + timedelta(days=1),
+                check_out_date=self.check_in + timedelta(days=4),
+                total_price=Decimal('0'),
+            )
+
+    def test_checkout_day_is_free(self):
+        """El día de salida queda libre para una nueva llegada"""
+        booking = self.create_booking(nights=2)
+        self.assertNotIn(self.room.id, list(booked_room_ids(booking.check_out_date, booking.check_out_date + timedelta(days=1))))
+        self.assertIn(self.room.id, list(booked_room_ids(booking.check_in_date, booking.check_out_date)))
+
+    def test_rebuild_matches_incremental_index(self):
+        """La reconstrucción produce el mismo índice que el mantenimiento incremental"""
+        self.create_booking(nights=3)
+        before = set(RoomNight.objects.values_list('room_id', 'date'))
+        RoomNight.objects.all().delete()
+        total = rebuild_room_nights()
+        self.assertEqual(total, 3)
+        self.assertEqual(set(RoomNight.objects.values_list('room_id', 'date')), before)
+
+
+class DoubleBookingConstraintTestCase(BookingFixtureMixin, TestCase):
+    """La base de datos impide la doble reserva aunque se omita la validación previa"""
+
+    def test_conflicting_insert_fails_cleanly(self):
+        self.create_booking(nights=3, status='confirmed')
+        with self.assertRaises(BookingConflictError):
+            self.create_booking(nights=2, status='pending', skip_validation=True)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(RoomNight.objects.count(), 3)
+
+    def test_reactivating_over_taken_nights_fails(self):
+        """Reactivar una reserva cancelada sobre noches ya ocupadas es rechazado"""
+        first = self.create_booking(nights=2, status='confirmed')
+        first.cancel_booking()
+        self.create_booking(nights=2, status='confirmed')
+        first.status = 'confirmed'
+        with self.assertRaises(BookingConflictError):
+            first.save()
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'cancelled')
+
+
+class InventoryHoldTestCase(BookingFixtureMixin, TestCase):
+    """Bloqueos temporales del asistente de reserva"""
+
+    def hold(self, session_key='sesion-a', nights=3):
+        return place_hold(self.room, self.check_in, self.check_in + timedelta(days=nights), session_key)
+
+    def test_hold_blocks_availability_until_expiry(self):
+        hold = self.hold()
+        check_out = self.check_in + timedelta(days=3)
+        self.assertFalse(is_room_free(self.room, self.check_in, check_out))
+        with self.assertRaises(BookingConflictError):
+            self.hold(session_key='sesion-b')
+
+        InventoryHold.objects.filter(id=hold.id).update(expires_at=timezone.now() - timedelta(minutes=1))
+        RoomNight.objects.filter(hold=hold).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertTrue(is_room_free(self.room, self.check_in, check_out))
+        # Una reserva nueva puede ocupar las noches de un bloqueo vencido
+        self.create_booking(nights=3)
+        self.assertEqual(purge_expired_holds(), 1)
+
+    def test_new_hold_replaces_previous_one_of_session(self):
+        self.hold(nights=2)
+        self.hold(nights=4)
+        self.assertEqual(InventoryHold.objects.count(), 1)
+        self.assertEqual(RoomNight.objects.count(), 4)
+
+    def test_convert_hold_into_booking(self):
+        hold = self.hold()
+        check_out = self.check_in + timedelta(days=3)
+        self.assertIsNone(convert_hold(hold.id, 'otra-sesion', self.room, self.check_in, check_out,
+                                       hotel=self.hotel, client=self.guest, total_price=Decimal('300')))
+        booking = convert_hold(hold.id, 'sesion-a', self.room, self.check_in, check_out,
+                               hotel=self.hotel, client=self.guest, status='confirmed', total_price=Decimal('300'))
+        self.assertFalse(InventoryHold.objects.exists())
+        self.assertEqual(list(RoomNight.objects.values_list('booking_id', flat=True)), [booking.id] * 3)
+
+    def test_hold_requires_bookable_room_and_hotel(self):
+        check_out = self.check_in + timedelta(days=2)
+        self.room.status = 'maintenance'
+        self.room.save()
+        with self.assertRaises(ValidationError):
+            self.hold()
+        self.room.status = 'available'
+        self.room.save()
+
+        # Un cambio durante el bloqueo impide convertirlo en reserva
+        hold = self.hold(nights=2)
+        self.hotel.is_blocked = True
+        self.hotel.save()
+        self.room.refresh_from_db()
+        with self.assertRaises(ValidationError):
+            convert_hold(hold.id, 'sesion-a', self.room, self.check_in, check_out,
+                         hotel=self.hotel, client=self.guest, total_price=Decimal('200'))
+        self.assertFalse(Booking.objects.exists())
+        self.assertTrue(InventoryHold.objects.filter(id=hold.id).exists())
+
+    def test_wizard_holds_room_and_converts_it(self):
+        """booking_step2 bloquea la habitación y create_booking_final convierte el bloqueo"""
+        check_out = self.check_in + timedelta(days=2)
+        self.client.post('/booking/step1/', {
+            'guests_count': 2, 'check_in_date': self.check_in.isoformat(), 'check_out_date': check_out.isoformat(),
+        })
+        self.client.post('/booking/step2/', {'room_id': self.room.id})
+        self.assertEqual(InventoryHold.objects.count(), 1)
+        self.assertFalse(is_room_free(self.room, self.check_in, check_out))
+
+        session = self.client.session
+        session['booking_data'].update(first_name='Ana', last_name='López', email='ana@example.com')
+        session.save()
+        data = self.client.post('/booking/create/').json()
+        self.assertTrue(data['success'], data)
+        self.assertFalse(InventoryHold.objects.exists())
+        self.assertEqual(RoomNight.objects.filter(booking_id=data['booking_id']).count(), 2)
+
+
+class GroupBookingTestCase(BookingFixtureMixin, TestCase):
+    """Reservas grupales atómicas"""
+
+    def setUp(self):
+        super().setUp()
+        self.rooms = [self.room] + [
+            Room.objects.create(hotel=self.hotel, number=str(102 + i), type='double', capacity=2,
+                                price=Decimal('100.00'), status='available', active=True)
+            for i in range(3)
+        ]
+        self.check_out = self.check_in + timedelta(days=2)
+
+    def test_group_books_rooms_by_id_and_type(self):
+        with self.assertNumQueries(10):
+            group = create_group_booking(self.guest, self.check_in, self.check_out, hotel=self.hotel,
+                                         room_ids=[self.rooms[3].id], room_types={'double': 2})
+        bookings = list(group.bookings.all())
+        self.assertEqual(len(bookings), 3)
+        self.assertIn(self.rooms[3].id, [b.room_id for b in bookings])
+        self.assertEqual(RoomNight.objects.filter(booking__group=group).count(), 6)
+        self.assertTrue(all(b.total_price == Decimal('200.00') for b in bookings))
+
+    def test_conflict_books_nothing(self):
+        self.create_booking(nights=1)
+        with self.assertRaises(BookingConflictError):
+            create_group_booking(self.guest, self.check_in, self.check_out, room_ids=[r.id for r in self.rooms])
+        with self.assertRaises(BookingConflictError):
+            create_group_booking(self.guest, self.check_in, self.check_out, hotel=self.hotel, room_types={'double': 4})
+        self.assertFalse(BookingGroup.objects.exists())
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_expired_hold_does_not_block_the_group(self):
+        hold = place_hold(self.rooms[0], self.check_in, self.check_out, 'sesion-a')
+        RoomNight.objects.filter(hold=hold).update(expires_at=timezone.now() - timedelta(minutes=1))
+        group = create_group_booking(self.guest, self.check_in, self.check_out, room_ids=[self.rooms[0].id])
+        self.assertEqual(RoomNight.objects.filter(booking__group=group).count(), 2)
+
+    def test_group_stays_in_one_bookable_hotel(self):
+        with self.assertRaises(ValidationError):
+            create_group_booking(self.guest, self.check_in, self.check_out, room_types={'double': 1})
+        other = Hotel.objects.create(name='Hotel Otro', slug='hotel-otro')
+        elsewhere = Room.objects.create(hotel=other, number='901', type='double', capacity=2,
+                                        price=Decimal('100.00'), status='available', active=True)
+        with self.assertRaises(ValidationError):
+            create_group_booking(self.guest, self.check_in, self.check_out, room_ids=[self.rooms[0].id, elsewhere.id])
+        other.is_blocked = True
+        other.save()
+        with self.assertRaises(ValidationError):
+            create_group_booking(self.guest, self.check_in, self.check_out, room_ids=[elsewhere.id])
+        self.assertFalse(BookingGroup.objects.exists())
+
+    def test_group_endpoint_sends_one_email(self):
+        from django.core import mail
+        response = self.client.post('/api/reservas/grupo/', {
+            'nombre': 'Operador Tur', 'email': 'grupos@example.com', 'dni': '999',
+            'fecha_inicio': self.check_in.isoformat(), 'fecha_fin': self.check_out.isoformat(),
+            'tipos': [{'tipo': 'double', 'cantidad': 4}], 'referencia': 'TOUR-1', 'hotel': self.hotel.id,
+        }, content_type='application/json')
+        data = response.json()
+        self.assertTrue(data['success'], data)
+        self.assertEqual(len(data['booking_ids']), 4)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class BulkTransitionTestCase(BookingFixtureMixin, TestCase):
+    """Cambios de estado masivos por conjunto"""
+
+    def setUp(self):
+        super().setUp()
+        self.rooms = [self.room] + [
+            Room.objects.create(hotel=self.hotel, number=str(102 + i), type='double', capacity=2,
+                                price=Decimal('100.00'), status='available', active=True)
+            for i in range(5)
+        ]
+        self.bookings = [
+            Booking.objects.create(hotel=self.hotel, client=self.guest, room=room, check_in_date=self.check_in,
+                                   check_out_date=self.check_in + timedelta(days=2), total_price=Decimal('200.00'))
+            for room in self.rooms
+        ]
+
+    def _queries(self, action, bookings):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .lifecycle import apply_transition
+        with CaptureQueriesContext(connection) as queries:
+            result = apply_transition(action, [b.id for b in bookings], notify=False)
+        self.assertEqual(result['updated'], len(bookings))
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_bookings(self):
+        self.assertEqual(self._queries('confirm', self.bookings[:1]), self._queries('confirm', self.bookings[1:]))
+        self.assertEqual(set(Room.objects.values_list('status', flat=True)), {'reserved'})
+
+    def test_cancel_releases_nights_rooms_and_queues_emails(self):
+        from django.core import mail
+        from app.core.models import EmailLog
+        from app.core.services import EmailService
+        from .lifecycle import apply_transition
+        self.bookings[0].confirm_booking()
+        mail.outbox = []
+        with self.captureOnCommitCallbacks(execute=True):
+            result = apply_transition('cancel', Booking.objects.filter(hotel=self.hotel), reason='Cierre')
+        self.assertEqual(result['updated'], 6)
+        self.assertFalse(RoomNight.objects.exists())
+        self.assertEqual(set(Booking.objects.values_list('status', 'cancellation_reason')), {('cancelled', 'Cierre')})
+        self.assertFalse(Booking.objects.filter(cancelled_at__isnull=True).exists())
+        self.assertEqual(set(Room.objects.values_list('status', flat=True)), {'available'})
+        # Los emails quedan en cola: los envía el worker, no el cambio de estado
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailLog.objects.filter(status='queued').count(), 6)
+        self.assertEqual(EmailService.send_queued_emails(batch_size=4), {'success': True, 'sent': 6, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(EmailLog.objects.filter(subject__startswith='Cancelación', status='sent').count(), 6)
+
+        # Un email tomado por un worker que murió vuelve a la cola pasado el timeout
+        stale = EmailLog.objects.first()
+        EmailLog.objects.filter(pk=stale.pk).update(status='sending', claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(EmailService.send_queued_emails()['sent'], 1)
+        self.assertEqual(EmailLog.objects.get(pk=stale.pk).status, 'sent')
+        self.assertTrue(is_room_free(self.room, self.check_in, self.check_in + timedelta(days=2)))
+
+        # Solo se aplican a las reservas en un estado de origen válido
+        self.assertEqual(apply_transition('complete', Booking.objects.all())['updated'], 0)
+
+    def test_complete_and_no_show(self):
+        from .lifecycle import apply_transition
+        apply_transition('confirm', [b.id for b in self.bookings[:3]], notify=False)
+        result = apply_transition('complete', Booking.objects.all())
+        self.assertEqual(result['updated'], 3)
+        self.assertEqual(Room.objects.filter(status='cleaning').count(), 3)
+        self.assertEqual(apply_transition('no_show', Booking.objects.all())['updated'], 3)
+        self.assertEqual(Booking.objects.filter(status='no_show').count(), 3)
+        self.assertEqual(RoomNight.objects.count(), 0)
+        with self.assertRaises(ValueError):
+            apply_transition('archive', [])
+
+    def test_api(self):
+        from django.contrib.auth.models import User
+        url = '/api/bookings/bulk-status/'
+        User.objects.create_user('guest', 'guest@example.com', 'guestpass123')
+        self.client.login(username='guest', password='guestpass123')
+        self.assertEqual(self.client.post(url, {'action': 'cancel', 'ids': [1]}, content_type='application/json').status_code, 403)
+        User.objects.create_user('staff', 'staff@example.com', 'staffpass123', is_staff=True)
+        self.client.login(username='staff', password='staffpass123')
+        self.assertEqual(self.client.post(url, {'action': 'cancel', 'ids': [1]}).status_code, 415)
+        self.assertEqual(self.client.post(url, {'action': 'archive', 'ids': [1]}, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'action': 'cancel'}, content_type='application/json').status_code, 400)
+        Booking.objects.filter(pk=self.bookings[0].pk).update(hotel=None)
+        response = self.client.post(url, {
+            'action': 'cancel', 'hotel': self.hotel.id, 'notify': False,
+            'desde': (self.check_in + timedelta(days=1)).isoformat(), 'hasta': (self.check_in + timedelta(days=1)).isoformat(),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 6)
+        self.assertEqual(Booking.objects.filter(status='cancelled').count(), 6)
@@ -5,20 +5,59 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
+from django.core.exceptions import ValidationError
 from datetime import datetime, timedelta
 import json
 
-from .models import Booking
+from .models import Booking, BookingConflictError
+from .occupancy import booked_room_ids, is_room_free
+from .holds import place_hold, convert_hold, release_session_holds
+from .lifecycle import TRANSITIONS, apply_transition
 from app.rooms.models import Room
+from app.rooms.pricing import price_rooms, price_stay
 from app.clients.models import Client
 from app.core.services import EmailService
 from django.db.models import Q
-from django.http import HttpResponse
-import csv
+from app.core.export_jobs import export_response
+from app.core.resource_versions import conditional_on_versions
+from app.core.serializers import ProjectionSerializer, as_float, field, iso, list_json_response, or_empty
+
+# Orden de los listados de la API (clave de la paginación por cursor)
+BOOKING_LIST_ORDERING = ('-created_at', '-id')
+
+# Campos del listado de la API (?fields=...)
+BOOKING_LIST_FIELDS = ProjectionSerializer({
+    'id': field('id'),
+    'client.id': field('client_id'),
+    'client.full_name': field('client__first_name', 'client__last_name', convert=lambda first, last: f"{first} {last}"),
+    'client.email': field('client__email', convert=or_empty),
+    'room.id': field('room_id'),
+    'room.number': field('room__number', convert=or_empty),
+    'room.type': field('room__type', convert=or_empty),
+    'room.price': field('room__price', convert=as_float),
+    'check_in_date': field('check_in_date', convert=iso),
+    'check_out_date': field('check_out_date', convert=iso),
+    'duration': field('check_in_date', 'check_out_date',
+                      convert=lambda check_in, check_out: (check_out - check_in).days if check_in and check_out else 0),
+    'total_price': field('total_price', convert=as_float),
+    'status': field('status'),
+    'payment_status': field('payment_status'),
+    'guests_count': field('guests_count'),
+    'special_requests': field('special_requests', convert=or_empty),
+    'created_at': field('created_at', convert=iso),
+})
+
+def session_key_for(request):
+    """Clave de sesión (la crea si todavía no existe) para asociar bloqueos temporales"""
+    if not request.session.session_key:
+        request.session.save()
+    return request.session.session_key
 
 def booking_step1(request):
     """Paso 1: Selección de fechas y número de personas"""
     if request.method == 'POST':
+        # Nuevas fechas: liberar el bloqueo de una búsqueda anterior
+        release_session_holds(request.session.session_key)
         # Guardar datos en sesión
         request.session['booking_data'] = {
             'guests_count': request.POST.get('guests_count'),
@@ -46,33 +85,41 @@ def booking_step2(request):
         messages.error(request, 'Por favor, complete el paso 1 primero.')
         return redirect('booking_step1')
     
-    if request.method == 'POST':
-        room_id = request.POST.get('room_id')
-        if room_id:
-            booking_data['room_id'] = room_id
-            request.session['booking_data'] = booking_data
-            return redirect('booking_step3')
-    
-    # Obtener habitaciones disponibles
     check_in = datetime.strptime(booking_data['check_in_date'], '%Y-%m-%d').date()
     check_out = datetime.strptime(booking_data['check_out_date'], '%Y-%m-%d').date()
     guests_count = int(booking_data['guests_count'])
     
+    if request.method == 'POST':
+        room_id = request.POST.get('room_id')
+        if room_id:
+            # Bloquear la habitación mientras se completan los pasos siguientes
+            try:
+                room = Room.objects.get(id=room_id, active=True)
+                hold = place_hold(room, check_in, check_out, session_key_for(request))
+                booking_data['room_id'] = room_id
+                booking_data['hold_id'] = hold.id
+                request.session['booking_data'] = booking_data
+                return redirect('booking_step3')
+            except Room.DoesNotExist:
+                messages.error(request, 'La habitación seleccionada no existe.')
+            except BookingConflictError:
+                messages.error(request, 'La habitación acaba de ser reservada. Por favor, elija otra.')
+            except ValidationError as e:
+                messages.error(request, ' '.join(e.messages))
+    
+    # Obtener habitaciones disponibles    
     # Filtrar habitaciones disponibles
     available_rooms = Room.objects.filter(
         active=True,
         capacity__gte=guests_count,
         status='available'
-    ).exclude(
-        booking__check_in_date__lt=check_out,
-        booking__check_out_date__gt=check_in,
-        booking__status__in=['pending', 'confirmed']
-    ).distinct()
+    ).exclude(id__in=booked_room_ids(check_in, check_out))
     
-    # Calcular precio total para cada habitación
+    # Calcular precio total para cada habitación (calendario de tarifas, una consulta)
+    available_rooms = list(available_rooms)
+    prices = price_rooms(available_rooms, check_in, check_out)
     for room in available_rooms:
-        duration = (check_out - check_in).days
-        room.total_price = room.price * duration
+        room.total_price = prices[room.id]
     
     context = {
         'rooms': available_rooms,
@@ -148,7 +195,7 @@ def booking_step4(request):
     check_in = datetime.strptime(booking_data['check_in_date'], '%Y-%m-%d').date()
     check_out = datetime.strptime(booking_data['check_out_date'], '%Y-%m-%d').date()
     duration = (check_out - check_in).days
-    total_price = room.price * duration
+    total_price = price_stay(room, check_in, check_out)
     
     context = {
         'booking_data': booking_data,
@@ -181,18 +228,12 @@ def create_booking_final(request):
                 'message': 'La habitación seleccionada no existe'
             })
         
-        # Verificar disponibilidad una vez más
         check_in = datetime.strptime(booking_data['check_in_date'], '%Y-%m-%d').date()
         check_out = datetime.strptime(booking_data['check_out_date'], '%Y-%m-%d').date()
         
-        conflicting_bookings = Booking.objects.filter(
-            room=room,
-            status__in=['pending', 'confirmed'],
-            check_in_date__lt=check_out,
-            check_out_date__gt=check_in
-        )
-        
-        if conflicting_bookings.exists():
+        # Sin bloqueo vigente, verificar disponibilidad una vez más
+        hold_id = booking_data.get('hold_id')
+        if not hold_id and not is_room_free(room, check_in, check_out):
             return JsonResponse({
                 'success': False,
                 'message': 'La habitación ya no está disponible para las fechas seleccionadas'
@@ -226,22 +267,23 @@ def create_booking_final(request):
         client.save()
         
         # Calcular precio total
-        duration = (check_out - check_in).days
-        total_price = room.price * duration
+        total_price = price_stay(room, check_in, check_out)
         
-        # Crear la reserva
-        booking = Booking.objects.create(
+        # Crear la reserva: convertir el bloqueo si sigue vigente, si no validar y crear
+        booking_fields = dict(
             hotel=room.hotel,
             client=client,
-            room=room,
-            check_in_date=check_in,
-            check_out_date=check_out,
             status='confirmed',
             payment_status='pending',
             guests_count=int(booking_data['guests_count']),
             special_requests=booking_data.get('special_requests', ''),
             total_price=total_price
         )
+        booking = None
+        if hold_id:
+            booking = convert_hold(hold_id, request.session.session_key, room, check_in, check_out, **booking_fields)
+        if booking is None:
+            booking = Booking.objects.create(room=room, check_in_date=check_in, check_out_date=check_out, **booking_fields)
         
         # Cambiar estado de la habitación
         room.change_status('reserved')
@@ -261,6 +303,11 @@ def create_booking_final(request):
             'redirect_url': f'/portal/my-bookings/{booking.id}/'
         })
         
+    except BookingConflictError:
+        return JsonResponse({
+            'success': False,
+            'message': 'La habitación ya no está disponible para las fechas seleccionadas'
+        })
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -361,9 +408,10 @@ def cancel_booking(request, booking_id):
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_on_versions('bookings')
 def bookings_api(request):
-    """API: Listar reservas con filtros"""
-    qs = Booking.objects.select_related('client', 'room').all().order_by('-created_at')
+    """API: Listar reservas con filtros (?fields para elegir campos, paginado con ?limit / ?cursor, con ETag)"""
+    qs = Booking.objects.all()
     hotel_id = request.GET.get('hotel')
     if hotel_id:
         try:
@@ -383,34 +431,12 @@ def bookings_api(request):
     if check_in:
         qs = qs.filter(check_in_date=check_in)
     if search:
-        qs = qs.filter(Q(client__full_name__icontains=search) | Q(room__number__icontains=search))
-
-    data = []
-    for b in qs:
-        data.append({
-            'id': b.id,
-            'client': {
-                'id': b.client.id,
-                'full_name': getattr(b.client, 'full_name', str(b.client)),
-                'email': getattr(b.client, 'email', ''),
-            },
-            'room': {
-                'id': b.room.id if b.room else None,
-                'number': b.room.number if b.room else '',
-                'type': b.room.type if b.room else '',
-                'price': float(b.room.price) if b.room and b.room.price is not None else 0,
-            },
-            'check_in_date': b.check_in_date.isoformat() if b.check_in_date else None,
-            'check_out_date': b.check_out_date.isoformat() if b.check_out_date else None,
-            'duration': b.duration,
-            'total_price': float(b.total_price) if b.total_price is not None else 0,
-            'status': b.status,
-            'payment_status': b.payment_status,
-            'guests_count': b.guests_count,
-            'special_requests': b.special_requests or '',
-            'created_at': b.created_at.isoformat() if b.created_at else None,
-        })
-    return JsonResponse(data, safe=False)
+        qs = qs.filter(
+            Q(client__first_name__icontains=search) | Q(client__last_name__icontains=search)
+            | Q(room__number__icontains=search)
+        )
+
+    return list_json_response(request, qs, BOOKING_LIST_ORDERING, BOOKING_LIST_FIELDS)
 
 @login_required
 @csrf_exempt
@@ -434,13 +460,7 @@ def create_booking_api(request):
             return JsonResponse({'error': 'La fecha de salida debe ser posterior a la de llegada'}, status=400)
 
         # Verificar conflictos de fechas para la habitación
-        conflicts = Booking.objects.filter(
-            room=room,
-            status__in=['pending', 'confirmed'],
-            check_in_date__lt=check_out,
-            check_out_date__gt=check_in
-        )
-        if conflicts.exists():
+        if not is_room_free(room, check_in, check_out):
             return JsonResponse({'error': 'La habitación no está disponible para las fechas seleccionadas'}, status=400)
 
         status_val = payload.get('status', 'confirmed')
@@ -448,8 +468,7 @@ def create_booking_api(request):
         guests_count = int(payload.get('guests_count', 1))
         special_requests = payload.get('special_requests', '')
 
-        duration = (check_out - check_in).days
-        total_price = room.price * duration
+        total_price = price_stay(room, check_in, check_out)
 
         # Asegurar asociación de hotel
         if getattr(client, 'hotel_id', None) != getattr(room, 'hotel_id', None):
@@ -479,6 +498,8 @@ def create_booking_api(request):
             'id': booking.id,
             'message': 'Reserva creada exitosamente'
         })
+    except BookingConflictError:
+        return JsonResponse({'error': 'La habitación no está disponible para las fechas seleccionadas'}, status=409)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
@@ -514,20 +535,14 @@ def update_booking_api(request, booking_id):
             if ci >= co:
                 return JsonResponse({'error': 'La fecha de salida debe ser posterior a la de llegada'}, status=400)
 
-            conflicts = Booking.objects.filter(
-                room=room,
-                status__in=['pending', 'confirmed'],
-                check_in_date__lt=co,
-                check_out_date__gt=ci
-            ).exclude(id=booking.id)
-            if conflicts.exists():
+            if not is_room_free(room, ci, co, exclude_booking=booking):
                 return JsonResponse({'error': 'La habitación no está disponible para las nuevas fechas'}, status=400)
 
             booking.room = room
             booking.check_in_date = ci
             booking.check_out_date = co
             # Recalcular total
-            booking.total_price = room.price * ((co - ci).days)
+            booking.total_price = price_stay(room, ci, co)
 
         # Otros campos
         if 'guests_count' in data:
@@ -578,6 +593,48 @@ def booking_api_detail(request, booking_id):
     else:
         return delete_booking_api(request, booking_id)
 
+@login_required
+@require_http_methods(["POST"])
+def bookings_bulk_status_api(request):
+    """
+    API: Cambio de estado masivo (confirm, cancel, complete, no_show). Solo personal o superadmin.
+
+    Body JSON (application/json): action, y ids o bien hotel + desde + hasta
+    (reservas con noches en ese rango); opcionales reason (cancelación) y
+    notify (encolar emails, por defecto sí).
+    """
+    from app.core.views import is_superadmin
+
+    if not (request.user.is_staff or is_superadmin(request.user)):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    if request.content_type != 'application/json':
+        return JsonResponse({'error': 'Se requiere Content-Type application/json'}, status=415)
+    try:
+        data = json.loads(request.body or '{}')
+        action = data.get('action')
+        if action not in TRANSITIONS:
+            return JsonResponse({'error': f"Acción inválida. Opciones: {', '.join(TRANSITIONS)}"}, status=400)
+
+        if data.get('ids'):
+            qs = Booking.objects.filter(id__in=[int(booking_id) for booking_id in data['ids']])
+        elif data.get('hotel') and data.get('desde') and data.get('hasta'):
+            desde = datetime.strptime(data['desde'], '%Y-%m-%d').date()
+            hasta = datetime.strptime(data['hasta'], '%Y-%m-%d').date()
+            hotel_id = int(data['hotel'])
+            # Las reservas sin hotel cuentan en el de su habitación
+            qs = Booking.objects.filter(
+                Q(hotel_id=hotel_id) | Q(hotel__isnull=True, room__hotel_id=hotel_id),
+                check_in_date__lte=hasta, check_out_date__gt=desde,
+            )
+        else:
+            return JsonResponse({'error': 'Se requieren ids o bien hotel, desde y hasta'}, status=400)
+
+        result = apply_transition(action, qs, reason=data.get('reason', ''), notify=bool(data.get('notify', True)))
+        result['message'] = f"{result['updated']} reservas actualizadas"
+        return JsonResponse(result)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
 @login_required
 @require_http_methods(["POST"])
 @csrf_exempt
@@ -632,45 +689,5 @@ def cancel_booking(request, booking_id):
 
 @login_required
 def export_bookings_csv(request):
-    """Exporta reservas a CSV con filtros opcionales"""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="reservas.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Cliente', 'Email', 'Habitacion', 'Check-in', 'Check-out',
-        'Noches', 'Total', 'Estado', 'Pago', 'Creado'
-    ])
-
-    qs = Booking.objects.select_related('client', 'room').all().order_by('-created_at')
-
-    status = request.GET.get('status')
-    payment = request.GET.get('payment')
-    check_in = request.GET.get('check_in')
-    search = request.GET.get('search')
-
-    if status:
-        qs = qs.filter(status=status)
-    if payment:
-        qs = qs.filter(payment_status=payment)
-    if check_in:
-        qs = qs.filter(check_in_date=check_in)
-    if search:
-        qs = qs.filter(Q(client__full_name__icontains=search) | Q(room__number__icontains=search))
-
-    for b in qs:
-        writer.writerow([
-            b.id,
-            getattr(b.client, 'full_name', str(b.client)),
-            getattr(b.client, 'email', ''),
-            b.room.number if b.room else '',
-            b.check_in_date.isoformat() if b.check_in_date else '',
-            b.check_out_date.isoformat() if b.check_out_date else '',
-            b.duration,
-            float(b.total_price) if b.total_price is not None else 0,
-            b.get_status_display() if hasattr(b, 'get_status_display') else b.status,
-            b.get_payment_status_display() if hasattr(b, 'get_payment_status_display') else b.payment_status,
-            b.created_at.isoformat() if b.created_at else ''
-        ])
-
-    return response
+    """Exporta reservas a CSV (en streaming o, con ?background=1, en segundo plano) con filtros opcionales"""
+    return export_response(request, 'bookings')
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('clients', '0003_client_hotel'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['first_name', 'last_name', 'id'], name='clients_cli_first_n_8be5ee_idx'),
+        ),
+    ]
@@ -36,6 +36,10 @@ class Client(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Clave de la paginación por cursor de la API
+            models.Index(fields=['first_name', 'last_name', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -6,28 +6,37 @@ from django.views.decorators.csrf import csrf_exempt
 from django.db.models import Q
 
 from .models import Client
+from app.core.resource_versions import conditional_on_versions, hotel_param
+from app.core.serializers import ProjectionSerializer, field, list_json_response, or_empty
+
+# Orden de los listados de la API (clave de la paginación por cursor)
+CLIENT_LIST_ORDERING = ('first_name', 'last_name', 'id')
+
+# Campos del listado de la API (?fields=...)
+CLIENT_LIST_FIELDS = ProjectionSerializer({
+    'id': field('id'),
+    'full_name': field('first_name', 'last_name', convert=lambda first, last: f"{first} {last}".strip()),
+    'email': field('email'),
+    'dni': field('dni', convert=or_empty),
+})
 
 # Vistas existentes
 # Create your views here.
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_on_versions('clients')
 def clients_api(request):
-    """API: Listado simple de clientes para el selector del dashboard"""
-    qs = Client.objects.all().order_by('first_name', 'last_name')
+    """API: Listado simple de clientes para el selector del dashboard (?fields, paginado con ?limit / ?cursor, con ETag)"""
+    qs = Client.objects.all()
+    hotel_id = hotel_param(request)
+    if hotel_id:
+        qs = qs.filter(hotel_id=hotel_id)
     search = request.GET.get('search')
     if search:
         qs = qs.filter(Q(first_name__icontains=search) | Q(last_name__icontains=search) | Q(email__icontains=search) | Q(dni__icontains=search))
-    data = [
-        {
-            'id': c.id,
-            'full_name': getattr(c, 'full_name', f"{c.first_name} {c.last_name}").strip(),
-            'email': c.email,
-            'dni': c.dni or ''
-        }
-        for c in qs
-    ]
-    return JsonResponse(data, safe=False)
+
+    return list_json_response(request, qs, CLIENT_LIST_ORDERING, CLIENT_LIST_FIELDS)
 
 # Endpoint unificado si se desea expandir a POST en futuro
 @login_required
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EmailLog, ActionLog
+from .models import EmailLog, ActionLog, DailyHotelStats, ExportJob
 
 @admin.register(ActionLog)
 class ActionLogAdmin(admin.ModelAdmin):
@@ -55,3 +55,33 @@ class EmailLogAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         """No permitir crear registros manualmente desde el admin"""
         return False
+
+
+@admin.register(DailyHotelStats)
+class DailyHotelStatsAdmin(admin.ModelAdmin):
+    """Estadísticas diarias (se mantienen solas; rebuild_daily_stats las regenera)"""
+    list_display = ('hotel', 'date', 'rooms', 'occupied', 'arrivals', 'departures', 'pending', 'confirmed', 'cancelled', 'revenue')
+    list_filter = ('hotel', 'date')
+    date_hierarchy = 'date'
+    ordering = ('hotel', '-date')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """Exportaciones en segundo plano (las procesa run_export_jobs)"""
+    list_display = ('id', 'kind', 'requested_by', 'status', 'processed_rows', 'total_rows', 'created_at', 'expires_at')
+    list_filter = ('kind', 'status', 'created_at')
+    search_fields = ('requested_by__username',)
+    ordering = ('-created_at',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,170 @@
+"""
+Estadísticas diarias por hotel (DailyHotelStats) para los tableros.
+
+Cada fila resume un día de un hotel:
+
+- rooms: habitaciones del hotel;
+- occupied: habitaciones con una estadía confirmada (o finalizada) esa noche;
+- arrivals / departures: reservas que llegan / salen ese día (las salidas sin canceladas);
+- pending, confirmed, cancelled: reservas con llegada ese día, por estado;
+- revenue: ingresos de la noche (el total de cada estadía prorrateado por noche).
+
+Las filas de un rango se recalculan al recibir bookings_changed (el rango de
+la señal más el día de salida), con una consulta agrupada para las llegadas y
+salidas y una pasada por las estadías que tocan el rango. Los tableros leen
+una fila por día en lugar de recorrer reservas. Un día sin fila equivale a un
+día sin movimiento. La migración que crea la tabla genera las filas de los
+BACKFILL_DAYS días alrededor de la fecha de migración; rebuild_daily_stats
+regenera el histórico completo.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from .models import DailyHotelStats
+from app.bookings.models import Booking
+from app.rooms.models import Room
+
+# Estados que ocupan la habitación y generan ingresos
+STAY_STATUSES = ('confirmed', 'completed')
+STATUS_FIELDS = ('pending', 'confirmed', 'cancelled')
+STATS_FIELDS = ('rooms', 'occupied', 'arrivals', 'departures') + STATUS_FIELDS + ('revenue',)
+
+
+def hotel_bookings(hotel_id):
+    """Reservas del hotel (las que no tienen hotel cuentan en el de su habitación)"""
+    return Booking.objects.filter(Q(hotel_id=hotel_id) | Q(hotel__isnull=True, room__hotel_id=hotel_id))
+
+
+def compute_daily_stats(hotel_id, start, end) -> List[DailyHotelStats]:
+    """Calcula (sin guardar) las filas de los días [start, end] del hotel"""
+    days = (end - start).days + 1
+    if days <= 0:
+        return []
+    bookings = hotel_bookings(hotel_id)
+
+    arrivals = defaultdict(Counter)
+    for row in bookings.filter(check_in_date__range=(start, end)).values('check_in_date', 'status').annotate(
+        n=Count('id')
+    ).order_by():
+        arrivals[row['check_in_date']][row['status']] += row['n']
+    departures = dict(bookings.filter(check_out_date__range=(start, end)).exclude(status='cancelled').values(
+        'check_out_date'
+    ).annotate(n=Count('id')).order_by().values_list('check_out_date', 'n'))
+
+    occupied = defaultdict(set)
+    revenue = defaultdict(Decimal)
+    stays = bookings.filter(
+        status__in=STAY_STATUSES, check_in_date__lte=end, check_out_date__gt=start
+    ).values_list('room_id', 'check_in_date', 'check_out_date', 'total_price')
+    for room_id, check_in, check_out, total_price in stays.iterator():
+        nights = (check_out - check_in).days
+        nightly = (total_price or Decimal('0')) / nights
+        d = max(check_in, start)
+        while d < check_out and d <= end:
+            occupied[d].add(room_id)
+            revenue[d] += nightly
+            d += timedelta(days=1)
+
+    rooms = Room.objects.filter(hotel_id=hotel_id).count()
+    rows = []
+    for i in range(days):
+        d = start + timedelta(days=i)
+        by_status = arrivals.get(d, Counter())
+        rows.append(DailyHotelStats(
+            hotel_id=hotel_id, date=d, rooms=rooms, occupied=len(occupied.get(d, ())),
+            arrivals=sum(by_status.values()), departures=departures.get(d, 0),
+            pending=by_status['pending'], confirmed=by_status['confirmed'], cancelled=by_status['cancelled'],
+            revenue=revenue[d].quantize(Decimal('0.01')),
+        ))
+    return rows
+
+
+def refresh_daily_stats(hotel_id, start, end, batch_size=2000):
+    """
+    Recalcula y guarda (upsert) las filas de los días [start, end] del hotel.
+
+    Returns:
+        int: filas escritas
+    """
+    if hotel_id is None or start is None or end is None:
+        return 0
+    rows = compute_daily_stats(hotel_id, start, end)
+    DailyHotelStats.objects.bulk_create(
+        rows, batch_size=batch_size, update_conflicts=True,
+        unique_fields=['hotel', 'date'], update_fields=list(STATS_FIELDS) + ['updated_at'],
+    )
+    return len(rows)
+
+
+def refresh_room_counts(hotel_id):
+    """Alta o baja de habitaciones: actualiza rooms desde hoy (el histórico conserva su inventario)"""
+    if hotel_id is None:
+        return 0
+    rooms = Room.objects.filter(hotel_id=hotel_id).count()
+    return DailyHotelStats.objects.filter(
+        hotel_id=hotel_id, date__gte=timezone.now().date()
+    ).exclude(rooms=rooms).update(rooms=rooms)
+
+
+def rebuild_daily_stats(hotel=None, desde=None, hasta=None, batch_size=2000, stdout=None):
+    """
+    Regenera las filas desde las reservas.
+
+    Sin desde/hasta se reconstruye todo el período con reservas de cada hotel
+    (descartando las filas previas); con rango solo se recalculan esos días.
+
+    Returns:
+        int: filas escritas
+    """
+    from app.administration.models import Hotel
+
+    hotels = Hotel.objects.filter(id=hotel.id) if hotel is not None else Hotel.objects.all()
+    total = 0
+    for h in hotels.order_by('id'):
+        bounds = hotel_bookings(h.id).aggregate(first=Min('check_in_date'), last=Max('check_out_date'))
+        start = desde or bounds['first']
+        end = hasta or bounds['last']
+        if desde is None and hasta is None:
+            DailyHotelStats.objects.filter(hotel=h).delete()
+        if start is None or end is None or end < start:
+            continue
+        written = refresh_daily_stats(h.id, start, end, batch_size=batch_size)
+        total += written
+        if stdout is not None:
+            stdout.write(f"  {h.slug}: {written} días ({start} a {end})")
+    return total
+
+
+def stats_rows(desde, hasta, hotel=None):
+    """Filas del rango [desde, hasta], de un hotel o de todos"""
+    qs = DailyHotelStats.objects.filter(date__range=(desde, hasta))
+    if hotel is not None:
+        qs = qs.filter(hotel=hotel)
+    return qs
+
+
+def today_kpis(hotel=None) -> Dict[str, Optional[float]]:
+    """
+    Ocupación y llegadas de hoy.
+
+    Returns:
+        {'occupancy': ocupadas/habitaciones (None sin habitaciones), 'arrivals': n}
+    """
+    today = timezone.now().date()
+    agg = stats_rows(today, today, hotel).aggregate(occupied_total=Sum('occupied'), arrivals_total=Sum('arrivals'))
+    rooms = Room.objects.filter(hotel=hotel) if hotel is not None else Room.objects.all()
+    total_rooms = rooms.count()
+    occupancy = None if total_rooms == 0 else (agg['occupied_total'] or 0) / total_rooms
+    return {'occupancy': occupancy, 'arrivals': agg['arrivals_total'] or 0}
+
+
+def period_totals(desde, hasta, hotel=None) -> Dict[str, int]:
+    """Reservas con llegada en [desde, hasta]: total y por estado"""
+    fields = ('arrivals',) + STATUS_FIELDS
+    agg = stats_rows(desde, hasta, hotel).aggregate(**{f'{field}_total': Sum(field) for field in fields})
+    return {field: agg[f'{field}_total'] or 0 for field in fields}
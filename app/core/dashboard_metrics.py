@@ -0,0 +1,109 @@
+"""
+Contadores del dashboard del personal, por hotel y cacheados.
+
+Habitaciones por estado, habitaciones ocupadas, reservas activas, ingresos
+del mes y clientes se calculan con tres consultas de agregación condicional
+(habitaciones, reservas y clientes) y se guardan en caché por hotel y día.
+
+Guardar o borrar una reserva, habitación o cliente descarta la entrada de su
+hotel y la global (también tras el commit, para que ninguna lectura concurrente
+deje cacheado un estado anterior). Los cambios masivos de reservas llegan por
+bookings_changed.
+"""
+import hashlib
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.rooms.models import Room
+
+ALL_HOTELS = 'all'
+
+
+def cache_timeout():
+    """Duración de las entradas (DASHBOARD_METRICS_CACHE_TTL, 0 = caché deshabilitada)"""
+    return getattr(settings, 'DASHBOARD_METRICS_CACHE_TTL', 0)
+
+
+def _cache_key(hotel_id, today=None):
+    today = today or datetime.now().date()
+    return f"dashboard:metrics:{hotel_id or ALL_HOTELS}:{today.isoformat()}"
+
+
+def compute_dashboard_counters(hotel_id=None):
+    """Calcula los contadores del dashboard de un hotel (o de todos)"""
+    today = datetime.now().date()
+    start_of_month = today.replace(day=1)
+    rooms = Room.objects.all()
+    bookings = Booking.objects.all()
+    clients = Client.objects.all()
+    if hotel_id:
+        rooms = rooms.filter(hotel_id=hotel_id)
+        bookings = bookings.filter(hotel_id=hotel_id)
+        clients = clients.filter(hotel_id=hotel_id)
+
+    room_stats = rooms.aggregate(
+        total=Count('id'),
+        available=Count('id', filter=Q(status='available')),
+        cleaning=Count('id', filter=Q(status='cleaning')),
+        maintenance=Count('id', filter=Q(status='maintenance')),
+    )
+    active = Q(check_in_date__lte=today, check_out_date__gte=today, status='confirmed')
+    booking_stats = bookings.aggregate(
+        occupied_rooms=Count('room', filter=active, distinct=True),
+        active_bookings=Count('id', filter=active),
+        total_revenue=Sum('total_price', filter=Q(
+            check_in_date__gte=start_of_month, status__in=['confirmed', 'completed']
+        )),
+    )
+    return {
+        'total_rooms': room_stats['total'],
+        'available_rooms': room_stats['available'],
+        'occupied_rooms': booking_stats['occupied_rooms'],
+        'cleaning_rooms': room_stats['cleaning'],
+        'maintenance_rooms': room_stats['maintenance'],
+        'active_bookings': booking_stats['active_bookings'] or 0,
+        'total_revenue': booking_stats['total_revenue'] or 0,
+        'total_clients': clients.count(),
+        'computed_at': datetime.now().isoformat(),
+    }
+
+
+def get_dashboard_counters(hotel_id=None):
+    """Contadores del dashboard desde la caché (o calculados y guardados)"""
+    timeout = cache_timeout()
+    if not timeout:
+        return compute_dashboard_counters(hotel_id)
+    key = _cache_key(hotel_id)
+    counters = cache.get(key)
+    if counters is None:
+        counters = compute_dashboard_counters(hotel_id)
+        cache.set(key, counters, timeout)
+    return counters
+
+
+def serialize_counters(counters):
+    """Contadores en el formato JSON de dashboard_metrics_api"""
+    data = {key: value for key, value in counters.items() if key != 'computed_at'}
+    data['total_revenue'] = float(counters['total_revenue'])
+    data['timestamp'] = counters['computed_at']
+    return data
+
+
+def counters_etag(counters):
+    """ETag de los contadores (no depende del momento en que se calcularon)"""
+    payload = {key: str(value) for key, value in counters.items() if key != 'computed_at'}
+    return hashlib.md5(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def invalidate_dashboard_counters(hotel_id=None):
+    """Descarta los contadores del hotel y los globales, ahora y al confirmar la transacción"""
+    keys = [_cache_key(None)] + ([_cache_key(hotel_id)] if hotel_id else [])
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
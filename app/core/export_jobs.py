@@ -0,0 +1,190 @@
+"""
+Exportaciones CSV en segundo plano.
+
+Una solicitud crea un ExportJob pendiente con su tipo y filtros
+(enqueue_export). El worker (manage.py run_export_jobs) toma los trabajos
+pendientes con un UPDATE condicional, de modo que varios workers no procesan
+el mismo trabajo. Cada trabajo se escribe comprimido (gzip) en un archivo
+temporal, leyendo la base por lotes, y el avance se guarda cada
+PROGRESS_EVERY filas para poder consultarlo. El archivo terminado queda en
+EXPORT_JOBS_ROOT hasta expires_at; purge_expired_exports borra los vencidos.
+Un trabajo que sigue 'running' más de EXPORT_JOBS_STALE_MINUTES desde su
+inicio (el worker se detuvo) se marca como fallido para poder pedirlo de nuevo.
+"""
+import gzip
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .csv_export import csv_chunks
+from .exports import EXPORT_KINDS, build_export, export_rows
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_EVERY = 5000
+
+
+def retention():
+    """Tiempo que queda disponible un archivo terminado (EXPORT_JOBS_RETENTION_HOURS)"""
+    return timedelta(hours=getattr(settings, 'EXPORT_JOBS_RETENTION_HOURS', 48))
+
+
+def enqueue_export(kind, filters, user):
+    """
+    Crea un trabajo de exportación pendiente.
+
+    Raises:
+        ValueError: tipo desconocido o filtros inválidos
+    """
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Tipo de exportación desconocido: {kind}")
+    build_export(kind, filters)  # valida los filtros antes de encolar
+    return ExportJob.objects.create(kind=kind, filters=filters, requested_by=user)
+
+
+def stale_after():
+    """Tiempo desde el inicio tras el que un trabajo en curso se da por abandonado (EXPORT_JOBS_STALE_MINUTES)"""
+    return timedelta(minutes=getattr(settings, 'EXPORT_JOBS_STALE_MINUTES', 120))
+
+
+def fail_stale_jobs(now=None):
+    """Marca como fallidos los trabajos en curso cuyo worker se detuvo. Devuelve cuántos."""
+    now = now or timezone.now()
+    return ExportJob.objects.filter(status='running', started_at__lt=now - stale_after()).update(
+        status='failed', finished_at=now, error_message="El worker se detuvo antes de terminar la exportación"
+    )
+
+
+def claim_next_job():
+    """Toma el trabajo pendiente más antiguo (None si no hay)"""
+    while True:
+        job = ExportJob.objects.filter(status='pending').order_by('created_at', 'id').first()
+        if job is None:
+            return None
+        claimed = ExportJob.objects.filter(pk=job.pk, status='pending').update(
+            status='running', started_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_export_job(job):
+    """Escribe el archivo del trabajo y lo marca como completado (o fallido)"""
+    try:
+        spec = build_export(job.kind, job.filters)
+        total = spec.queryset.count()
+        ExportJob.objects.filter(pk=job.pk).update(total_rows=total)
+
+        def counted_rows():
+            for n, row in enumerate(export_rows(spec), start=1):
+                if n % PROGRESS_EVERY == 0:
+                    ExportJob.objects.filter(pk=job.pk).update(processed_rows=n)
+                yield row
+
+        with tempfile.TemporaryFile() as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode='wb') as compressed:
+                for chunk in csv_chunks(spec.header, counted_rows()):
+                    compressed.write(chunk)
+            size = tmp.tell()
+            tmp.seek(0)
+            job.file.save(f"{job.pk}_{spec.filename}.gz", File(tmp), save=False)
+    except Exception as e:
+        logger.exception("Error en la exportación %s", job.pk)
+        job.status = 'failed'
+        job.error_message = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'finished_at'])
+        return job
+
+    now = timezone.now()
+    job.status = 'completed'
+    job.total_rows = total
+    job.processed_rows = total
+    job.file_size = size
+    job.finished_at = now
+    job.expires_at = now + retention()
+    job.save(update_fields=['status', 'total_rows', 'processed_rows', 'file', 'file_size', 'finished_at', 'expires_at'])
+    return job
+
+
+def run_pending_jobs(limit=None):
+    """Procesa trabajos pendientes hasta vaciar la cola (o hasta limit). Devuelve cuántos procesó."""
+    fail_stale_jobs()
+    done = 0
+    while limit is None or done < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_export_job(job)
+        done += 1
+    return done
+
+
+def purge_expired_exports(now=None):
+    """Borra los archivos vencidos y marca sus trabajos como vencidos"""
+    now = now or timezone.now()
+    expired = ExportJob.objects.filter(status='completed', expires_at__lte=now)
+    total = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.status = 'expired'
+        job.save(update_fields=['status', 'file'])
+        total += 1
+    return total
+
+
+def job_payload(job):
+    """Estado del trabajo para las respuestas JSON"""
+    from django.urls import reverse
+
+    data = {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': None if job.progress is None else round(job.progress, 4),
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+        'status_url': reverse('export_job_status', args=[job.pk]),
+    }
+    if job.status == 'completed':
+        data['download_url'] = reverse('export_job_download', args=[job.pk])
+        data['file_size'] = job.file_size
+    if job.status == 'failed':
+        data['error'] = job.error_message
+    return data
+
+
+def export_response(request, kind):
+    """
+    Respuesta de una vista de exportación: el CSV en streaming o, con
+    ?background=1, el trabajo encolado (202) para descargarlo al terminar.
+    """
+    from django.http import JsonResponse
+
+    from .csv_export import streaming_csv_response, wants_gzip
+    from .exports import clean_filters
+
+    filters = clean_filters(kind, request.GET)
+    if request.GET.get('background') == '1':
+        try:
+            job = enqueue_export(kind, filters, request.user)
+        except ValueError as e:
+            return JsonResponse({'error': 'invalid_params', 'message': str(e)}, status=400)
+        return JsonResponse(job_payload(job), status=202)
+    try:
+        spec = build_export(kind, filters)
+    except ValueError:
+        # Filtros inválidos: solo el encabezado
+        spec = build_export(kind, {})
+        spec = spec._replace(queryset=spec.queryset.none())
+    return streaming_csv_response(spec.filename, spec.header, export_rows(spec), gzip=wants_gzip(request), request=request)
@@ -0,0 +1,259 @@
+"""
+Definiciones de las exportaciones CSV.
+
+Cada tipo de exportación arma, a partir de sus filtros, el encabezado, la
+consulta (una proyección values_list) y la conversión de cada fila. Las
+vistas de descarga directa (streaming) y los trabajos en segundo plano
+(app.core.export_jobs) usan las mismas definiciones.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+
+from .csv_export import DB_CHUNK_SIZE
+
+ExportSpec = namedtuple('ExportSpec', ['filename', 'header', 'queryset', 'convert'])
+
+# Tipos de exportación: (nombre, requiere superadmin)
+EXPORT_KINDS = {
+    'bookings': ('Reservas', False),
+    'superadmin_bookings': ('Reservas (todos los hoteles)', True),
+    'rooms': ('Habitaciones', False),
+    'clients': ('Clientes', False),
+    'email_logs': ('Registros de email', True),
+}
+
+# Filtros aceptados por tipo (los demás parámetros se ignoran)
+EXPORT_FILTERS = {
+    'bookings': ('status', 'payment', 'check_in', 'search'),
+    'superadmin_bookings': ('hotel', 'desde', 'hasta'),
+    'rooms': ('status', 'type', 'floor', 'search'),
+    'clients': ('hotel', 'active', 'search'),
+    'email_logs': ('status', 'desde', 'hasta'),
+}
+
+# Filtros que deben ser una fecha AAAA-MM-DD o un id numérico
+DATE_FILTERS = ('check_in', 'desde', 'hasta')
+INT_FILTERS = ('hotel', 'floor')
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name} {last_name}" if first_name is not None else ''
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _bookings(filters):
+    from app.bookings.models import Booking
+
+    qs = Booking.objects.order_by('-created_at')
+    if filters.get('status'):
+        qs = qs.filter(status=filters['status'])
+    if filters.get('payment'):
+        qs = qs.filter(payment_status=filters['payment'])
+    if filters.get('check_in'):
+        qs = qs.filter(check_in_date=_parse_date(filters['check_in']))
+    search = filters.get('search')
+    if search:
+        qs = qs.filter(
+            Q(client__first_name__icontains=search) | Q(client__last_name__icontains=search)
+            | Q(room__number__icontains=search)
+        )
+
+    status_labels = dict(Booking.STATUS_CHOICES)
+    payment_labels = dict(Booking.PAYMENT_STATUS_CHOICES)
+
+    def convert(row):
+        (pk, first_name, last_name, email, room_number, check_in_date, check_out_date,
+         total_price, status, payment_status, created_at) = row
+        return [
+            pk,
+            _full_name(first_name, last_name),
+            email or '',
+            room_number or '',
+            check_in_date.isoformat() if check_in_date else '',
+            check_out_date.isoformat() if check_out_date else '',
+            (check_out_date - check_in_date).days if check_in_date and check_out_date else 0,
+            float(total_price) if total_price is not None else 0,
+            status_labels.get(status, status),
+            payment_labels.get(payment_status, payment_status),
+            created_at.isoformat() if created_at else '',
+        ]
+
+    return ExportSpec(
+        'reservas.csv',
+        ['ID', 'Cliente', 'Email', 'Habitacion', 'Check-in', 'Check-out', 'Noches', 'Total', 'Estado', 'Pago', 'Creado'],
+        qs.values_list(
+            'id', 'client__first_name', 'client__last_name', 'client__email', 'room__number',
+            'check_in_date', 'check_out_date', 'total_price', 'status', 'payment_status', 'created_at'
+        ),
+        convert,
+    )
+
+
+def _superadmin_bookings(filters):
+    from app.bookings.models import Booking
+
+    qs = Booking.objects.order_by('-created_at')
+    if filters.get('hotel'):
+        qs = qs.filter(hotel_id=filters['hotel'])
+    if filters.get('desde') and filters.get('hasta'):
+        qs = qs.filter(check_in_date__gte=_parse_date(filters['desde']), check_out_date__lte=_parse_date(filters['hasta']))
+
+    def convert(row):
+        pk, hotel, room, first_name, last_name, check_in, check_out, status, total = row
+        return [pk, hotel, room, _full_name(first_name, last_name), check_in, check_out, status, total]
+
+    return ExportSpec(
+        'reservas.csv',
+        ['id', 'hotel', 'habitacion', 'cliente', 'check_in', 'check_out', 'estado', 'total_price'],
+        qs.values_list(
+            'id', 'hotel__name', 'room__number', 'client__first_name', 'client__last_name',
+            'check_in_date', 'check_out_date', 'status', 'total_price'
+        ),
+        convert,
+    )
+
+
+def _rooms(filters):
+    from app.rooms.models import Room
+
+    qs = Room.objects.order_by('number')
+    if filters.get('status'):
+        qs = qs.filter(status=filters['status'])
+    if filters.get('type'):
+        qs = qs.filter(type=filters['type'])
+    if filters.get('floor'):
+        qs = qs.filter(floor=filters['floor'])
+    if filters.get('search'):
+        qs = qs.filter(Q(number__icontains=filters['search']) | Q(description__icontains=filters['search']))
+
+    type_labels = dict(Room.TYPE_CHOICES)
+    status_labels = dict(Room.STATUS_CHOICES)
+
+    def convert(row):
+        number, room_type, capacity, floor, price, status, active, description = row
+        return [
+            number,
+            type_labels.get(room_type, room_type),
+            capacity,
+            floor,
+            price,
+            status_labels.get(status, status),
+            'Sí' if active else 'No',
+            (description or '').replace('\n', ' ').strip(),
+        ]
+
+    return ExportSpec(
+        'habitaciones.csv',
+        ['Numero', 'Tipo', 'Capacidad', 'Piso', 'Precio', 'Estado', 'Activa', 'Descripcion'],
+        qs.values_list('number', 'type', 'capacity', 'floor', 'price', 'status', 'active', 'description'),
+        convert,
+    )
+
+
+def _clients(filters):
+    from app.clients.models import Client
+
+    qs = Client.objects.order_by('last_name', 'first_name', 'id')
+    if filters.get('hotel'):
+        qs = qs.filter(hotel_id=filters['hotel'])
+    if filters.get('active') in ('0', '1'):
+        qs = qs.filter(active=filters['active'] == '1')
+    search = filters.get('search')
+    if search:
+        qs = qs.filter(
+            Q(first_name__icontains=search) | Q(last_name__icontains=search)
+            | Q(email__icontains=search) | Q(dni__icontains=search)
+        )
+
+    def convert(row):
+        pk, first_name, last_name, email, phone, dni, nationality, vip, active, created_at = row
+        return [pk, first_name, last_name, email, phone or '', dni, nationality or '',
+                'Sí' if vip else 'No', 'Sí' if active else 'No', created_at.isoformat() if created_at else '']
+
+    return ExportSpec(
+        'clientes.csv',
+        ['ID', 'Nombre', 'Apellido', 'Email', 'Telefono', 'DNI', 'Nacionalidad', 'VIP', 'Activo', 'Creado'],
+        qs.values_list('id', 'first_name', 'last_name', 'email', 'phone', 'dni', 'nationality', 'vip', 'active', 'created_at'),
+        convert,
+    )
+
+
+def _email_logs(filters):
+    from .models import EmailLog
+
+    qs = EmailLog.objects.order_by('-created_at')
+    if filters.get('status'):
+        qs = qs.filter(status=filters['status'])
+    if filters.get('desde'):
+        qs = qs.filter(created_at__date__gte=_parse_date(filters['desde']))
+    if filters.get('hasta'):
+        qs = qs.filter(created_at__date__lte=_parse_date(filters['hasta']))
+
+    status_labels = dict(EmailLog.STATUS_CHOICES)
+
+    def convert(row):
+        pk, recipient, name, subject, status, sent_at, booking_id, created_at = row
+        return [pk, recipient, name, subject, status_labels.get(status, status),
+                sent_at.isoformat() if sent_at else '', booking_id or '', created_at.isoformat() if created_at else '']
+
+    return ExportSpec(
+        'emails.csv',
+        ['ID', 'Destinatario', 'Nombre', 'Asunto', 'Estado', 'Enviado', 'Reserva', 'Creado'],
+        qs.values_list('id', 'recipient_email', 'recipient_name', 'subject', 'status', 'sent_at', 'booking_id', 'created_at'),
+        convert,
+    )
+
+
+_BUILDERS = {
+    'bookings': _bookings,
+    'superadmin_bookings': _superadmin_bookings,
+    'rooms': _rooms,
+    'clients': _clients,
+    'email_logs': _email_logs,
+}
+
+
+def clean_filters(kind, params):
+    """Filtros aceptados del tipo a partir de un QueryDict o dict (sin valores vacíos)"""
+    return {name: str(params.get(name)) for name in EXPORT_FILTERS[kind] if params.get(name)}
+
+
+def validate_filters(filters):
+    """
+    Comprueba las fechas e ids de los filtros.
+
+    Raises:
+        ValueError: filtro con una fecha o un id inválido
+    """
+    for name, value in filters.items():
+        try:
+            if name in DATE_FILTERS:
+                _parse_date(value)
+            elif name in INT_FILTERS:
+                int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Filtro inválido: {name}={value}")
+
+
+def build_export(kind, filters):
+    """
+    Definición de la exportación.
+
+    Raises:
+        ValueError: tipo desconocido o filtros inválidos (fechas, ids)
+    """
+    if kind not in _BUILDERS:
+        raise ValueError(f"Tipo de exportación desconocido: {kind}")
+    validate_filters(filters)
+    return _BUILDERS[kind](filters)
+
+
+def export_rows(spec):
+    """Filas convertidas, leídas por lotes desde la base"""
+    for row in spec.queryset.iterator(chunk_size=DB_CHUNK_SIZE):
+        yield spec.convert(row)
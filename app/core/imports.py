@@ -0,0 +1,581 @@
+"""
+Importación masiva de habitaciones, clientes y reservas (CSV, JSON o JSON Lines).
+
+Las filas se leen de a una y se procesan por lotes: cada lote se valida en
+memoria, resuelve sus referencias (hotel, habitación, cliente) con una
+consulta por tipo y se escribe con bulk_create dentro de una transacción.
+
+- Habitaciones: alta o actualización por (hotel, número).
+- Clientes: alta o actualización por email o, si no coincide, por DNI.
+- Reservas: se crean siempre; las activas (pendientes o confirmadas) generan
+  sus noches en RoomNight. Antes de insertar se descartan las que se solapan
+  con noches ya ocupadas o con otra reserva del mismo archivo, y se liberan
+  las noches de bloqueos vencidos. Si otra reserva ocupa una noche entre la
+  consulta y el insert, el lote se reintenta fila por fila y las que chocan
+  quedan como errores.
+
+Las filas inválidas no detienen la importación: cada una queda registrada
+con su número de fila y el motivo. Al terminar se avisa a los consumidores
+(estadísticas, disponibilidad, cupos y dashboard) una vez por hotel, sin
+enviar emails de confirmación.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+IMPORT_KINDS = ('rooms', 'clients', 'bookings')
+IMPORT_FORMATS = ('csv', 'json', 'jsonl')
+DEFAULT_BATCH_SIZE = 2000
+
+
+class ImportResult:
+    """Resumen de una importación: filas creadas, actualizadas y errores por fila"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+    def as_dict(self, max_errors=None):
+        errors = self.errors if max_errors is None else self.errors[:max_errors]
+        return {
+            'kind': self.kind,
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': len(self.errors),
+            'errors': [{'row': row, 'message': message} for row, message in errors],
+        }
+
+
+class RowError(ValueError):
+    """Fila inválida (el mensaje se informa tal cual)"""
+
+
+# --- Lectura -----------------------------------------------------------------
+
+def detect_format(filename):
+    """Formato según la extensión del archivo (csv por defecto)"""
+    name = (filename or '').lower()
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    if name.endswith('.json'):
+        return 'json'
+    return 'csv'
+
+
+def read_rows(fileobj, fmt):
+    """
+    Filas del archivo como (número de fila, dict). fileobj puede ser binario o de texto.
+    En CSV el número de fila cuenta el encabezado (la primera fila de datos es la 2).
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt}")
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(fileobj), start=2):
+            yield number, {key.strip(): (value or '').strip() for key, value in row.items() if key}
+    elif fmt == 'jsonl':
+        for number, line in enumerate(fileobj, start=1):
+            if line.strip():
+                yield number, _json_object(line)
+    else:
+        data = json.load(fileobj)
+        if not isinstance(data, list):
+            raise ValueError("El JSON debe ser una lista de objetos")
+        for number, row in enumerate(data, start=1):
+            yield number, row if isinstance(row, dict) else None
+
+
+def _json_object(line):
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return None
+    return row if isinstance(row, dict) else None
+
+
+def _batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+# --- Validación de campos ----------------------------------------------------
+
+def _text(row, field, required=False, max_length=None):
+    value = row.get(field)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f"Falta {field}")
+    if max_length and len(value) > max_length:
+        raise RowError(f"{field} supera {max_length} caracteres")
+    return value
+
+
+def _date(row, field, required=True):
+    value = _text(row, field, required)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise RowError(f"{field} debe tener el formato YYYY-MM-DD")
+
+
+def _decimal(row, field, default=None):
+    value = _text(row, field)
+    if not value:
+        if default is None:
+            raise RowError(f"Falta {field}")
+        return default
+    try:
+        number = Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise RowError(f"{field} no es un número válido")
+    if number < 0:
+        raise RowError(f"{field} no puede ser negativo")
+    return number
+
+
+def _int(row, field, default):
+    value = _text(row, field)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RowError(f"{field} debe ser un número entero")
+    if number < 0:
+        raise RowError(f"{field} no puede ser negativo")
+    return number
+
+
+def _bool(row, field, default):
+    value = _text(row, field).lower()
+    if not value:
+        return default
+    if value in ('1', 'true', 'si', 'sí', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    raise RowError(f"{field} debe ser sí/no")
+
+
+def _choice(row, field, choices, default):
+    value = _text(row, field) or default
+    if value not in dict(choices):
+        raise RowError(f"{field} inválido: {value}")
+    return value
+
+
+class _Hotels:
+    """Hoteles por slug (o el hotel fijo de la importación), consultados una vez"""
+
+    def __init__(self, hotel=None):
+        from app.administration.models import Hotel
+        self.fixed = hotel
+        self.by_slug = {} if hotel else dict(Hotel.objects.values_list('slug', 'id'))
+
+    def resolve(self, row, required):
+        if self.fixed is not None:
+            return self.fixed.id
+        slug = _text(row, 'hotel')
+        if not slug:
+            if required:
+                raise RowError("Falta hotel")
+            return None
+        if slug not in self.by_slug:
+            raise RowError(f"Hotel '{slug}' no encontrado")
+        return self.by_slug[slug]
+
+
+# --- Habitaciones ------------------------------------------------------------
+
+ROOM_FIELDS = ('type', 'capacity', 'status', 'price', 'description', 'floor', 'active')
+
+
+def _import_rooms(batch, hotels, result, dry_run, state):
+    from app.rooms.models import Room
+
+    parsed = {}
+    for number, row in batch:
+        try:
+            hotel_id = hotels.resolve(row, required=True)
+            room = Room(
+                hotel_id=hotel_id,
+                number=_text(row, 'number', required=True, max_length=10),
+                type=_choice(row, 'type', Room.TYPE_CHOICES, 'individual'),
+                capacity=_int(row, 'capacity', 1),
+                status=_choice(row, 'status', Room.STATUS_CHOICES, 'available'),
+                price=_decimal(row, 'price'),
+                description=_text(row, 'description') or None,
+                floor=_int(row, 'floor', 1),
+                active=_bool(row, 'active', True),
+            )
+        except RowError as e:
+            result.error(number, str(e))
+            continue
+        # La última fila de una misma habitación es la que vale
+        parsed[(room.hotel_id, room.number)] = room
+    if not parsed:
+        return
+
+    existing = set(Room.objects.filter(
+        hotel_id__in={hotel_id for hotel_id, _ in parsed}, number__in={n for _, n in parsed}
+    ).values_list('hotel_id', 'number'))
+    updated = sum(1 for key in parsed if key in existing)
+    result.created += len(parsed) - updated
+    result.updated += updated
+    state['hotel_ids'].update(hotel_id for hotel_id, _ in parsed)
+    if not dry_run:
+        Room.objects.bulk_create(
+            list(parsed.values()), update_conflicts=True,
+            unique_fields=['hotel', 'number'], update_fields=list(ROOM_FIELDS) + ['updated_at'],
+        )
+
+
+def _rooms_changed(hotel_ids):
+    """Avisos que el alta individual hace por señal (post_save de Room)"""
+    from app.core.daily_stats import refresh_room_counts
+    from app.core.dashboard_metrics import invalidate_dashboard_counters
+    from app.core.resource_versions import bump_versions
+    from app.rooms.allotments import drop_allotments
+    from app.rooms.availability_cache import invalidate_hotel
+    from app.rooms.availability_engine import engine
+
+    for hotel_id in hotel_ids:
+        engine.invalidate(hotel_id)
+        invalidate_hotel(hotel_id)
+        drop_allotments(hotel_id)
+        refresh_room_counts(hotel_id)
+        invalidate_dashboard_counters(hotel_id)
+    bump_versions(('rooms',), hotel_ids)
+    bump_versions(('bookings',), all_scopes=True)
+
+
+# --- Clientes ----------------------------------------------------------------
+
+def _parse_client(row, hotels):
+    email = _text(row, 'email', required=True).lower()
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise RowError(f"Email inválido: {email}")
+    return {
+        'first_name': _text(row, 'first_name', required=True, max_length=100),
+        'last_name': _text(row, 'last_name', required=True, max_length=100),
+        'email': email,
+        'dni': _text(row, 'dni', required=True, max_length=20),
+        'phone': _text(row, 'phone', max_length=20) or None,
+        'address': _text(row, 'address') or None,
+        'birth_date': _date(row, 'birth_date', required=False),
+        'nationality': _text(row, 'nationality', max_length=50) or None,
+        'active': _bool(row, 'active', True),
+        'vip': _bool(row, 'vip', False),
+        'hotel_id': hotels.resolve(row, required=False),
+    }
+
+
+def _import_clients(batch, hotels, result, dry_run, state):
+    from app.clients.models import Client
+
+    parsed = []
+    for number, row in batch:
+        try:
+            parsed.append((number, _parse_client(row, hotels)))
+        except RowError as e:
+            result.error(number, str(e))
+    if not parsed:
+        return
+
+    emails = {data['email'] for _, data in parsed}
+    dnis = {data['dni'] for _, data in parsed}
+    existing = list(Client.objects.annotate(email_lower=Lower('email')).filter(Q(email_lower__in=emails) | Q(dni__in=dnis)))
+    by_email = {client.email.lower(): client for client in existing}
+    by_dni = {client.dni: client for client in existing}
+
+    to_create, to_update = [], {}
+    for number, data in parsed:
+        by_mail, by_doc = by_email.get(data['email']), by_dni.get(data['dni'])
+        if by_mail is not None and by_doc is not None and by_mail is not by_doc:
+            result.error(number, f"El email {data['email']} y el DNI {data['dni']} pertenecen a clientes distintos")
+            continue
+        client = by_mail or by_doc
+        if client is None:
+            client = Client(**data)
+            to_create.append(client)
+            result.created += 1
+        else:
+            for field, value in data.items():
+                if field == 'hotel_id' and value is None:
+                    continue
+                setattr(client, field, value)
+            if client.pk:
+                if client.pk not in to_update:
+                    result.updated += 1
+                to_update[client.pk] = client
+        # Filas posteriores del mismo lote encuentran este cliente
+        by_email[client.email.lower()] = client
+        by_dni[client.dni] = client
+    if not dry_run:
+        Client.objects.bulk_create(to_create)
+        Client.objects.bulk_update(list(to_update.values()), [
+            'first_name', 'last_name', 'email', 'phone', 'dni', 'address', 'birth_date',
+            'nationality', 'active', 'vip', 'hotel_id',
+        ])
+    state['hotel_ids'].update(c.hotel_id for c in to_create + list(to_update.values()) if c.hotel_id)
+
+
+# --- Reservas ----------------------------------------------------------------
+
+def _parse_booking(row, hotels):
+    from app.bookings.models import Booking
+
+    check_in = _date(row, 'check_in')
+    check_out = _date(row, 'check_out')
+    if check_out <= check_in:
+        raise RowError("check_out debe ser posterior a check_in")
+    email = _text(row, 'client_email').lower()
+    dni = _text(row, 'client_dni')
+    if not email and not dni:
+        raise RowError("Falta client_email o client_dni")
+    return {
+        'hotel_id': hotels.resolve(row, required=True),
+        'room_number': _text(row, 'room', required=True),
+        'client_email': email,
+        'client_dni': dni,
+        'check_in_date': check_in,
+        'check_out_date': check_out,
+        'status': _choice(row, 'status', Booking.STATUS_CHOICES, 'confirmed'),
+        'payment_status': _choice(row, 'payment_status', Booking.PAYMENT_STATUS_CHOICES, 'pending'),
+        'total_price': _decimal(row, 'total_price', default=Decimal('-1')),
+        'paid_amount': _decimal(row, 'paid_amount', default=Decimal('0')),
+        'guests_count': _int(row, 'guests_count', 1) or 1,
+        'special_requests': _text(row, 'special_requests') or None,
+    }
+
+
+def _import_bookings(batch, hotels, result, dry_run, state):
+    from app.bookings.models import ACTIVE_STATUSES, Booking
+    from app.bookings.occupancy import active_nights, nights_between, purge_expired_nights
+    from app.clients.models import Client
+    from app.rooms.models import Room
+
+    parsed = []
+    for number, row in batch:
+        try:
+            parsed.append((number, _parse_booking(row, hotels)))
+        except RowError as e:
+            result.error(number, str(e))
+    if not parsed:
+        return
+
+    # Referencias del lote: una consulta por tipo
+    rooms = {
+        (hotel_id, room_number): (room_id, price)
+        for room_id, hotel_id, room_number, price in Room.objects.filter(
+            hotel_id__in={data['hotel_id'] for _, data in parsed},
+            number__in={data['room_number'] for _, data in parsed},
+        ).values_list('id', 'hotel_id', 'number', 'price')
+    }
+    emails = {data['client_email'] for _, data in parsed if data['client_email']}
+    dnis = {data['client_dni'] for _, data in parsed if data['client_dni']}
+    clients_by_email, clients_by_dni = {}, {}
+    for client_id, email, dni in Client.objects.annotate(email_lower=Lower('email')).filter(
+        Q(email_lower__in=emails) | Q(dni__in=dnis)
+    ).values_list('id', 'email', 'dni'):
+        clients_by_email[email.lower()] = client_id
+        clients_by_dni[dni] = client_id
+
+    # Noches ya ocupadas en las habitaciones y fechas del lote
+    resolved = []
+    for number, data in parsed:
+        room = rooms.get((data['hotel_id'], data['room_number']))
+        client_id = clients_by_email.get(data['client_email']) or clients_by_dni.get(data['client_dni'])
+        if room is None:
+            result.error(number, f"Habitación '{data['room_number']}' no encontrada en el hotel")
+        elif client_id is None:
+            result.error(number, "Cliente no encontrado (importar primero los clientes)")
+        else:
+            resolved.append((number, data, room, client_id))
+    active = [(n, d, r, c) for n, d, r, c in resolved if d['status'] in ACTIVE_STATUSES]
+    taken = set()
+    if active:
+        taken = set(active_nights().filter(
+            room_id__in={room[0] for _, _, room, _ in active},
+            date__gte=min(d['check_in_date'] for _, d, _, _ in active),
+            date__lt=max(d['check_out_date'] for _, d, _, _ in active),
+        ).values_list('room_id', 'date'))
+    # En simulación las noches de lotes anteriores no están en la base
+    taken |= state['dry_run_nights']
+
+    rows = []
+    for number, data, (room_id, room_price), client_id in resolved:
+        stay = nights_between(data['check_in_date'], data['check_out_date'])
+        if data['status'] in ACTIVE_STATUSES:
+            wanted = {(room_id, d) for d in stay}
+            if wanted & taken:
+                result.error(number, "La habitación ya está ocupada en alguna de esas noches")
+                continue
+            taken |= wanted
+        else:
+            wanted = None
+        total_price = data['total_price'] if data['total_price'] >= 0 else room_price * len(stay)
+        rows.append((number, wanted, Booking(
+            hotel_id=data['hotel_id'], room_id=room_id, client_id=client_id,
+            check_in_date=data['check_in_date'], check_out_date=data['check_out_date'],
+            status=data['status'], payment_status=data['payment_status'], total_price=total_price,
+            paid_amount=data['paid_amount'], guests_count=data['guests_count'],
+            special_requests=data['special_requests'],
+        )))
+    if dry_run:
+        state['dry_run_nights'] = taken
+    else:
+        wanted_nights = set().union(*(wanted for _, wanted, _ in rows if wanted))
+        if wanted_nights:
+            # Las noches de bloqueos vencidos siguen en RoomNight y chocarían con el insert
+            purge_expired_nights({room_id for room_id, _ in wanted_nights}, {d for _, d in wanted_nights})
+        rows = _insert_bookings(rows, result)
+
+    result.created += len(rows)
+    for _, _, booking in rows:
+        spans = state['spans']
+        key = (booking.hotel_id, booking.room_id)
+        start, end = spans.get(key, (booking.check_in_date, booking.check_out_date))
+        spans[key] = (min(start, booking.check_in_date), max(end, booking.check_out_date))
+
+
+def _write_bookings(rows):
+    from app.bookings.models import Booking, RoomNight
+
+    Booking.objects.bulk_create([booking for _, _, booking in rows])
+    RoomNight.objects.bulk_create([
+        RoomNight(room_id=room_id, hotel_id=booking.hotel_id, booking_id=booking.pk, date=d)
+        for _, wanted, booking in rows if wanted
+        for room_id, d in sorted(wanted)
+    ], batch_size=DEFAULT_BATCH_SIZE)
+
+
+def _insert_bookings(rows, result):
+    """
+    Inserta las reservas del lote y sus noches.
+
+    Si otra reserva o bloqueo ocupó alguna noche después de la consulta, el
+    lote se reintenta fila por fila y las que chocan quedan como errores.
+
+    Returns:
+        list: las filas insertadas
+    """
+    from app.bookings.models import is_occupancy_conflict
+
+    try:
+        with transaction.atomic():
+            _write_bookings(rows)
+        return rows
+    except IntegrityError as e:
+        if not is_occupancy_conflict(e):
+            raise
+    inserted = []
+    for number, wanted, booking in rows:
+        booking.pk = None
+        booking._state.adding = True
+        try:
+            with transaction.atomic():
+                _write_bookings([(number, wanted, booking)])
+        except IntegrityError as e:
+            if not is_occupancy_conflict(e):
+                raise
+            result.error(number, "La habitación ya está ocupada en alguna de esas noches")
+            continue
+        inserted.append((number, wanted, booking))
+    return inserted
+
+
+def _bookings_changed(spans):
+    """Un aviso por hotel con las habitaciones y el rango de noches importados"""
+    from app.bookings.signals import notify_bookings_bulk_changed
+    from app.rooms.allotments import drop_allotments
+
+    notify_bookings_bulk_changed(
+        (hotel_id, room_id, start, end) for (hotel_id, room_id), (start, end) in spans.items()
+    )
+    for hotel_id in {hotel_id for hotel_id, _ in spans}:
+        drop_allotments(hotel_id)
+
+
+_IMPORTERS = {
+    'rooms': _import_rooms,
+    'clients': _import_clients,
+    'bookings': _import_bookings,
+}
+
+
+def import_rows(kind, rows, hotel=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, stdout=None):
+    """
+    Importa filas (número de fila, dict) de un tipo.
+
+    Args:
+        hotel: hotel de todas las filas (si no, cada fila indica el slug en 'hotel')
+        batch_size: filas por lote (una transacción por lote)
+        dry_run: validar sin escribir
+
+    Returns:
+        ImportResult
+    """
+    if kind not in _IMPORTERS:
+        raise ValueError(f"Tipo de importación desconocido: {kind}")
+    importer = _IMPORTERS[kind]
+    hotels = _Hotels(hotel)
+    result = ImportResult(kind)
+    state = {'hotel_ids': set(), 'spans': {}, 'dry_run_nights': set()}
+    for batch in _batched(rows, batch_size):
+        result.rows += len(batch)
+        invalid = [(number, row) for number, row in batch if row is None]
+        for number, _ in invalid:
+            result.error(number, "La fila no es un objeto")
+        batch = [(number, row) for number, row in batch if row is not None]
+        with transaction.atomic():
+            importer(batch, hotels, result, dry_run, state)
+        if stdout is not None:
+            stdout.write(f"  {result.rows} filas leídas ({result.created} nuevas, {result.updated} actualizadas, "
+                         f"{len(result.errors)} con errores)")
+
+    result.errors.sort(key=lambda error: error[0])
+
+    if not dry_run:
+        if kind == 'rooms':
+            _rooms_changed(state['hotel_ids'])
+        elif kind == 'clients':
+            from app.core.dashboard_metrics import invalidate_dashboard_counters
+            from app.core.resource_versions import bump_versions
+            for hotel_id in state['hotel_ids']:
+                invalidate_dashboard_counters(hotel_id)
+            bump_versions(('clients',), state['hotel_ids'])
+            bump_versions(('bookings',), all_scopes=True)
+        elif state['spans']:
+            _bookings_changed(state['spans'])
+    return result
+
+
+def import_file(kind, fileobj, fmt, **kwargs):
+    """Importa un archivo (ver import_rows)"""
+    return import_rows(kind, read_rows(fileobj, fmt), **kwargs)
@@ -0,0 +1,137 @@
+"""
+Métricas del dashboard en vivo (Server-Sent Events).
+
+Un único hub por proceso reparte los cambios: cuando cambian reservas o
+habitaciones de un hotel, tras el commit se obtienen una vez los contadores
+del hotel (y los globales) y se entregan a todas las conexiones abiertas de
+ese alcance. Cada conexión envía solo las métricas que cambiaron respecto de
+lo último que mandó.
+
+Las conexiones son generadores asíncronos (ASGI); las señales llegan desde
+hilos sincrónicos, así que el hub despierta a cada conexión en su event loop
+con call_soon_threadsafe. Si una conexión se atrasa, solo conserva los
+últimos contadores.
+
+Los cambios hechos en otros procesos se detectan al vencer el heartbeat,
+releyendo los contadores de la caché compartida.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .dashboard_metrics import ALL_HOTELS, get_dashboard_counters, serialize_counters
+
+
+def heartbeat_interval():
+    """Segundos sin cambios antes de enviar un keepalive (LIVE_METRICS_HEARTBEAT)"""
+    return getattr(settings, 'LIVE_METRICS_HEARTBEAT', 25)
+
+
+def _scope(hotel_id):
+    return hotel_id or ALL_HOTELS
+
+
+class Subscriber:
+    """Una conexión SSE: guarda los últimos contadores recibidos hasta que la conexión los lea"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.latest = None
+        self.event = asyncio.Event()
+
+    def _deliver(self, counters):
+        self.latest = counters
+        self.event.set()
+
+    def push(self, counters):
+        """Entrega desde cualquier hilo"""
+        self.loop.call_soon_threadsafe(self._deliver, counters)
+
+    async def wait(self, timeout):
+        """Últimos contadores recibidos, o None si venció el timeout"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.event.clear()
+        counters, self.latest = self.latest, None
+        return counters
+
+
+class LiveMetricsHub:
+    """Reparte los contadores del dashboard a las conexiones abiertas del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, hotel_id):
+        subscriber = Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[_scope(hotel_id)].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, hotel_id, subscriber):
+        scope = _scope(hotel_id)
+        with self._lock:
+            self._subscribers[scope].discard(subscriber)
+            if not self._subscribers[scope]:
+                del self._subscribers[scope]
+
+    def subscriber_count(self, hotel_id=None):
+        with self._lock:
+            return len(self._subscribers.get(_scope(hotel_id), ()))
+
+    def publish(self, hotel_id):
+        """Cambió el hotel: contadores una vez por alcance con suscriptores (hotel y global)"""
+        for scope in {_scope(hotel_id), ALL_HOTELS}:
+            with self._lock:
+                subscribers = list(self._subscribers.get(scope, ()))
+            if not subscribers:
+                continue
+            counters = get_dashboard_counters(None if scope == ALL_HOTELS else scope)
+            for subscriber in subscribers:
+                subscriber.push(counters)
+
+
+hub = LiveMetricsHub()
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def metrics_delta(sent, counters):
+    """Métricas que cambiaron (con el timestamp del nuevo cálculo)"""
+    current = serialize_counters(counters)
+    delta = {key: value for key, value in current.items() if key != 'timestamp' and sent.get(key) != value}
+    if delta:
+        delta['timestamp'] = current['timestamp']
+    return current, delta
+
+
+async def metrics_event_stream(hotel_id=None, heartbeat=None):
+    """
+    Flujo SSE: un evento 'snapshot' con todos los contadores y luego eventos
+    'delta' con los que cambian.
+    """
+    heartbeat = heartbeat or heartbeat_interval()
+    subscriber = hub.subscribe(hotel_id)
+    try:
+        sent = serialize_counters(await sync_to_async(get_dashboard_counters)(hotel_id))
+        yield format_event('snapshot', sent)
+        while True:
+            counters = await subscriber.wait(heartbeat)
+            if counters is None:
+                yield ": keepalive\n\n"
+                counters = await sync_to_async(get_dashboard_counters)(hotel_id)
+            current, delta = metrics_delta(sent, counters)
+            if delta:
+                sent = current
+                yield format_event('delta', delta)
+    finally:
+        hub.unsubscribe(hotel_id, subscriber)
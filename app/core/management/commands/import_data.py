@@ -0,0 +1,55 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.administration.models import Hotel
+from app.core.imports import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, IMPORT_KINDS, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = "Importa habitaciones, clientes o reservas desde un archivo CSV, JSON o JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=IMPORT_KINDS, help='Qué se importa')
+        parser.add_argument('path', help='Archivo a importar')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Formato (por defecto según la extensión)')
+        parser.add_argument('--hotel', help='Slug del hotel de todas las filas (si no, columna hotel)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Filas por lote')
+        parser.add_argument('--dry-run', action='store_true', help='Validar sin escribir')
+        parser.add_argument('--errors-file', help='Guardar los errores por fila en este CSV')
+
+    def handle(self, *args, **options):
+        hotel = None
+        if options.get('hotel'):
+            try:
+                hotel = Hotel.objects.get(slug=options['hotel'])
+            except Hotel.DoesNotExist:
+                raise CommandError(f"Hotel '{options['hotel']}' no encontrado")
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size debe ser mayor que cero")
+        fmt = options.get('format') or detect_format(options['path'])
+
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                result = import_file(options['kind'], fileobj, fmt, hotel=hotel, batch_size=options['batch_size'],
+                                     dry_run=options['dry_run'], stdout=self.stdout)
+        except OSError as e:
+            raise CommandError(f"No se pudo leer el archivo: {e}")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for row, message in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"  Fila {row}: {message}"))
+        if len(result.errors) > 20:
+            self.stdout.write(self.style.WARNING(f"  ... y {len(result.errors) - 20} errores más"))
+        if options.get('errors_file'):
+            with open(options['errors_file'], 'w', newline='', encoding='utf-8') as out:
+                writer = csv.writer(out)
+                writer.writerow(['fila', 'error'])
+                writer.writerows(result.errors)
+
+        prefix = "Simulación" if options['dry_run'] else "Importación"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} de {options['kind']}: {result.rows} filas, {result.created} nuevas, "
+            f"{result.updated} actualizadas, {len(result.errors)} con errores"
+        ))
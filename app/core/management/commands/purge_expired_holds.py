@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.bookings.holds import purge_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Elimina los bloqueos temporales de reserva vencidos y libera sus noches"
+
+    def handle(self, *args, **options):
+        total = purge_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f"Bloqueos vencidos eliminados: {total}"))
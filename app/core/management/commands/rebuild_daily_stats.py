@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.administration.models import Hotel
+from app.core.daily_stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Reconstruye las estadísticas diarias por hotel (DailyHotelStats) desde las reservas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotel', help='Slug del hotel a reconstruir (por defecto todos)')
+        parser.add_argument('--desde', help='Primer día a recalcular (YYYY-MM-DD)')
+        parser.add_argument('--hasta', help='Último día a recalcular (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Tamaño de lote para inserciones')
+
+    def _parse_date(self, value, name):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"--{name} debe tener el formato YYYY-MM-DD")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        hotel = None
+        if options.get('hotel'):
+            try:
+                hotel = Hotel.objects.get(slug=options['hotel'])
+            except Hotel.DoesNotExist:
+                raise CommandError(f"Hotel '{options['hotel']}' no encontrado")
+        desde = self._parse_date(options.get('desde'), 'desde')
+        hasta = self._parse_date(options.get('hasta'), 'hasta')
+        if (desde is None) != (hasta is None):
+            raise CommandError("--desde y --hasta deben indicarse juntos")
+        if desde and desde > hasta:
+            raise CommandError("--desde debe ser anterior o igual a --hasta")
+
+        total = rebuild_daily_stats(hotel=hotel, desde=desde, hasta=hasta,
+                                    batch_size=options['batch_size'], stdout=self.stdout)
+        scope = hotel.slug if hotel else 'todos los hoteles'
+        self.stdout.write(self.style.SUCCESS(f"Estadísticas diarias reconstruidas ({scope}): {total} días"))
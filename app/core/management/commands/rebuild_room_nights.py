@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.administration.models import Hotel
+from app.bookings.occupancy import rebuild_room_nights
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de noches ocupadas (RoomNight) desde las reservas activas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotel', help='Slug del hotel a reconstruir (por defecto todos)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Tamaño de lote para inserciones')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        hotel = None
+        if options.get('hotel'):
+            try:
+                hotel = Hotel.objects.get(slug=options['hotel'])
+            except Hotel.DoesNotExist:
+                raise CommandError(f"Hotel '{options['hotel']}' no encontrado")
+
+        total = rebuild_room_nights(hotel=hotel, batch_size=options['batch_size'], stdout=self.stdout)
+        scope = hotel.slug if hotel else 'todos los hoteles'
+        self.stdout.write(self.style.SUCCESS(f"Índice RoomNight reconstruido ({scope}): {total} noches"))
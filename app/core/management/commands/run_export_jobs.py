@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.core.export_jobs import purge_expired_exports, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Procesa las exportaciones CSV pendientes y borra los archivos vencidos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Vaciar la cola una vez y salir (para cron)')
+        parser.add_argument('--sleep', type=float, default=5, help='Segundos de espera entre revisiones de la cola')
+
+    def handle(self, *args, **options):
+        while True:
+            purged = purge_expired_exports()
+            done = run_pending_jobs()
+            if done or purged:
+                self.stdout.write(f"Exportaciones procesadas: {done}, vencidas borradas: {purged}")
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS("Cola de exportaciones vacía"))
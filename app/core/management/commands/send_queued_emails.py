@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.core.services import EmailService
+
+
+class Command(BaseCommand):
+    help = "Envía los emails encolados (confirmaciones y cancelaciones de los cambios masivos de reservas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Vaciar la cola una vez y salir (para cron)')
+        parser.add_argument('--sleep', type=float, default=5, help='Segundos de espera entre revisiones de la cola')
+
+    def handle(self, *args, **options):
+        while True:
+            result = EmailService.send_queued_emails()
+            if result['sent'] or result['failed']:
+                self.stdout.write(f"Emails enviados: {result['sent']}, fallidos: {result['failed']}")
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS("Cola de emails vacía"))
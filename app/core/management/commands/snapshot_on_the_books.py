@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.administration.models import Hotel
+from app.core.on_the_books import DEFAULT_HORIZON_DAYS, take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Guarda la foto diaria de noches en cartera por hotel y fecha de estadía (correr una vez por noche)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotel', help='Slug del hotel (por defecto todos)')
+        parser.add_argument('--as-of', help='Fecha de la foto (YYYY-MM-DD, por defecto hoy)')
+        parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON_DAYS,
+                            help='Días de estadía a futuro incluidos en la foto')
+
+    def handle(self, *args, **options):
+        hotel = None
+        if options.get('hotel'):
+            try:
+                hotel = Hotel.objects.get(slug=options['hotel'])
+            except Hotel.DoesNotExist:
+                raise CommandError(f"Hotel '{options['hotel']}' no encontrado")
+        as_of = None
+        if options.get('as_of'):
+            try:
+                as_of = datetime.strptime(options['as_of'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--as-of debe tener el formato YYYY-MM-DD")
+        if options['horizon'] <= 0:
+            raise CommandError("--horizon debe ser mayor que cero")
+
+        written = take_snapshot(as_of=as_of, horizon=options['horizon'], hotel_id=hotel.id if hotel else None)
+        scope = hotel.slug if hotel else 'todos los hoteles'
+        self.stdout.write(self.style.SUCCESS(f"Foto de reservas en cartera ({scope}): {written} fechas con cambios"))
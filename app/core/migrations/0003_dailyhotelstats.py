@@ -0,0 +1,67 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:40
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+# Días hacia atrás y hacia adelante de hoy que se generan al migrar;
+# el resto del histórico se reconstruye con manage.py rebuild_daily_stats
+BACKFILL_DAYS = 400
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Genera las filas de los días cercanos a hoy desde las reservas existentes (como rebuild_daily_stats)"""
+    from app.core.daily_stats import refresh_daily_stats
+
+    Hotel = apps.get_model('administration', 'Hotel')
+    Booking = apps.get_model('bookings', 'Booking')
+    today = timezone.now().date()
+    for hotel_id in Hotel.objects.order_by('id').values_list('id', flat=True):
+        bounds = Booking.objects.filter(
+            Q(hotel_id=hotel_id) | Q(hotel__isnull=True, room__hotel_id=hotel_id)
+        ).aggregate(first=Min('check_in_date'), last=Max('check_out_date'))
+        if bounds['first'] is None:
+            continue
+        start = max(bounds['first'], today - timedelta(days=BACKFILL_DAYS))
+        end = min(bounds['last'], today + timedelta(days=BACKFILL_DAYS))
+        if start <= end:
+            refresh_daily_stats(hotel_id, start, end)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('bookings', '0004_roomnight'),
+        ('core', '0002_actionlog'),
+        ('rooms', '0003_room_hotel_alter_room_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHotelStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('rooms', models.PositiveIntegerField(default=0, verbose_name='Habitaciones')),
+                ('occupied', models.PositiveIntegerField(default=0, verbose_name='Habitaciones ocupadas')),
+                ('arrivals', models.PositiveIntegerField(default=0, verbose_name='Llegadas')),
+                ('departures', models.PositiveIntegerField(default=0, verbose_name='Salidas')),
+                ('pending', models.PositiveIntegerField(default=0, verbose_name='Pendientes')),
+                ('confirmed', models.PositiveIntegerField(default=0, verbose_name='Confirmadas')),
+                ('cancelled', models.PositiveIntegerField(default=0, verbose_name='Canceladas')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Ingresos de la noche')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='administration.hotel', verbose_name='Hotel')),
+            ],
+            options={
+                'verbose_name': 'Estadística diaria de hotel',
+                'verbose_name_plural': 'Estadísticas diarias de hoteles',
+                'ordering': ['hotel', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'date'), name='uniq_dailystats_hotel_date')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('core', '0003_dailyhotelstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnTheBooksSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField(verbose_name='Fecha de la foto')),
+                ('stay_date', models.DateField(verbose_name='Fecha de estadía')),
+                ('room_nights', models.PositiveIntegerField(default=0, verbose_name='Noches reservadas')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='otb_snapshots', to='administration.hotel', verbose_name='Hotel')),
+            ],
+            options={
+                'verbose_name': 'Foto de reservas en cartera',
+                'verbose_name_plural': 'Fotos de reservas en cartera',
+                'ordering': ['hotel', 'stay_date', 'as_of'],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'stay_date', 'as_of'), name='uniq_otb_hotel_stay_asof')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:40
+
+import app.core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_onthebookssnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30, verbose_name='Tipo de exportación')),
+                ('filters', models.JSONField(blank=True, default=dict, verbose_name='Filtros')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En proceso'), ('completed', 'Completada'), ('failed', 'Fallida'), ('expired', 'Vencida')], default='pending', max_length=20, verbose_name='Estado')),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True, verbose_name='Filas totales')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Filas procesadas')),
+                ('file', models.FileField(blank=True, storage=app.core.models.export_storage, upload_to='%Y/%m/', verbose_name='Archivo')),
+                ('file_size', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Tamaño (bytes)')),
+                ('error_message', models.TextField(blank=True, verbose_name='Mensaje de error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Disponible hasta')),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Exportación',
+                'verbose_name_plural': 'Exportaciones',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_export_status_2ad959_idx'), models.Index(fields=['expires_at'], name='core_export_expires_de1b86_idx')],
+            },
+        ),
+    ]
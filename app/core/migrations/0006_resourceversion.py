@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=30, verbose_name='Recurso')),
+                ('scope', models.CharField(max_length=20, verbose_name='Hotel')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versión')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Última modificación')),
+            ],
+            options={
+                'verbose_name': 'Versión de recurso',
+                'verbose_name_plural': 'Versiones de recursos',
+                'constraints': [models.UniqueConstraint(fields=('resource', 'scope'), name='uniq_resourceversion_resource_scope')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_emaillog_queued_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaillog',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Tomado por el worker'),
+        ),
+        migrations.AlterField(
+            model_name='emaillog',
+            name='status',
+            field=models.CharField(choices=[('queued', 'En cola'), ('sending', 'Enviando'), ('pending', 'Pendiente'), ('sent', 'Enviado'), ('failed', 'Fallido')], default='pending', max_length=20, verbose_name='Estado'),
+        ),
+    ]
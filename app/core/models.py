@@ -1,3 +1,7 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -35,6 +39,8 @@ class EmailLog(models.Model):
     """Modelo para registrar emails enviados del sistema"""
     
     STATUS_CHOICES = [
+        ('queued', 'En cola'),
+        ('sending', 'Enviando'),
         ('pending', 'Pendiente'),
         ('sent', 'Enviado'),
         ('failed', 'Fallido'),
@@ -54,6 +60,7 @@ class EmailLog(models.Model):
         verbose_name="Estado"
     )
     sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de envío")
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name="Tomado por el worker")
     error_message = models.TextField(blank=True, verbose_name="Mensaje de error")
     
     # Timestamps
@@ -99,3 +106,156 @@ class EmailLog(models.Model):
         self.status = 'failed'
         self.error_message = error_message
         self.save(update_fields=['status', 'error_message'])
+
+
+class DailyHotelStats(models.Model):
+    """Resumen diario de un hotel para los tableros (ver app.core.daily_stats)"""
+    
+    hotel = models.ForeignKey('administration.Hotel', on_delete=models.CASCADE, related_name='daily_stats', verbose_name="Hotel")
+    date = models.DateField(verbose_name="Fecha")
+    
+    # Inventario y ocupación de la noche
+    rooms = models.PositiveIntegerField(default=0, verbose_name="Habitaciones")
+    occupied = models.PositiveIntegerField(default=0, verbose_name="Habitaciones ocupadas")
+    
+    # Movimientos del día
+    arrivals = models.PositiveIntegerField(default=0, verbose_name="Llegadas")
+    departures = models.PositiveIntegerField(default=0, verbose_name="Salidas")
+    
+    # Reservas con llegada en el día, por estado
+    pending = models.PositiveIntegerField(default=0, verbose_name="Pendientes")
+    confirmed = models.PositiveIntegerField(default=0, verbose_name="Confirmadas")
+    cancelled = models.PositiveIntegerField(default=0, verbose_name="Canceladas")
+    
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Ingresos de la noche")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+    
+    class Meta:
+        verbose_name = "Estadística diaria de hotel"
+        verbose_name_plural = "Estadísticas diarias de hoteles"
+        ordering = ['hotel', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'date'], name='uniq_dailystats_hotel_date'),
+        ]
+    
+    def __str__(self):
+        return f"{self.hotel} - {self.date}"
+
+
+class OnTheBooksSnapshot(models.Model):
+    """
+    Noches reservadas para una fecha de estadía según la foto de un día (ver
+    app.core.on_the_books). Solo se guarda una fila cuando el valor cambia
+    respecto de la foto anterior.
+    """
+    
+    hotel = models.ForeignKey('administration.Hotel', on_delete=models.CASCADE, related_name='otb_snapshots', verbose_name="Hotel")
+    as_of = models.DateField(verbose_name="Fecha de la foto")
+    stay_date = models.DateField(verbose_name="Fecha de estadía")
+    room_nights = models.PositiveIntegerField(default=0, verbose_name="Noches reservadas")
+    
+    class Meta:
+        verbose_name = "Foto de reservas en cartera"
+        verbose_name_plural = "Fotos de reservas en cartera"
+        ordering = ['hotel', 'stay_date', 'as_of']
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'stay_date', 'as_of'], name='uniq_otb_hotel_stay_asof'),
+        ]
+    
+    def __str__(self):
+        return f"{self.hotel} - {self.stay_date} al {self.as_of}: {self.room_nights}"
+
+
+class ExportStorage(FileSystemStorage):
+    """Archivos exportados en EXPORT_JOBS_ROOT (fuera de MEDIA, se descargan solo por la vista)"""
+    
+    @property
+    def base_location(self):
+        return str(settings.EXPORT_JOBS_ROOT)
+    
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+def export_storage():
+    return ExportStorage()
+
+
+class ExportJob(models.Model):
+    """
+    Exportación CSV en segundo plano (ver app.core.export_jobs). El worker
+    escribe el archivo comprimido y lo deja disponible hasta expires_at.
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('running', 'En proceso'),
+        ('completed', 'Completada'),
+        ('failed', 'Fallida'),
+        ('expired', 'Vencida'),
+    ]
+    
+    kind = models.CharField(max_length=30, verbose_name="Tipo de exportación")
+    filters = models.JSONField(default=dict, blank=True, verbose_name="Filtros")
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs', verbose_name="Solicitado por")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Estado")
+    
+    # Progreso
+    total_rows = models.PositiveIntegerField(null=True, blank=True, verbose_name="Filas totales")
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name="Filas procesadas")
+    
+    # Resultado
+    file = models.FileField(storage=export_storage, upload_to='%Y/%m/', blank=True, verbose_name="Archivo")
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="Tamaño (bytes)")
+    error_message = models.TextField(blank=True, verbose_name="Mensaje de error")
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Inicio")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Disponible hasta")
+    
+    class Meta:
+        verbose_name = "Exportación"
+        verbose_name_plural = "Exportaciones"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
+    
+    @property
+    def progress(self):
+        """Avance entre 0 y 1 (None mientras no se conoce el total)"""
+        if self.status == 'completed':
+            return 1.0
+        if not self.total_rows:
+            return None if self.total_rows is None else 0.0
+        return min(self.processed_rows / self.total_rows, 1.0)
+
+
+class ResourceVersion(models.Model):
+    """
+    Versión de un listado de la API por hotel ('all' = todos los hoteles). Se
+    incrementa al guardar o borrar los modelos del listado y da el ETag y el
+    Last-Modified de las respuestas (ver app.core.resource_versions).
+    """
+    
+    resource = models.CharField(max_length=30, verbose_name="Recurso")
+    scope = models.CharField(max_length=20, verbose_name="Hotel")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versión")
+    updated_at = models.DateTimeField(default=timezone.now, verbose_name="Última modificación")
+    
+    class Meta:
+        verbose_name = "Versión de recurso"
+        verbose_name_plural = "Versiones de recursos"
+        constraints = [
+            models.UniqueConstraint(fields=['resource', 'scope'], name='uniq_resourceversion_resource_scope'),
+        ]
+    
+    def __str__(self):
+        return f"{self.resource} ({self.scope}) v{self.version}"
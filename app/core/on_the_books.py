@@ -0,0 +1,165 @@
+"""
+Reservas en cartera ("on the books") y ritmo de reservas (pace / pickup).
+
+take_snapshot() corre una vez por día: cuenta, por hotel y fecha de estadía
+futura, las noches ocupadas por reservas activas (RoomNight) y guarda solo
+las que cambiaron respecto de la foto anterior. El valor de (hotel, estadía)
+a una fecha X es la última fila con as_of <= X; cuando la fecha de estadía
+pasa deja de fotografiarse y su último valor queda como el final.
+
+Las curvas de pickup y la comparación con el año anterior (misma semana y
+día de la semana: 364 días antes) se leen de las fotos, sin reconstruir la
+historia de cada reserva.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+
+from .models import OnTheBooksSnapshot
+
+LAST_YEAR = timedelta(days=364)
+DEFAULT_HORIZON_DAYS = 365
+
+
+def _latest_rows(stay_start: date, stay_end: date, as_of: date, hotel_id=None, strict=False):
+    """
+    Última foto de cada (hotel, estadía) de [stay_start, stay_end] tomada hasta as_of
+    (antes de as_of si strict). Una consulta: fila sin otra posterior dentro del corte.
+    """
+    cutoff = {'as_of__lt': as_of} if strict else {'as_of__lte': as_of}
+    qs = OnTheBooksSnapshot.objects.filter(stay_date__range=(stay_start, stay_end), **cutoff)
+    if hotel_id is not None:
+        qs = qs.filter(hotel_id=hotel_id)
+    newer = OnTheBooksSnapshot.objects.filter(
+        hotel_id=OuterRef('hotel_id'), stay_date=OuterRef('stay_date'), as_of__gt=OuterRef('as_of'), **cutoff
+    )
+    return qs.exclude(Exists(newer)).values_list('hotel_id', 'stay_date', 'room_nights')
+
+
+def take_snapshot(as_of: Optional[date] = None, horizon: int = DEFAULT_HORIZON_DAYS, hotel_id=None) -> int:
+    """
+    Foto de las noches en cartera para [as_of, as_of + horizon).
+    Repetirla el mismo día reemplaza la foto de ese día.
+
+    Returns:
+        int: filas guardadas (solo las que cambiaron)
+    """
+    from app.bookings.models import RoomNight
+
+    as_of = as_of or timezone.now().date()
+    end = as_of + timedelta(days=horizon - 1)
+    nights = RoomNight.objects.filter(booking__isnull=False, hotel__isnull=False, date__range=(as_of, end))
+    if hotel_id is not None:
+        nights = nights.filter(hotel_id=hotel_id)
+    current = {
+        (row['hotel_id'], row['date']): row['n']
+        for row in nights.values('hotel_id', 'date').annotate(n=Count('id')).order_by()
+    }
+    previous = {
+        (hotel, stay_date): room_nights
+        for hotel, stay_date, room_nights in _latest_rows(as_of, end, as_of, hotel_id, strict=True)
+    }
+    changed = [
+        OnTheBooksSnapshot(hotel_id=hotel, as_of=as_of, stay_date=stay_date, room_nights=current.get((hotel, stay_date), 0))
+        for hotel, stay_date in current.keys() | previous.keys()
+        if current.get((hotel, stay_date), 0) != previous.get((hotel, stay_date), 0)
+    ]
+    with transaction.atomic():
+        today_rows = OnTheBooksSnapshot.objects.filter(as_of=as_of, stay_date__range=(as_of, end))
+        if hotel_id is not None:
+            today_rows = today_rows.filter(hotel_id=hotel_id)
+        today_rows.delete()
+        OnTheBooksSnapshot.objects.bulk_create(changed, batch_size=2000)
+    return len(changed)
+
+
+def on_the_books(stay_start: date, stay_end: date, as_of: date, hotel_id=None) -> Dict[date, int]:
+    """Noches en cartera por fecha de estadía de [stay_start, stay_end] según la foto de as_of"""
+    totals = defaultdict(int)
+    for _, stay_date, room_nights in _latest_rows(stay_start, stay_end, as_of, hotel_id):
+        totals[stay_date] += room_nights
+    return totals
+
+
+def pace_report(stay_start: date, stay_end: date, as_of: Optional[date] = None,
+                hotel_id=None, pickup_days: int = 7) -> Dict[str, Any]:
+    """
+    Ritmo de reservas por fecha de estadía comparado con el año anterior.
+
+    Returns:
+        {'rows': [{'stay_date', 'on_the_books', 'pickup' (últimos pickup_days días),
+                   'last_year_date', 'last_year' (a la misma altura), 'last_year_final',
+                   'variance' (on_the_books - last_year)}, ...],
+         'totals': {... sumas de las mismas métricas ...}}
+    """
+    as_of = as_of or timezone.now().date()
+    current = on_the_books(stay_start, stay_end, as_of, hotel_id)
+    before = on_the_books(stay_start, stay_end, as_of - timedelta(days=pickup_days), hotel_id)
+    last_year = on_the_books(stay_start - LAST_YEAR, stay_end - LAST_YEAR, as_of - LAST_YEAR, hotel_id)
+    # Cada fecha deja de fotografiarse al pasar: su última foto es el valor final
+    last_year_final = on_the_books(stay_start - LAST_YEAR, stay_end - LAST_YEAR, stay_end - LAST_YEAR, hotel_id)
+
+    rows = []
+    for i in range((stay_end - stay_start).days + 1):
+        stay_date = stay_start + timedelta(days=i)
+        ly_date = stay_date - LAST_YEAR
+        rows.append({
+            'stay_date': stay_date.isoformat(),
+            'on_the_books': current[stay_date],
+            'pickup': current[stay_date] - before[stay_date],
+            'last_year_date': ly_date.isoformat(),
+            'last_year': last_year[ly_date],
+            'last_year_final': last_year_final[ly_date],
+            'variance': current[stay_date] - last_year[ly_date],
+        })
+    fields = ('on_the_books', 'pickup', 'last_year', 'last_year_final', 'variance')
+    return {'rows': rows, 'totals': {field: sum(row[field] for row in rows) for field in fields}}
+
+
+def pickup_curve(stay_date: date, days: int = 90, hotel_id=None) -> List[Dict[str, Any]]:
+    """
+    Curva de pickup: noches en cartera para stay_date según cada foto diaria de
+    los `days` días previos (y la de la misma fecha del año anterior, alineada
+    por días de anticipación).
+    """
+    today = timezone.now().date()
+    end = min(stay_date, today)
+    start = end - timedelta(days=days)
+    ly_stay_date = stay_date - LAST_YEAR
+
+    history = defaultdict(list)
+    rows = OnTheBooksSnapshot.objects.filter(stay_date__in=(stay_date, ly_stay_date), as_of__lte=end)
+    if hotel_id is not None:
+        rows = rows.filter(hotel_id=hotel_id)
+    for hotel, snap_stay_date, as_of, room_nights in rows.order_by('as_of').values_list(
+        'hotel_id', 'stay_date', 'as_of', 'room_nights'
+    ):
+        history[snap_stay_date == stay_date].append((as_of, hotel, room_nights))
+
+    def series(points, first_day):
+        """Valores diarios desde first_day, arrastrando la última foto de cada hotel"""
+        values, by_hotel, position = [], {}, 0
+        for i in range(days + 1):
+            day = first_day + timedelta(days=i)
+            while position < len(points) and points[position][0] <= day:
+                _, hotel, room_nights = points[position]
+                by_hotel[hotel] = room_nights
+                position += 1
+            values.append(sum(by_hotel.values()))
+        return values
+
+    current = series(history[True], start)
+    last_year = series(history[False], start - LAST_YEAR)
+    return [
+        {
+            'as_of': (start + timedelta(days=i)).isoformat(),
+            'days_before': (stay_date - start).days - i,
+            'on_the_books': current[i],
+            'last_year': last_year[i],
+        }
+        for i in range(days + 1)
+    ]
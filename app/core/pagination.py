@@ -0,0 +1,96 @@
+"""
+Paginación por cursor (keyset) para las APIs JSON de listados.
+
+Cada página filtra por la clave de orden de la última fila enviada (por
+ejemplo created_at, id) en lugar de saltear filas con OFFSET, así que con un
+índice sobre esa clave una página profunda cuesta lo mismo que la primera.
+El orden siempre termina en id para que la clave sea única.
+
+El cursor es opaco: los valores de la clave firmados (django.core.signing).
+Es opcional: sin ?limit ni ?cursor las vistas responden como antes, con
+todas las filas en una lista (ver app.core.serializers.list_json_response).
+"""
+from django.core import signing
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+CURSOR_SALT = 'app.core.pagination'
+
+
+class InvalidPageParams(ValueError):
+    """Cursor o limit inválidos"""
+
+
+def wants_pagination(request):
+    return 'limit' in request.GET or 'cursor' in request.GET
+
+
+def page_params(request):
+    """(cursor, limit) de la request"""
+    try:
+        limit = int(request.GET.get('limit') or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise InvalidPageParams("limit debe ser un número entero")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise InvalidPageParams(f"limit debe estar entre 1 y {MAX_PAGE_SIZE}")
+    return request.GET.get('cursor') or None, limit
+
+
+def _fields(model, ordering):
+    return [(name.lstrip('-'), name.startswith('-'), model._meta.get_field(name.lstrip('-'))) for name in ordering]
+
+
+def encode_cursor(values):
+    """Cursor a partir de los valores de la clave de la última fila enviada"""
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    return signing.dumps(values, salt=CURSOR_SALT, compress=True)
+
+
+def _after(model, ordering, cursor):
+    """Filtro de las filas posteriores al cursor en el orden dado"""
+    try:
+        raw = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidPageParams("Cursor inválido")
+    fields = _fields(model, ordering)
+    if not isinstance(raw, list) or len(raw) != len(fields):
+        raise InvalidPageParams("Cursor inválido")
+    try:
+        values = [field.to_python(value) for (_, _, field), value in zip(fields, raw)]
+    except Exception:
+        raise InvalidPageParams("Cursor inválido")
+
+    # (a > x) o (a = x y b > y) o ... según la dirección de cada campo
+    condition = Q()
+    for i, (name, descending, _) in enumerate(fields):
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+        for j in range(i):
+            step &= Q(**{fields[j][0]: values[j]})
+        condition |= step
+    return condition
+
+
+def paginate_keyset(queryset, ordering, cursor=None, limit=DEFAULT_PAGE_SIZE, key=None):
+    """
+    Una página del queryset en el orden dado (que debe terminar en 'id' o '-id').
+
+    Args:
+        key: valores de la clave de orden de una fila (por defecto, atributos
+             de la instancia; necesario si el queryset es una proyección)
+
+    Returns:
+        tuple: (filas, cursor de la página siguiente o None)
+    """
+    model = queryset.model
+    if key is None:
+        attnames = [field.attname for _, _, field in _fields(model, ordering)]
+        key = lambda obj: [getattr(obj, attname) for attname in attnames]
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(_after(model, ordering, cursor))
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
@@ -0,0 +1,135 @@
+"""
+GET condicional (ETag / Last-Modified) para las APIs de listados.
+
+Cada listado depende de uno o más recursos ('rooms', 'clients', 'bookings')
+y cada recurso tiene un contador por hotel y uno global ('all') en
+ResourceVersion. Guardar o borrar un modelo incrementa los contadores de su
+hotel y el global (ver app.core.signals); las escrituras masivas los
+incrementan con bump_versions. Los incrementos se aplican tras el commit, así
+la fila global no queda bloqueada durante cada transacción de escritura.
+
+La respuesta lleva el ETag de los contadores leídos antes de consultar los
+datos. Si el cliente envía un If-None-Match (o If-Modified-Since) vigente se
+responde 304 con una sola consulta a ResourceVersion, sin tocar las tablas
+del listado.
+
+Las consultas de disponibilidad también dependen de los bloqueos temporales,
+que vencen sin escribir nada: su ETag incluye el próximo vencimiento
+(valid_until) y cambia en cuanto pasa.
+"""
+import hashlib
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import ResourceVersion
+
+ALL_HOTELS = 'all'
+
+
+def _scope(hotel_id):
+    return ALL_HOTELS if not hotel_id else str(hotel_id)
+
+
+def bump_versions(resources, hotel_ids=(), all_scopes=False):
+    """
+    Incrementa (tras el commit de la transacción actual) los contadores de los
+    recursos para los hoteles dados y el global.
+
+    Args:
+        all_scopes: incrementar también los de todos los demás hoteles
+    """
+    scopes = {ALL_HOTELS} | {_scope(hotel_id) for hotel_id in hotel_ids if hotel_id}
+    transaction.on_commit(lambda: _bump(tuple(resources), scopes, all_scopes))
+
+
+def _bump(resources, scopes, all_scopes):
+    now = timezone.now()
+    ResourceVersion.objects.bulk_create([
+        ResourceVersion(resource=resource, scope=scope, updated_at=now)
+        for resource in resources for scope in sorted(scopes)
+    ], ignore_conflicts=True)
+    rows = ResourceVersion.objects.filter(resource__in=resources)
+    if not all_scopes:
+        rows = rows.filter(scope__in=scopes)
+    rows.update(version=F('version') + 1, updated_at=now)
+
+
+def version_validators(resources, hotel_id=None, valid_until=None):
+    """
+    (ETag, Last-Modified como timestamp o None) de los recursos para el hotel.
+
+    Args:
+        valid_until: próximo vencimiento de un bloqueo temporal; si se indica
+                     entra en el ETag y no hay Last-Modified
+    """
+    scope = _scope(hotel_id)
+    rows = {
+        resource: (version, updated_at)
+        for resource, version, updated_at in ResourceVersion.objects.filter(
+            resource__in=resources, scope=scope
+        ).values_list('resource', 'version', 'updated_at')
+    }
+    tag = ';'.join(
+        f"{resource}:{rows[resource][0]}:{rows[resource][1].timestamp()}" if resource in rows else f"{resource}:0"
+        for resource in resources
+    )
+    if valid_until is not None:
+        tag = f"{tag}|{valid_until.timestamp()}"
+    etag = quote_etag(hashlib.md5(f"{scope}|{tag}".encode('utf-8')).hexdigest())
+    stamps = [updated_at for _, updated_at in rows.values()]
+    if valid_until is not None or not stamps:
+        return etag, None
+    return etag, int(max(stamps).timestamp())
+
+
+def conditional_response(request, resources, hotel_id=None, valid_until=None):
+    """
+    Evalúa If-None-Match / If-Modified-Since contra las versiones de los recursos
+    (y el próximo vencimiento de bloqueos, ver version_validators).
+
+    Returns:
+        tuple: (respuesta 304 o None, cabeceras para la respuesta completa)
+    """
+    etag, last_modified = version_validators(resources, hotel_id, valid_until)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        add_headers(response, headers)
+    return response, headers
+
+
+def add_headers(response, headers):
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def hotel_param(request):
+    """?hotel de la request (None si falta o no es un número)"""
+    try:
+        return int(request.GET.get('hotel'))
+    except (TypeError, ValueError):
+        return None
+
+
+def conditional_on_versions(*resources):
+    """Decorador de vistas GET: 304 si el cliente ya tiene la versión vigente del listado"""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            not_modified, headers = conditional_response(request, resources, hotel_param(request))
+            if not_modified is not None:
+                return not_modified
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                add_headers(response, headers)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,112 @@
+"""
+Serialización de listados por proyección.
+
+Cada API declara sus campos de salida: el nombre (con punto para objetos
+anidados, p. ej. 'client.email'), las columnas que necesita (lookups de
+values_list, p. ej. 'client__email') y cómo convertirlas. La consulta pide
+solo las columnas de los campos elegidos, sin instanciar modelos ni usar
+select_related: los joins salen de las columnas relacionadas que se pidan.
+
+Con ?fields=id,number,status se eligen campos; un prefijo ('client') elige
+el objeto anidado completo. Sin fields se devuelven todos.
+"""
+from collections import namedtuple
+
+from django.http import JsonResponse
+
+from .pagination import InvalidPageParams, paginate_keyset, page_params, wants_pagination
+
+Field = namedtuple('Field', ['sources', 'convert'])
+
+
+class InvalidFields(ValueError):
+    """?fields pide campos que el listado no tiene"""
+
+
+def field(*sources, convert=None):
+    """Campo de salida a partir de una o más columnas (por defecto, el valor de la primera)"""
+    return Field(sources, convert or (lambda value: value))
+
+
+def iso(value):
+    return value.isoformat() if value else None
+
+
+def as_float(value):
+    return float(value) if value is not None else 0
+
+
+def or_empty(value):
+    return value or ''
+
+
+class ProjectionSerializer:
+    """Campos de un listado y armado de los dicts desde las tuplas de values_list"""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def select(self, requested=None):
+        """Campos elegidos por ?fields (todos si no se indica), en el orden declarado"""
+        if not requested:
+            return list(self.fields)
+        names = {name.strip() for name in requested.split(',') if name.strip()}
+        selected = [path for path in self.fields
+                    if path in names or any(path.startswith(f"{name}.") for name in names)]
+        unknown = {name for name in names
+                   if not any(path == name or path.startswith(f"{name}.") for path in self.fields)}
+        if unknown:
+            raise InvalidFields(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+        return selected
+
+    def columns(self, paths, extra=()):
+        """Columnas (sin repetir) que necesitan los campos elegidos, más las extra"""
+        columns = []
+        for source in [s for path in paths for s in self.fields[path].sources] + list(extra):
+            if source not in columns:
+                columns.append(source)
+        return columns
+
+    def builder(self, paths, columns):
+        """Función fila -> dict para los campos elegidos"""
+        plan = [
+            (path.split('.'), [columns.index(source) for source in self.fields[path].sources], self.fields[path].convert)
+            for path in paths
+        ]
+
+        def build(row):
+            data = {}
+            for keys, positions, convert in plan:
+                target = data
+                for key in keys[:-1]:
+                    target = target.setdefault(key, {})
+                target[keys[-1]] = convert(*(row[i] for i in positions))
+            return data
+
+        return build
+
+
+def list_json_response(request, queryset, ordering, serializer):
+    """
+    Listado proyectado: con ?limit o ?cursor una página {'results', 'next', 'limit'}
+    (paginación por cursor); sin ellos la lista completa.
+    """
+    try:
+        paths = serializer.select(request.GET.get('fields'))
+    except InvalidFields as e:
+        return JsonResponse({'error': 'invalid_params', 'message': str(e)}, status=400)
+    keys = [name.lstrip('-') for name in ordering]
+    columns = serializer.columns(paths, extra=keys)
+    build = serializer.builder(paths, columns)
+    rows = queryset.values_list(*columns)
+
+    if not wants_pagination(request):
+        return JsonResponse([build(row) for row in rows.order_by(*ordering)], safe=False)
+    key_positions = [columns.index(name) for name in keys]
+    try:
+        cursor, limit = page_params(request)
+        page, next_cursor = paginate_keyset(rows, ordering, cursor, limit,
+                                            key=lambda row: [row[i] for i in key_positions])
+    except InvalidPageParams as e:
+        return JsonResponse({'error': 'invalid_params', 'message': str(e)}, status=400)
+    return JsonResponse({'results': [build(row) for row in page], 'next': next_cursor, 'limit': limit})
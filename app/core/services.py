@@ -114,6 +114,121 @@ class EmailService:
         except Exception as e:
             logger.error(f"Error al enviar email de confirmación para reserva {booking_id}: {str(e)}")
     
+    @staticmethod
+    def queue_booking_notifications(kind: str, booking_ids) -> int:
+        """
+        Encola los emails de confirmación o cancelación de varias reservas.
+        
+        Los registros de EmailLog se crean con un bulk_create en estado 'queued'
+        (en la transacción del cambio de estado); send_queued_emails los envía
+        después (manage.py send_queued_emails).
+        
+        Args:
+            kind: 'confirmation' o 'cancellation'
+            booking_ids: IDs de las reservas
+            
+        Returns:
+            int: Cantidad de emails encolados
+        """
+        builders = {
+            'confirmation': ('Confirmación de Reserva', EmailService._create_booking_confirmation_html),
+            'cancellation': ('Cancelación de Reserva', EmailService._create_booking_cancellation_html),
+        }
+        title, create_html = builders[kind]
+        bookings = Booking.objects.filter(id__in=list(booking_ids)).exclude(client__email='').select_related(
+            'client', 'room', 'hotel', 'room__hotel'
+        )
+        logs = [
+            EmailLog(
+                recipient_email=booking.client.email,
+                recipient_name=booking.client.first_name,
+                subject=f"{title} - {booking.room.number}",
+                content=create_html(booking),
+                status='queued',
+                booking=booking,
+                client=booking.client
+            )
+            for booking in bookings
+        ]
+        EmailLog.objects.bulk_create(logs)
+        return len(logs)
+    
+    @staticmethod
+    def requeue_stale_emails() -> int:
+        """Devuelve a la cola los emails tomados por un worker que no terminó (EMAIL_CLAIM_TIMEOUT_MINUTES)"""
+        from datetime import timedelta
+        
+        timeout = timedelta(minutes=getattr(settings, 'EMAIL_CLAIM_TIMEOUT_MINUTES', 15))
+        return EmailLog.objects.filter(status='sending', claimed_at__lt=timezone.now() - timeout).update(
+            status='queued', claimed_at=None
+        )
+    
+    @staticmethod
+    def _claim_queued_emails(limit: int) -> list:
+        """
+        Toma hasta limit emails encolados con un UPDATE condicional (a 'sending',
+        con claimed_at): varios workers no envían el mismo.
+        """
+        ids = list(EmailLog.objects.filter(status='queued').order_by('created_at', 'id').values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        claimed_at = timezone.now()
+        EmailLog.objects.filter(id__in=ids, status='queued').update(status='sending', claimed_at=claimed_at)
+        return list(EmailLog.objects.filter(id__in=ids, status='sending', claimed_at=claimed_at).order_by('created_at', 'id'))
+    
+    @staticmethod
+    def send_queued_emails(batch_size: int = 100) -> dict:
+        """
+        Envía los emails encolados por lotes, cada lote por una sola conexión.
+        
+        Los estados se actualizan con un UPDATE por resultado (enviados / fallidos).
+        Antes se devuelven a la cola los que un worker tomó y no terminó.
+        
+        Returns:
+            dict: Resultado del envío (enviados y fallidos)
+        """
+        from django.core.mail import EmailMultiAlternatives, get_connection
+        from django.utils.html import strip_tags
+        
+        EmailService.requeue_stale_emails()
+        total_sent, total_failed = 0, 0
+        while True:
+            logs = EmailService._claim_queued_emails(batch_size)
+            if not logs:
+                break
+            sent, failed = [], []
+            connection = get_connection(fail_silently=False)
+            try:
+                connection.open()
+            except Exception as e:
+                # No se pudo abrir la conexión: todo el lote queda fallido
+                for log in logs:
+                    log.status, log.error_message = 'failed', f"Error al enviar email: {str(e)}"
+                failed = logs
+            else:
+                try:
+                    for log in logs:
+                        message = EmailMultiAlternatives(log.subject, strip_tags(log.content), settings.DEFAULT_FROM_EMAIL, [log.recipient_email])
+                        message.attach_alternative(log.content, 'text/html')
+                        try:
+                            connection.send_messages([message])
+                            sent.append(log.id)
+                        except Exception as e:
+                            log.status, log.error_message = 'failed', f"Error al enviar email: {str(e)}"
+                            failed.append(log)
+                finally:
+                    connection.close()
+            
+            EmailLog.objects.filter(id__in=sent).update(status='sent', sent_at=timezone.now())
+            EmailLog.objects.bulk_update(failed, ['status', 'error_message'])
+            total_sent += len(sent)
+            total_failed += len(failed)
+        if total_failed:
+            logger.error(f"{total_failed} emails encolados fallaron en el envío")
+        if total_sent:
+            logger.info(f"{total_sent} emails encolados enviados")
+        return {"success": not total_failed, "sent": total_sent, "failed": total_failed}
+    
     @staticmethod
     def send_welcome_email(client_id: int) -> dict:
         """
@@ -388,6 +503,146 @@ class EmailService:
         © 2024 O11CE - Sistema de Gestión Hotelera
         """
     
+    @staticmethod
+    def send_group_booking_confirmation(group_id: int) -> dict:
+        """
+        Envía un único email de confirmación para todas las reservas de un grupo
+        
+        Args:
+            group_id: ID de la reserva grupal
+            
+        Returns:
+            dict: Resultado del envío
+        """
+        from app.bookings.models import BookingGroup
+        try:
+            group = BookingGroup.objects.select_related('client', 'hotel').get(id=group_id)
+            bookings = list(group.bookings.select_related('room').order_by('room__number'))
+            
+            if not group.client.email:
+                logger.warning(f"Cliente {group.client.id} no tiene email configurado")
+                return {
+                    "success": False,
+                    "message": "El cliente no tiene email configurado"
+                }
+            
+            subject = f"Confirmación de Reserva Grupal #{group.id} - {len(bookings)} habitaciones"
+            recipient_email = group.client.email
+            html_content = EmailService._create_group_confirmation_html(group, bookings)
+            text_content = EmailService._create_group_confirmation_text(group, bookings)
+            
+            email_log = EmailLog.objects.create(
+                recipient_email=recipient_email,
+                recipient_name=group.client.first_name,
+                subject=subject,
+                content=html_content,
+                booking=bookings[0] if bookings else None,
+                client=group.client
+            )
+            
+            try:
+                send_mail(
+                    subject=subject,
+                    message=text_content,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipient_list=[recipient_email],
+                    html_message=html_content,
+                    fail_silently=False
+                )
+                email_log.mark_as_sent()
+                logger.info(f"Email de reserva grupal enviado exitosamente a {recipient_email}")
+                return {
+                    "success": True,
+                    "message": "Email enviado exitosamente",
+                    "email_log_id": email_log.id
+                }
+            except Exception as e:
+                error_msg = f"Error al enviar email: {str(e)}"
+                email_log.mark_as_failed(error_msg)
+                logger.error(error_msg)
+                return {
+                    "success": False,
+                    "message": error_msg,
+                    "email_log_id": email_log.id
+                }
+                
+        except BookingGroup.DoesNotExist:
+            return {
+                "success": False,
+                "message": "Reserva grupal no encontrada"
+            }
+        except Exception as e:
+            logger.error(f"Error inesperado: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error interno: {str(e)}"
+            }
+    
+    @staticmethod
+    def _create_group_confirmation_html(group, bookings) -> str:
+        """Crea el contenido HTML para confirmación de reserva grupal"""
+        hotel_name = group.hotel.name if group.hotel else 'O11CE Hotel'
+        total = sum(b.total_price for b in bookings)
+        rows = "".join(
+            f"<tr><td>#{b.id}</td><td>{b.room.number}</td><td>{b.room.get_type_display()}</td>"
+            f"<td>{b.guests_count}</td><td>${b.total_price}</td></tr>"
+            for b in bookings
+        )
+        return f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <div style="background-color: #009485; color: white; padding: 30px; text-align: center; border-radius: 8px 8px 0 0;">
+                    <h1>✅ Confirmación de Reserva Grupal</h1>
+                    <p>{len(bookings)} habitaciones confirmadas</p>
+                </div>
+                <div style="padding: 30px; background-color: #f9f9f9;">
+                    <h2>Hola {group.client.first_name},</h2>
+                    <p><strong>Grupo:</strong> #{group.id} {group.reference}</p>
+                    <p><strong>Fecha de Llegada:</strong> {group.check_in_date}<br>
+                       <strong>Fecha de Salida:</strong> {group.check_out_date}</p>
+                    <table style="width: 100%; border-collapse: collapse; background: white;">
+                        <tr><th>Reserva</th><th>Habitación</th><th>Tipo</th><th>Personas</th><th>Total</th></tr>
+                        {rows}
+                    </table>
+                    <p><strong>Total del grupo:</strong> ${total}</p>
+                    <p>¡Gracias por elegir {hotel_name}! Esperamos su llegada.</p>
+                </div>
+                <div style="text-align: center; color: #666; font-size: 12px; padding: 20px;">
+                    <p>Este es un email automático, por favor no respondas a este mensaje.</p>
+                    <p>© 2024 {hotel_name}</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+    
+    @staticmethod
+    def _create_group_confirmation_text(group, bookings) -> str:
+        """Crea el contenido de texto plano para confirmación de reserva grupal"""
+        lines = "\n".join(
+            f"        - Reserva #{b.id}: Habitación {b.room.number} ({b.room.get_type_display()}) - ${b.total_price}"
+            for b in bookings
+        )
+        return f"""
+        Confirmación de Reserva Grupal - O11CE
+        
+        Hola {group.client.first_name},
+        
+        Tu reserva grupal #{group.id} {group.reference} ha sido confirmada.
+        
+        Fecha de Llegada: {group.check_in_date}
+        Fecha de Salida: {group.check_out_date}
+        
+        Habitaciones:
+{lines}
+        
+        Total del grupo: ${sum(b.total_price for b in bookings)}
+        
+        Este es un email automático, por favor no respondas a este mensaje.
+        © 2024 O11CE - Sistema de Gestión Hotelera
+        """
+    
     @staticmethod
     def send_booking_cancellation(booking_id: int) -> dict:
         """
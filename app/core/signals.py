@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .daily_stats import refresh_daily_stats, refresh_room_counts
+from .dashboard_metrics import invalidate_dashboard_counters
+from .live_metrics import hub
+from .resource_versions import bump_versions
+from app.bookings.occupancy import booking_hotel_id
+from app.bookings.models import Booking
+from app.bookings.signals import bookings_changed
+from app.clients.models import Client
+from app.rooms.models import Room
+
+
+@receiver(bookings_changed)
+def refresh_hotel_daily_stats(sender, hotel_id, start, end, **kwargs):
+    """Recalcula las estadísticas de las noches afectadas y del día de salida"""
+    refresh_daily_stats(hotel_id, start, end)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def refresh_hotel_room_counts(sender, instance, **kwargs):
+    refresh_room_counts(instance.hotel_id)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def invalidate_hotel_dashboard(sender, instance, **kwargs):
+    """
+    Descarta los contadores cacheados del dashboard del hotel y avisa a los
+    paneles en vivo (las reservas avisan una sola vez, por bookings_changed)
+    """
+    hotel_id = instance.hotel_id
+    invalidate_dashboard_counters(hotel_id)
+    if sender is not Booking:
+        transaction.on_commit(lambda: hub.publish(hotel_id))
+
+
+@receiver(bookings_changed)
+def invalidate_hotel_dashboard_bulk(sender, hotel_id, **kwargs):
+    """Cambios masivos de reservas (no pasan por save); ya se envía tras el commit"""
+    invalidate_dashboard_counters(hotel_id)
+    hub.publish(hotel_id)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def bump_catalog_versions(sender, instance, **kwargs):
+    """Versiones de habitaciones/clientes del hotel y de las reservas (el listado las incluye)"""
+    bump_versions(('rooms',) if sender is Room else ('clients',), [instance.hotel_id])
+    bump_versions(('bookings',), all_scopes=True)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_booking_versions(sender, instance, **kwargs):
+    bump_versions(('bookings',), [booking_hotel_id(instance)])
+
+
+@receiver(bookings_changed)
+def bump_booking_versions_bulk(sender, hotel_id, **kwargs):
+    bump_versions(('bookings',), [hotel_id])
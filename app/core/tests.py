@@ -1,9 +1,10 @@
-from django.test import TestCase, Client as TestClient
+from django.test import TestCase, Client as TestClient, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
+from io import StringIO
 import json
 
 # Importar modelos de las apps
@@ -364,3 +365,815 @@ class BookingImpactTestCase(TestCase):
         ).aggregate(total=Sum('total_price'))['total']
         
         self.assertEqual(total_revenue, Decimal('240000.00'), "El ingreso debe reflejarse correctamente")
+
+
+class BookingsStatusSeriesTestCase(TestCase):
+    """Serie temporal de reservas por estado (superadmin)"""
+    
+    def setUp(self):
+        from app.administration.models import Hotel
+        from app.superadmin.services import bookings_status_series
+        self.series = bookings_status_series
+        self.hotel = Hotel.objects.create(name='Hotel Serie', slug='hotel-serie')
+        self.room = Room.objects.create(hotel=self.hotel, number='301', type='double', capacity=2, price=Decimal('100.00'))
+        self.guest = Client.objects.create(first_name='Eva', last_name='Ruiz', email='eva@example.com', dni='5550001')
+        self.start = timezone.now().date() + timedelta(days=1)
+        # Las estadísticas diarias se actualizan tras el commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for offset, status in [(0, 'confirmed'), (2, 'pending'), (9, 'cancelled')]:
+                check_in = self.start + timedelta(days=offset)
+                Booking(hotel=self.hotel, client=self.guest, room=self.room, check_in_date=check_in,
+                        check_out_date=check_in + timedelta(days=1), total_price=Decimal('100.00'),
+                        status=status).save(skip_validation=True)
+    
+    def test_daily_series_is_zero_filled_from_one_query(self):
+        with self.assertNumQueries(1):
+            daily = self.series(self.start, self.start + timedelta(days=9), self.hotel)
+        self.assertEqual(len(daily), 10)
+        self.assertEqual(daily[0], {'date': self.start.isoformat(), 'pending': 0, 'confirmed': 1, 'cancelled': 0})
+        self.assertEqual(daily[1]['confirmed'] + daily[1]['pending'] + daily[1]['cancelled'], 0)
+        self.assertEqual(daily[9]['cancelled'], 1)
+    
+    def test_weekly_and_monthly_totals(self):
+        end = self.start + timedelta(days=9)
+        for granularity in ('week', 'month'):
+            buckets = self.series(self.start, end, self.hotel, granularity=granularity)
+            totals = {status: sum(b[status] for b in buckets) for status in ('pending', 'confirmed', 'cancelled')}
+            self.assertEqual(totals, {'pending': 1, 'confirmed': 1, 'cancelled': 1})
+    
+    def test_dashboard_api_granularity(self):
+        User.objects.create_superuser('root', 'root@example.com', 'rootpass123')
+        self.client.login(username='root', password='rootpass123')
+        params = {'desde': self.start.isoformat(), 'hasta': (self.start + timedelta(days=9)).isoformat(), 'granularity': 'week'}
+        data = self.client.get(reverse('superadmin_api_dashboard_hotel', args=[self.hotel.id]), params).json()
+        self.assertEqual(len(data['series']['daily_bookings']), 10)
+        self.assertIn('weekly_bookings', data['series'])
+        self.assertEqual(self.client.get(reverse('superadmin_api_dashboard_global'), {**params, 'granularity': 'year'}).status_code, 400)
+
+
+class DailyHotelStatsTestCase(TestCase):
+    """Estadísticas diarias por hotel mantenidas desde las reservas"""
+    
+    def setUp(self):
+        from app.administration.models import Hotel
+        self.hotel = Hotel.objects.create(name='Hotel Stats', slug='hotel-stats')
+        self.room = Room.objects.create(hotel=self.hotel, number='401', type='double', capacity=2, price=Decimal('100.00'))
+        Room.objects.create(hotel=self.hotel, number='402', type='double', capacity=2, price=Decimal('100.00'))
+        self.guest = Client.objects.create(first_name='Luz', last_name='Paz', email='luz@example.com', dni='5550002')
+        self.today = timezone.now().date()
+    
+    def book(self, offset, nights, status='confirmed', total='300.00'):
+        check_in = self.today + timedelta(days=offset)
+        booking = Booking(hotel=self.hotel, client=self.guest, room=self.room, check_in_date=check_in,
+                          check_out_date=check_in + timedelta(days=nights), total_price=Decimal(total), status=status)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save(skip_validation=True)
+        return booking
+    
+    def stats(self, offset):
+        from app.core.models import DailyHotelStats
+        return DailyHotelStats.objects.get(hotel=self.hotel, date=self.today + timedelta(days=offset))
+    
+    def test_booking_updates_touched_days(self):
+        self.book(0, 3)
+        first, last, departure = self.stats(0), self.stats(2), self.stats(3)
+        self.assertEqual((first.rooms, first.occupied, first.arrivals, first.confirmed), (2, 1, 1, 1))
+        self.assertEqual(first.revenue, Decimal('100.00'))
+        self.assertEqual((last.occupied, last.arrivals), (1, 0))
+        self.assertEqual((departure.occupied, departure.departures), (0, 1))
+    
+    def test_cancellation_moves_counts(self):
+        booking = self.book(1, 2)
+        booking.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        row = self.stats(1)
+        self.assertEqual((row.occupied, row.confirmed, row.cancelled, row.revenue), (0, 0, 1, Decimal('0.00')))
+        self.assertEqual(self.stats(3).departures, 0)
+    
+    def test_rebuild_command_matches_incremental_rows(self):
+        from django.core.management import call_command
+        from app.core.models import DailyHotelStats
+        self.book(0, 2)
+        self.book(2, 1, status='pending', total='100.00')
+        fields = ('date', 'rooms', 'occupied', 'arrivals', 'departures', 'pending', 'confirmed', 'cancelled', 'revenue')
+        incremental = list(DailyHotelStats.objects.filter(hotel=self.hotel).values_list(*fields))
+        DailyHotelStats.objects.all().delete()
+        call_command('rebuild_daily_stats', hotel='hotel-stats', stdout=StringIO())
+        rebuilt = list(DailyHotelStats.objects.filter(hotel=self.hotel).values_list(*fields))
+        self.assertEqual(len(rebuilt), 4)
+        self.assertEqual(set(incremental), set(rebuilt))
+    
+    def test_dashboard_kpis_read_from_stats(self):
+        from app.superadmin.services import get_dashboard_data
+        self.book(0, 2)
+        self.book(2, 1, status='pending', total='100.00')
+        with self.assertNumQueries(4):
+            data = get_dashboard_data('hotel', self.hotel, self.today, self.today + timedelta(days=6))
+        self.assertEqual(data['kpis'], {
+            'occupancy_today': 0.5, 'bookings_checkin_today_total': 1, 'reservations_period_count': 2,
+        })
+        self.assertEqual(data['distributions']['status'], {'pending': 1, 'confirmed': 1, 'cancelled': 0})
+        self.assertEqual(len(data['series']['daily_bookings']), 7)
+
+
+class HotelsTodayKpisTestCase(TestCase):
+    """KPIs del día de todos los hoteles para el panel de superadmin"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from app.administration.models import Hotel
+        cache.clear()
+        self.today = timezone.now().date()
+        self.guest = Client.objects.create(first_name='Ana', last_name='Sol', email='ana.sol@example.com', dni='5550003')
+        self.hotels = [Hotel.objects.create(name=f'Hotel {i}', slug=f'hotel-kpi-{i}') for i in range(3)]
+        for hotel in self.hotels:
+            rooms = [Room.objects.create(hotel=hotel, number=f'{hotel.id}0{n}', type='double', capacity=2, price=Decimal('90.00'))
+                     for n in (1, 2)]
+            # Una llegada confirmada hoy y una pendiente que llegó ayer
+            for room, offset, status in [(rooms[0], 0, 'confirmed'), (rooms[1], -1, 'pending')]:
+                check_in = self.today + timedelta(days=offset)
+                Booking(hotel=hotel, client=self.guest, room=room, check_in_date=check_in,
+                        check_out_date=check_in + timedelta(days=2), total_price=Decimal('180.00'),
+                        status=status).save(skip_validation=True)
+    
+    def test_grouped_queries_for_all_hotels(self):
+        from app.superadmin.services import hotels_today_kpis
+        with self.assertNumQueries(3):
+            snapshot = hotels_today_kpis()
+        self.assertEqual(len(snapshot['hotels']), 3)
+        first = snapshot['hotels'][0]
+        self.assertEqual(
+            {k: first[k] for k in ('rooms', 'occupied', 'arrivals', 'in_house', 'pending', 'confirmed')},
+            {'rooms': 2, 'occupied': 1, 'arrivals': 1, 'in_house': 2, 'pending': 1, 'confirmed': 1},
+        )
+        self.assertEqual(first['occupancy_percent'], 50.0)
+        self.assertEqual(snapshot['totals']['rooms'], 6)
+        self.assertEqual(snapshot['totals']['in_house'], 6)
+    
+    def test_dashboard_uses_cached_snapshot(self):
+        from app.superadmin.services import cached_hotels_today_kpis
+        cached_hotels_today_kpis()
+        with self.assertNumQueries(0):
+            cached_hotels_today_kpis()
+        User.objects.create_superuser('root', 'root@example.com', 'rootpass123')
+        self.client.login(username='root', password='rootpass123')
+        response = self.client.get(reverse('superadmin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_rooms'], 6)
+        self.assertContains(response, 'Hotel 2')
+
+
+@override_settings(DASHBOARD_METRICS_CACHE_TTL=300)
+class DashboardMetricsCacheTestCase(TestCase):
+    """Contadores del dashboard por hotel, cacheados e invalidados por señales"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from app.administration.models import Hotel
+        cache.clear()
+        self.hotel = Hotel.objects.create(name='Hotel Norte', slug='hotel-norte')
+        self.other = Hotel.objects.create(name='Hotel Sur', slug='hotel-sur')
+        Room.objects.create(hotel=self.hotel, number='501', type='individual', capacity=1, price=Decimal('60.00'))
+        Room.objects.create(hotel=self.other, number='601', type='individual', capacity=1, price=Decimal('60.00'))
+        Room.objects.create(hotel=self.other, number='602', type='individual', capacity=1, price=Decimal('60.00'), status='cleaning')
+        self.user = User.objects.create_user(username='staff', password='staffpass123')
+        self.client.login(username='staff', password='staffpass123')
+    
+    def test_counters_are_scoped_to_the_hotel(self):
+        metrics = get_dashboard_metrics(self.hotel)
+        self.assertEqual((metrics['total_rooms'], metrics['cleaning_rooms']), (1, 0))
+        self.assertEqual(get_dashboard_metrics()['total_rooms'], 3)
+    
+    def test_cached_until_a_room_changes(self):
+        from app.core.dashboard_metrics import get_dashboard_counters
+        get_dashboard_counters(self.hotel.id)
+        with self.assertNumQueries(0):
+            get_dashboard_counters(self.hotel.id)
+        Room.objects.create(hotel=self.hotel, number='502', type='individual', capacity=1, price=Decimal('60.00'))
+        self.assertEqual(get_dashboard_counters(self.hotel.id)['total_rooms'], 2)
+        self.assertEqual(get_dashboard_counters()['total_rooms'], 4)
+    
+    def test_api_etag_and_not_modified(self):
+        url = reverse('dashboard_metrics_api')
+        response = self.client.get(url, {'hotel': 'hotel-norte'})
+        self.assertEqual(response.json()['total_rooms'], 1)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, {'hotel': 'hotel-norte'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Client.objects.create(first_name='Rita', last_name='Mar', email='rita@example.com', dni='5550004', hotel=self.hotel)
+        response = self.client.get(url, {'hotel': 'hotel-norte'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_clients'], 1)
+        self.assertEqual(self.client.get(url, {'hotel': 'no-existe'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'hotel': self.hotel.id}).json()['total_rooms'], 1)
+
+
+class LiveMetricsStreamTestCase(TestCase):
+    """Flujo SSE de métricas del dashboard"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from app.administration.models import Hotel
+        cache.clear()
+        self.hotel = Hotel.objects.create(name='Hotel Vivo', slug='hotel-vivo')
+        Room.objects.create(hotel=self.hotel, number='701', type='individual', capacity=1, price=Decimal('60.00'))
+    
+    def add_room(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(hotel=self.hotel, number='702', type='individual', capacity=1, price=Decimal('60.00'), status='cleaning')
+    
+    def test_snapshot_then_delta_after_room_change(self):
+        import asyncio
+        from asgiref.sync import async_to_sync, sync_to_async
+        from app.core.live_metrics import hub, metrics_event_stream
+        
+        async def scenario():
+            stream = metrics_event_stream(self.hotel.id, heartbeat=5)
+            snapshot = await stream.__anext__()
+            self.assertEqual(hub.subscriber_count(self.hotel.id), 1)
+            await sync_to_async(self.add_room)()
+            delta = await asyncio.wait_for(stream.__anext__(), 2)
+            await stream.aclose()
+            return snapshot, delta
+        
+        snapshot, delta = async_to_sync(scenario)()
+        self.assertTrue(snapshot.startswith('event: snapshot'))
+        self.assertIn('"total_rooms": 1', snapshot)
+        payload = json.loads(delta.split('data: ', 1)[1])
+        self.assertEqual({k: payload[k] for k in ('total_rooms', 'cleaning_rooms')}, {'total_rooms': 2, 'cleaning_rooms': 1})
+        self.assertNotIn('total_clients', payload)
+        self.assertEqual(hub.subscriber_count(self.hotel.id), 0)
+    
+    def test_booking_save_publishes_once(self):
+        from unittest import mock
+        from app.core.live_metrics import hub
+        guest = Client.objects.create(first_name='Lia', last_name='Sol', email='lia@example.com', dni='5550011')
+        room = Room.objects.get(number='701')
+        start = timezone.now().date()
+        with mock.patch.object(hub, 'publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(hotel=self.hotel, client=guest, room=room, check_in_date=start,
+                                   check_out_date=start + timedelta(days=1), total_price=Decimal('60.00'))
+        publish.assert_called_once_with(self.hotel.id)
+    
+    def test_stream_endpoint_requires_asgi(self):
+        url = reverse('dashboard_metrics_stream')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        user = User.objects.create_user(username='staff', password='staffpass123')
+        self.client.force_login(user)
+        # Bajo WSGI no se abre el flujo y el dashboard consulta la API
+        self.assertEqual(self.client.get(url, {'hotel': 'hotel-vivo'}).status_code, 204)
+        self.assertFalse(self.client.get(reverse('dashboard')).context['live_metrics'])
+    
+    async def test_stream_endpoint(self):
+        from asgiref.sync import sync_to_async
+        url = reverse('dashboard_metrics_stream')
+        user = await sync_to_async(User.objects.create_user)(username='staff', password='staffpass123')
+        await self.async_client.aforce_login(user)
+        self.assertEqual((await self.async_client.get(url, {'hotel': 'no-existe'})).status_code, 404)
+        response = await self.async_client.get(url, {'hotel': 'hotel-vivo'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunk = await response.streaming_content.__anext__()
+        self.assertTrue(chunk.startswith(b'event: snapshot'))
+        await response.streaming_content.aclose()
+
+
+class RevenueAnalyticsTestCase(TestCase):
+    """ADR, RevPAR, ocupación y estadía media (superadmin)"""
+    
+    def setUp(self):
+        from app.administration.models import Hotel
+        self.hotel = Hotel.objects.create(name='Hotel Analítica', slug='hotel-analitica')
+        self.double = Room.objects.create(hotel=self.hotel, number='801', type='double', capacity=2, price=Decimal('100.00'))
+        self.single = Room.objects.create(hotel=self.hotel, number='802', type='individual', capacity=1, price=Decimal('80.00'))
+        self.guest = Client.objects.create(first_name='Teo', last_name='Gil', email='teo@example.com', dni='5550005')
+        self.start = timezone.now().date() + timedelta(days=30)
+        self.end = self.start + timedelta(days=9)
+        # 3 noches dobles a 100, 2 noches individuales a 80 (la última fuera del rango) y una cancelada
+        for room, offset, nights, total, status in [
+            (self.double, 0, 3, '300.00', 'confirmed'),
+            (self.single, 9, 2, '160.00', 'confirmed'),
+            (self.double, 5, 2, '200.00', 'cancelled'),
+        ]:
+            check_in = self.start + timedelta(days=offset)
+            Booking(hotel=self.hotel, client=self.guest, room=room, check_in_date=check_in,
+                    check_out_date=check_in + timedelta(days=nights), total_price=Decimal(total),
+                    status=status).save(skip_validation=True)
+    
+    def test_totals(self):
+        from app.superadmin.analytics import revenue_metrics
+        totals = revenue_metrics(self.start, self.end, group_by=())['totals']
+        self.assertEqual(totals['rooms_available'], 20)
+        self.assertEqual(totals['room_nights'], 4)
+        self.assertEqual(totals['revenue'], 380.0)
+        self.assertEqual(totals['occupancy'], 0.2)
+        self.assertEqual(totals['adr'], 95.0)
+        self.assertEqual(totals['revpar'], 19.0)
+        self.assertEqual((totals['arrivals'], totals['alos']), (2, 2.5))
+    
+    def test_group_by_type_and_period(self):
+        from app.superadmin.analytics import revenue_metrics
+        rows = revenue_metrics(self.start, self.end, self.hotel.id, group_by=('type',))['rows']
+        by_type = {row['room_type']: row for row in rows}
+        self.assertEqual((by_type['double']['room_nights'], by_type['double']['adr']), (3, 100.0))
+        self.assertEqual((by_type['individual']['room_nights'], by_type['individual']['revenue']), (1, 80.0))
+        daily = revenue_metrics(self.start, self.end, group_by=('period',), granularity='day')['rows']
+        self.assertEqual(len(daily), 10)
+        self.assertEqual([row['room_nights'] for row in daily[:4]], [1, 1, 1, 0])
+    
+    def test_api_json_and_csv(self):
+        User.objects.create_superuser('root', 'root@example.com', 'rootpass123')
+        self.client.login(username='root', password='rootpass123')
+        url = reverse('superadmin_api_analytics')
+        params = {'desde': self.start.isoformat(), 'hasta': self.end.isoformat(), 'group_by': 'hotel,type'}
+        data = self.client.get(url, params).json()
+        self.assertEqual(len(data['rows']), 2)
+        self.assertEqual(data['totals']['room_nights'], 4)
+        response = self.client.get(url, {**params, 'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = response.content.decode().strip().splitlines()
+        self.assertTrue(lines[0].startswith('hotel_id,room_type,rooms_available'))
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(self.client.get(url, {**params, 'group_by': 'cliente'}).status_code, 400)
+
+
+class OnTheBooksPaceTestCase(TestCase):
+    """Fotos de noches en cartera y ritmo de reservas vs. el año anterior"""
+    
+    def setUp(self):
+        from app.administration.models import Hotel
+        self.hotel = Hotel.objects.create(name='Hotel Pace', slug='hotel-pace')
+        self.room = Room.objects.create(hotel=self.hotel, number='901', type='double', capacity=2, price=Decimal('100.00'))
+        self.guest = Client.objects.create(first_name='Lía', last_name='Paz', email='lia@example.com', dni='5550006')
+        self.today = timezone.now().date()
+        self.stay = self.today + timedelta(days=10)
+    
+    def _snapshot(self, stay_date, as_of, room_nights):
+        from app.core.models import OnTheBooksSnapshot
+        OnTheBooksSnapshot.objects.create(hotel=self.hotel, stay_date=stay_date, as_of=as_of, room_nights=room_nights)
+    
+    def test_snapshot_stores_only_changes(self):
+        from app.core.models import OnTheBooksSnapshot
+        from app.core.on_the_books import on_the_books, take_snapshot
+        booking = Booking(hotel=self.hotel, client=self.guest, room=self.room, check_in_date=self.stay,
+                          check_out_date=self.stay + timedelta(days=2), total_price=Decimal('200.00'), status='confirmed')
+        booking.save(skip_validation=True)
+        self.assertEqual(take_snapshot(as_of=self.today, horizon=30), 2)
+        self.assertEqual(take_snapshot(as_of=self.today + timedelta(days=1), horizon=30), 0)
+        booking.status = 'cancelled'
+        booking.save(skip_validation=True)
+        self.assertEqual(take_snapshot(as_of=self.today + timedelta(days=2), horizon=30), 2)
+        self.assertEqual(OnTheBooksSnapshot.objects.count(), 4)
+        window = (self.stay, self.stay + timedelta(days=1))
+        self.assertEqual(dict(on_the_books(*window, self.today + timedelta(days=1))), {self.stay: 1, window[1]: 1})
+        self.assertEqual(sum(on_the_books(*window, self.today + timedelta(days=2)).values()), 0)
+    
+    def test_pace_vs_last_year(self):
+        from app.core.on_the_books import LAST_YEAR, pace_report
+        last_year = self.stay - LAST_YEAR
+        self._snapshot(last_year, last_year - timedelta(days=20), 1)
+        self._snapshot(last_year, last_year - timedelta(days=5), 3)
+        self._snapshot(self.stay, self.today - timedelta(days=3), 2)
+        row = pace_report(self.stay, self.stay, as_of=self.today, pickup_days=7)['rows'][0]
+        self.assertEqual((row['on_the_books'], row['pickup']), (2, 2))
+        self.assertEqual((row['last_year'], row['last_year_final'], row['variance']), (1, 3, 1))
+    
+    def test_api_and_command(self):
+        from django.core.management import call_command
+        from app.core.models import OnTheBooksSnapshot
+        from app.core.on_the_books import LAST_YEAR
+        self._snapshot(self.stay - LAST_YEAR, self.stay - LAST_YEAR - timedelta(days=20), 1)
+        Booking(hotel=self.hotel, client=self.guest, room=self.room, check_in_date=self.stay,
+                check_out_date=self.stay + timedelta(days=1), total_price=Decimal('100.00'),
+                status='confirmed').save(skip_validation=True)
+        call_command('snapshot_on_the_books', hotel='hotel-pace', stdout=StringIO())
+        self.assertEqual(OnTheBooksSnapshot.objects.filter(as_of=self.today).count(), 1)
+        
+        User.objects.create_superuser('root', 'root@example.com', 'rootpass123')
+        self.client.login(username='root', password='rootpass123')
+        params = {'desde': self.stay.isoformat(), 'hasta': self.stay.isoformat(), 'hotel': self.hotel.id}
+        data = self.client.get(reverse('superadmin_api_pace'), params).json()
+        self.assertEqual((data['totals']['on_the_books'], data['totals']['last_year']), (1, 1))
+        points = self.client.get(reverse('superadmin_api_pickup_curve'),
+                                 {'fecha': self.stay.isoformat(), 'days': 30}).json()['points']
+        self.assertEqual(len(points), 31)
+        self.assertEqual((points[-1]['on_the_books'], points[-1]['last_year'], points[-1]['days_before']), (1, 1, 10))
+        self.assertEqual(self.client.get(reverse('superadmin_api_pace'), {'hotel': 9999}).status_code, 404)
+
+
+class StreamingCsvExportTestCase(TestCase):
+    """Exportaciones CSV en streaming (sin tope de filas, gzip opcional)"""
+    
+    def setUp(self):
+        from app.administration.models import Hotel
+        self.hotel = Hotel.objects.create(name='Hotel Export', slug='hotel-export')
+        room = Room.objects.create(hotel=self.hotel, number='A1', type='double', capacity=2, price=Decimal('100.00'))
+        guest = Client.objects.create(first_name='Ada', last_name='Sosa', email='ada@example.com', dni='5550007')
+        start = timezone.now().date()
+        # bulk_create evita el índice de noches: solo interesa el volumen de filas
+        Booking.objects.bulk_create([
+            Booking(hotel=self.hotel, client=guest, room=room, check_in_date=start + timedelta(days=2 * i),
+                    check_out_date=start + timedelta(days=2 * i + 1), total_price=Decimal('100.00'), status='confirmed')
+            for i in range(1001)
+        ])
+        User.objects.create_superuser('root', 'root@example.com', 'rootpass123')
+        self.client.login(username='root', password='rootpass123')
+    
+    def test_superadmin_export_streams_all_rows(self):
+        response = self.client.get(reverse('superadmin_export_bookings_csv'), {'hotel': self.hotel.id})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8').strip().splitlines()
+        self.assertEqual(len(lines), 1002)
+        self.assertEqual(lines[0], 'id,hotel,habitacion,cliente,check_in,check_out,estado,total_price')
+        self.assertIn('Hotel Export,A1,Ada Sosa', lines[1])
+    
+    def test_gzip_exports(self):
+        import gzip
+        response = self.client.get(reverse('export_bookings_csv'), {'gzip': '1', 'search': 'sosa'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('reservas.csv.gz', response['Content-Disposition'])
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8').strip().splitlines()
+        self.assertEqual(len(lines), 1002)
+        self.assertIn('Ada Sosa,ada@example.com,A1', lines[1])
+        rooms = self.client.get(reverse('rooms_export_csv'))
+        self.assertEqual(b''.join(rooms.streaming_content).decode('utf-8').splitlines()[1].split(',')[:2], ['A1', 'Doble'])
+    
+    async def test_asgi_export_streams_asynchronously(self):
+        from asgiref.sync import sync_to_async
+        user = await sync_to_async(User.objects.get)(username='root')
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get(reverse('export_bookings_csv'))
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(len(b''.join(chunks).decode('utf-8').strip().splitlines()), 1002)
+
+
+class ExportJobTestCase(TestCase):
+    """Exportaciones en segundo plano: cola, worker, avance y descarga"""
+    
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        storage_override = override_settings(EXPORT_JOBS_ROOT=self.tmpdir.name)
+        storage_override.enable()
+        self.addCleanup(storage_override.disable)
+        room = Room.objects.create(number='E1', type='double', capacity=2, price=Decimal('100.00'))
+        guest = Client.objects.create(first_name='Eva', last_name='Ríos', email='eva@example.com', dni='5550008')
+        start = timezone.now().date()
+        Booking.objects.bulk_create([
+            Booking(client=guest, room=room, check_in_date=start + timedelta(days=2 * i),
+                    check_out_date=start + timedelta(days=2 * i + 1), total_price=Decimal('100.00'), status='confirmed')
+            for i in range(3)
+        ])
+        self.user = User.objects.create_user('staff', 'staff@example.com', 'staffpass123')
+        self.client.login(username='staff', password='staffpass123')
+    
+    def test_enqueue_process_and_download(self):
+        import gzip
+        from app.core.export_jobs import run_pending_jobs
+        response = self.client.get(reverse('export_bookings_csv'), {'background': '1', 'status': 'confirmed'})
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual((job['status'], job['progress']), ('pending', None))
+        self.assertEqual(run_pending_jobs(), 1)
+        
+        status = self.client.get(job['status_url']).json()
+        self.assertEqual((status['status'], status['progress'], status['total_rows']), ('completed', 1.0, 3))
+        download = self.client.get(status['download_url'])
+        self.assertIn('reservas.csv.gz', download['Content-Disposition'])
+        lines = gzip.decompress(b''.join(download.streaming_content)).decode('utf-8').strip().splitlines()
+        self.assertEqual(len(lines), 4)
+        
+        # Otro usuario no ve el trabajo
+        User.objects.create_user('other', 'other@example.com', 'otherpass123')
+        self.client.login(username='other', password='otherpass123')
+        self.assertEqual(self.client.get(job['status_url']).status_code, 404)
+    
+    def test_permissions_and_expiry(self):
+        from app.core.export_jobs import purge_expired_exports, run_pending_jobs
+        from app.core.models import ExportJob
+        with self.settings(DEBUG=False):
+            forbidden = self.client.post(reverse('export_job_create'), {'kind': 'email_logs'})
+            self.assertEqual(forbidden.status_code, 403)
+        self.assertEqual(self.client.post(reverse('export_job_create'), {'kind': 'facturas'}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('export_job_create'), {'kind': 'bookings', 'check_in': 'bad'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_bookings_csv'), {'background': '1', 'check_in': 'bad'}).status_code, 400)
+        # En la descarga directa un filtro inválido deja solo el encabezado
+        direct = self.client.get(reverse('export_bookings_csv'), {'check_in': 'bad'})
+        self.assertEqual(len(b''.join(direct.streaming_content).decode('utf-8').strip().splitlines()), 1)
+        created = self.client.post(reverse('export_job_create'), {'kind': 'clients', 'search': 'ríos'})
+        self.assertEqual(created.status_code, 202)
+        run_pending_jobs()
+        job = ExportJob.objects.get()
+        self.assertEqual(job.total_rows, 1)
+        self.assertEqual(purge_expired_exports(now=job.expires_at + timedelta(seconds=1)), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.file.name), ('expired', ''))
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[job.pk])).status_code, 410)
+        
+        # Un trabajo tomado por un worker que se detuvo queda fallido, no "en curso" para siempre
+        stuck = ExportJob.objects.create(kind='clients', requested_by=self.user, status='running',
+                                         started_at=timezone.now() - timedelta(hours=3))
+        run_pending_jobs()
+        stuck.refresh_from_db()
+        self.assertEqual(stuck.status, 'failed')
+        self.assertEqual(self.client.get(reverse('export_job_status', args=[stuck.pk])).json()['status'], 'failed')
+
+
+class BulkImportTestCase(TestCase):
+    """Importación masiva de habitaciones, clientes y reservas"""
+    
+    def setUp(self):
+        from app.administration.models import Hotel
+        self.hotel = Hotel.objects.create(name='Hotel Import', slug='hotel-import')
+        self.start = timezone.now().date() + timedelta(days=5)
+    
+    def _import(self, kind, text, fmt='csv', **kwargs):
+        from app.core.imports import import_file
+        return import_file(kind, StringIO(text), fmt, **kwargs)
+    
+    def test_rooms_and_clients_upsert(self):
+        Room.objects.create(hotel=self.hotel, number='101', type='individual', capacity=1, price=Decimal('50.00'))
+        result = self._import('rooms', (
+            "hotel,number,type,capacity,price\n"
+            "hotel-import,101,double,2,90\n"
+            "hotel-import,102,suite,2,150\n"
+            "hotel-import,103,castillo,2,150\n"
+            "otro-hotel,104,suite,2,150\n"
+        ))
+        self.assertEqual((result.rows, result.created, result.updated), (4, 1, 1))
+        self.assertEqual([row for row, _ in result.errors], [4, 5])
+        self.assertEqual(Room.objects.get(hotel=self.hotel, number='101').price, Decimal('90.00'))
+        
+        Client.objects.create(first_name='Old', last_name='Name', email='ana@example.com', dni='111')
+        Client.objects.create(first_name='Bea', last_name='Paz', email='bea@example.com', dni='222')
+        result = self._import('clients', (
+            "first_name,last_name,email,dni\n"
+            "Ana,Gómez,ANA@example.com,111\n"
+            "Bea,Paz,bea.nueva@example.com,222\n"
+            "Carla,Ruiz,carla@example.com,333\n"
+            "Carla,Ruiz Díaz,carla@example.com,333\n"
+            "Dora,Sol,ana@example.com,222\n"
+            "Eva,Luz,no-es-email,444\n"
+        ), hotel=self.hotel)
+        self.assertEqual((result.created, result.updated), (1, 2))
+        self.assertEqual([row for row, _ in result.errors], [6, 7])
+        self.assertEqual(Client.objects.get(dni='111').first_name, 'Ana')
+        self.assertEqual(Client.objects.get(dni='222').email, 'bea.nueva@example.com')
+        self.assertEqual(Client.objects.get(dni='333').last_name, 'Ruiz Díaz')
+        
+        # El email existente se reconoce aunque difiera en mayúsculas
+        Client.objects.create(first_name='Juan', last_name='Paz', email='Juan@Example.com', dni='555')
+        result = self._import('clients', "first_name,last_name,email,dni\nJuan,Paz Sol,juan@example.com,556\n")
+        self.assertEqual((result.created, result.updated), (0, 1))
+        self.assertEqual(Client.objects.filter(email__iexact='juan@example.com').count(), 1)
+    
+    def test_bookings_detect_overlaps_in_memory(self):
+        from app.bookings.models import RoomNight
+        from app.core.models import DailyHotelStats
+        room = Room.objects.create(hotel=self.hotel, number='201', type='double', capacity=2, price=Decimal('100.00'))
+        guest = Client.objects.create(first_name='Ana', last_name='Gómez', email='ana@example.com', dni='111')
+        Booking(hotel=self.hotel, client=guest, room=room, check_in_date=self.start + timedelta(days=10),
+                check_out_date=self.start + timedelta(days=12), total_price=Decimal('200.00'),
+                status='confirmed').save(skip_validation=True)
+        d = lambda offset: (self.start + timedelta(days=offset)).isoformat()
+        rows = [
+            {'room': '201', 'client_dni': '111', 'check_in': d(0), 'check_out': d(3)},
+            {'room': '201', 'client_email': 'ana@example.com', 'check_in': d(2), 'check_out': d(4)},
+            {'room': '201', 'client_dni': '111', 'check_in': d(2), 'check_out': d(4), 'status': 'cancelled'},
+            {'room': '201', 'client_dni': '111', 'check_in': d(11), 'check_out': d(13)},
+            {'room': '999', 'client_dni': '111', 'check_in': d(5), 'check_out': d(6)},
+            {'room': '201', 'client_dni': '000', 'check_in': d(5), 'check_out': d(6)},
+            {'room': '201', 'client_dni': '111', 'check_in': d(6), 'check_out': d(5)},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self._import('bookings', json.dumps(rows), fmt='json', hotel=self.hotel, batch_size=3)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([row for row, _ in result.errors], [2, 4, 5, 6, 7])
+        imported = Booking.objects.get(check_in_date=self.start)
+        self.assertEqual((imported.status, imported.total_price), ('confirmed', Decimal('300.00')))
+        self.assertEqual(RoomNight.objects.filter(booking=imported).count(), 3)
+        self.assertEqual(DailyHotelStats.objects.get(hotel=self.hotel, date=self.start).occupied, 1)
+    
+    def test_bookings_free_expired_holds_and_report_late_conflicts(self):
+        from unittest import mock
+        from app.bookings.holds import place_hold
+        from app.bookings.models import RoomNight
+        room = Room.objects.create(hotel=self.hotel, number='202', type='double', capacity=2, price=Decimal('100.00'))
+        guest = Client.objects.create(first_name='Ana', last_name='Gómez', email='ana@example.com', dni='111')
+        hold = place_hold(room, self.start, self.start + timedelta(days=2), 'sesion-vencida')
+        RoomNight.objects.filter(hold=hold).update(expires_at=timezone.now() - timedelta(minutes=1))
+        d = lambda offset: (self.start + timedelta(days=offset)).isoformat()
+        text = json.dumps([{'room': '202', 'client_dni': '111', 'check_in': d(0), 'check_out': d(2)}])
+        result = self._import('bookings', text, fmt='json', hotel=self.hotel)
+        self.assertEqual((result.created, result.errors), (1, []))
+        
+        # Una noche ocupada después de la consulta de noches libres queda como error de la fila
+        rows = [
+            {'room': '202', 'client_dni': '111', 'check_in': d(1), 'check_out': d(3)},
+            {'room': '202', 'client_dni': '111', 'check_in': d(5), 'check_out': d(6)},
+        ]
+        with mock.patch('app.bookings.occupancy.active_nights', return_value=RoomNight.objects.none()):
+            result = self._import('bookings', json.dumps(rows), fmt='json', hotel=self.hotel)
+        self.assertEqual(result.created, 1)
+        self.assertEqual([row for row, _ in result.errors], [1])
+        self.assertEqual(Booking.objects.filter(room=room).count(), 2)
+    
+    def test_command_and_superadmin_upload(self):
+        import os
+        import tempfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import call_command
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as f:
+            f.write('{"number": "301", "type": "suite", "price": "150"}\n{"number": "302"}\n')
+        self.addCleanup(os.unlink, f.name)
+        out = StringIO()
+        call_command('import_data', 'rooms', f.name, hotel='hotel-import', stdout=out)
+        self.assertIn('1 nuevas', out.getvalue())
+        self.assertIn('Fila 2: Falta price', out.getvalue())
+        
+        User.objects.create_superuser('root', 'root@example.com', 'rootpass123')
+        self.client.login(username='root', password='rootpass123')
+        upload = SimpleUploadedFile('rooms.csv', b"number,price\n302,80\n303,80\n", content_type='text/csv')
+        response = self.client.post(reverse('superadmin_import'), {
+            'kind': 'rooms', 'hotel': self.hotel.id, 'file': upload, 'dry_run': '1',
+        })
+        self.assertEqual(response.context['result']['created'], 2)
+        self.assertFalse(Room.objects.filter(number='302').exists())
+
+
+class KeysetPaginationTestCase(TestCase):
+    """Paginación por cursor de las APIs de listados"""
+    
+    def setUp(self):
+        room = Room.objects.create(number='K1', type='double', capacity=2, price=Decimal('100.00'))
+        guest = Client.objects.create(first_name='Kim', last_name='Lee', email='kim@example.com', dni='5550009')
+        start = timezone.now().date()
+        Booking.objects.bulk_create([
+            Booking(client=guest, room=room, check_in_date=start + timedelta(days=2 * i),
+                    check_out_date=start + timedelta(days=2 * i + 1), total_price=Decimal('100.00'), status='confirmed')
+            for i in range(7)
+        ])
+        # Empates en created_at: el id desempata
+        Booking.objects.filter(id__in=Booking.objects.order_by('id').values('id')[:4]).update(created_at=timezone.now())
+        for number in ('K2', 'K3', 'K4'):
+            Room.objects.create(number=number, type='individual', capacity=1, price=Decimal('50.00'))
+        User.objects.create_user('staff', 'staff@example.com', 'staffpass123')
+        self.client.login(username='staff', password='staffpass123')
+    
+    def _walk(self, url, limit):
+        ids, cursor = [], None
+        while True:
+            params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+            page = self.client.get(url, params).json()
+            ids += [row['id'] for row in page['results']]
+            cursor = page['next']
+            if cursor is None:
+                return ids
+    
+    def test_pages_follow_the_list_order(self):
+        url = reverse('bookings_api_collection')
+        expected = list(Booking.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk(url, 3), expected)
+        self.assertEqual([row['id'] for row in self.client.get(url).json()], expected)
+        rooms = self._walk(reverse('rooms_api_collection'), 2)
+        self.assertEqual(rooms, list(Room.objects.order_by('number', 'id').values_list('id', flat=True)))
+        self.assertEqual(len(self._walk(reverse('clients_api_collection'), 1)), Client.objects.count())
+    
+    def test_invalid_params(self):
+        url = reverse('bookings_api_collection')
+        self.assertEqual(self.client.get(url, {'cursor': 'manipulado'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': 0}).status_code, 400)
+        rooms_cursor = self.client.get(reverse('rooms_api_collection'), {'limit': 1}).json()['next']
+        self.assertEqual(self.client.get(url, {'cursor': rooms_cursor}).status_code, 400)
+    
+    def test_sparse_fieldsets(self):
+        rooms = self.client.get(reverse('rooms_api_collection'), {'fields': 'id,number,status'}).json()
+        self.assertEqual(set(rooms[0]), {'id', 'number', 'status'})
+        
+        url = reverse('bookings_api_collection')
+        full = self.client.get(url).json()[0]
+        booking = Booking.objects.select_related('client', 'room').get(id=full['id'])
+        self.assertEqual(full['client']['full_name'], booking.client.full_name)
+        self.assertEqual(full['duration'], booking.duration)
+        self.assertEqual(full['room']['price'], 100.0)
+        
+        # Un prefijo elige el objeto anidado completo
+        partial = self.client.get(url, {'fields': 'id,client,room.number'}).json()[0]
+        self.assertEqual(partial, {'id': full['id'], 'client': full['client'], 'room': {'number': 'K1'}})
+        
+        page = self.client.get(url, {'fields': 'status', 'limit': 3}).json()
+        self.assertEqual(page['results'], [{'status': 'confirmed'}] * 3)
+        self.assertIsNotNone(page['next'])
+        
+        self.assertEqual(self.client.get(url, {'fields': 'id,password'}).status_code, 400)
+
+
+class ConditionalListApiTestCase(TestCase):
+    """ETag / Last-Modified de las APIs de listados a partir de las versiones por hotel"""
+    
+    def setUp(self):
+        from app.administration.models import Hotel
+        self.hotel = Hotel.objects.create(name='Hotel ETag', slug='hotel-etag')
+        self.other = Hotel.objects.create(name='Hotel Otro', slug='hotel-otro')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room = Room.objects.create(hotel=self.hotel, number='E1', type='double', capacity=2, price=Decimal('100.00'))
+            self.guest = Client.objects.create(hotel=self.hotel, first_name='Ema', last_name='Paz', email='ema@example.com', dni='5550010')
+        self.start = timezone.now().date() + timedelta(days=3)
+        User.objects.create_user('staff', 'staff@example.com', 'staffpass123')
+        self.client.login(username='staff', password='staffpass123')
+    
+    def _get(self, url, params=None, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, params or {}, **headers)
+    
+    def test_not_modified_without_reading_the_list(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        url = reverse('rooms_api_collection')
+        first = self._get(url, {'hotel': self.hotel.id})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Last-Modified', first)
+        
+        with CaptureQueriesContext(connection) as queries:
+            again = self._get(url, {'hotel': self.hotel.id}, etag=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+        self.assertFalse([q for q in queries.captured_queries if 'rooms_room' in q['sql']])
+        
+        modified_since = self.client.get(url, {'hotel': self.hotel.id}, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(modified_since.status_code, 304)
+        
+        # Un cambio en otro hotel no invalida el ETag de este (las versiones se incrementan tras el commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(hotel=self.other, number='O1', type='individual', capacity=1, price=Decimal('50.00'))
+        self.assertEqual(self._get(url, {'hotel': self.hotel.id}, etag=first['ETag']).status_code, 304)
+        self.assertEqual(self._get(url, etag=first['ETag']).status_code, 200)
+        
+        self.room.status = 'cleaning'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.save()
+        changed = self._get(url, {'hotel': self.hotel.id}, etag=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertEqual([room['status'] for room in changed.json()], ['cleaning'])
+    
+    def test_bookings_follow_bookings_and_clients(self):
+        url = reverse('bookings_api_collection')
+        etag = self._get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(hotel=self.hotel, client=self.guest, room=self.room, check_in_date=self.start,
+                                   check_out_date=self.start + timedelta(days=2), total_price=Decimal('200.00'))
+        response = self._get(url, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self._get(url, etag=etag).status_code, 304)
+        
+        self.guest.first_name = 'Emma'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.guest.save()
+        response = self._get(url, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['client']['full_name'], 'Emma Paz')
+        
+        clients_etag = self._get(reverse('clients_api_collection'))['ETag']
+        self.assertEqual(self._get(reverse('clients_api_collection'), etag=clients_etag).status_code, 304)
+    
+    def test_availability_endpoint(self):
+        url = '/api/habitaciones-disponibles/'
+        params = {'fecha_inicio': self.start.isoformat(), 'fecha_fin': (self.start + timedelta(days=2)).isoformat(),
+                  'personas': 2, 'hotel': self.hotel.id}
+        first = self._get(url, params)
+        self.assertEqual(first.json()['total_rooms'], 1)
+        self.assertEqual(self._get(url, params, etag=first['ETag']).status_code, 304)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(hotel=self.hotel, client=self.guest, room=self.room, check_in_date=self.start,
+                                   check_out_date=self.start + timedelta(days=1), total_price=Decimal('100.00'))
+        response = self._get(url, params, etag=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_rooms'], 0)
+    
+    def test_availability_etag_changes_when_a_hold_expires(self):
+        from app.bookings.holds import place_hold
+        from app.bookings.models import InventoryHold, RoomNight
+        url = '/api/habitaciones-disponibles/'
+        params = {'fecha_inicio': self.start.isoformat(), 'fecha_fin': (self.start + timedelta(days=2)).isoformat(),
+                  'personas': 2, 'hotel': self.hotel.id}
+        with self.captureOnCommitCallbacks(execute=True):
+            hold = place_hold(self.room, self.start, self.start + timedelta(days=1), 'sesion-etag')
+        held = self._get(url, params)
+        self.assertEqual(held.json()['total_rooms'], 0)
+        self.assertNotIn('Last-Modified', held)
+        self.assertEqual(self._get(url, params, etag=held['ETag']).status_code, 304)
+        
+        # El bloqueo vence sin escribir nada: el ETag cambia igual
+        expired = timezone.now() - timedelta(minutes=1)
+        InventoryHold.objects.filter(pk=hold.pk).update(expires_at=expired)
+        RoomNight.objects.filter(hold=hold).update(expires_at=expired)
+        response = self._get(url, params, etag=held['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_rooms'], 1)
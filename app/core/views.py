@@ -8,16 +8,32 @@ from django.db.models import Count, Q
 import json
 from django.core.cache import cache
 from app.core.services_ia import call_n8n_ia_analyst, IAServiceError, IAServiceNotConfigured
-from app.superadmin.services import get_dashboard_data
+from app.superadmin.services import get_dashboard_data, bookings_status_series, cached_hotels_today_kpis, GRANULARITIES
+from app.core.daily_stats import period_totals, today_kpis
+from app.superadmin.analytics import analytics_available, metrics_csv_rows, revenue_metrics, GROUP_DIMENSIONS
+from app.core.on_the_books import pace_report, pickup_curve
 from django.contrib.auth.forms import UserCreationForm
 from app.clients.forms import ClientRegistrationForm
 from django.contrib.auth.models import User
 from django.db.models import Count, Sum, Q
 from django.http import JsonResponse, HttpResponse
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseForbidden, HttpResponseNotModified, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.http import parse_etags, quote_etag
 from datetime import datetime, timedelta
 import locale
 from .utils import log_user_action
+from .export_jobs import enqueue_export, export_response, job_payload as export_job_payload
+from .exports import EXPORT_KINDS, clean_filters
+from .imports import IMPORT_KINDS, detect_format, import_file
+from .models import ExportJob
+from .dashboard_metrics import get_dashboard_counters, counters_etag, serialize_counters
+from .live_metrics import metrics_event_stream
+from app.bookings.occupancy import is_room_free, occupied_dates
+from app.rooms.availability import search_available_rooms, availability_grid
+from app.rooms.pricing import price_stay
+from app.rooms.allotments import rooms_left_by_type
 
 # Configurar locale para formato de moneda colombiana
 try:
@@ -33,7 +49,7 @@ except locale.Error:
 
 # Importar modelos de las apps
 from app.rooms.models import Room
-from app.bookings.models import Booking
+from app.bookings.models import Booking, BookingConflictError
 from app.clients.models import Client
 from app.administration.models import Hotel
 try:
@@ -101,122 +117,81 @@ def logout_view(request):
     messages.info(request, 'Has cerrado sesión exitosamente.')
     return redirect('login')
 
-def get_dashboard_metrics():
-    """Función para obtener métricas del dashboard de forma optimizada"""
-    metrics = {}
+def get_dashboard_metrics(hotel=None):
+    """
+    Métricas del dashboard de un hotel (o de todos).
+    Los contadores salen de la caché (ver app.core.dashboard_metrics).
+    """
+    metrics = dict(get_dashboard_counters(getattr(hotel, 'id', None)))
     
-    # Obtener estadísticas de habitaciones
-    try:
-        from app.rooms.models import Room as RoomModel
-        room_stats = RoomModel.objects.aggregate(
-            total=Count('id'),
-            available=Count('id', filter=Q(status='available')),
-            cleaning=Count('id', filter=Q(status='cleaning')),
-            maintenance=Count('id', filter=Q(status='maintenance'))
-        )
-        
-        # Calcular habitaciones ocupadas basándose en reservas activas
-        try:
-            from app.bookings.models import Booking as BookingModel
-            today = datetime.now().date()
-            occupied_rooms = BookingModel.objects.filter(
-                check_in_date__lte=today,
-                check_out_date__gte=today,
-                status='confirmed'
-            ).values('room').distinct().count()
-        except ImportError:
-            occupied_rooms = RoomModel.objects.filter(status='occupied').count()
-        
-        metrics.update({
-            'total_rooms': room_stats['total'],
-            'available_rooms': room_stats['available'],
-            'occupied_rooms': occupied_rooms,
-            'cleaning_rooms': room_stats['cleaning'],
-            'maintenance_rooms': room_stats['maintenance']
-        })
-    except ImportError:
-        # Datos de ejemplo si no hay modelos
-        metrics.update({
-            'total_rooms': 50,
-            'available_rooms': 35,
-            'occupied_rooms': 12,
-            'cleaning_rooms': 2,
-            'maintenance_rooms': 1
-        })
-    
-    # Obtener estadísticas de reservas e ingresos
-    try:
-        from app.bookings.models import Booking as BookingModel
-        today = datetime.now().date()
-        start_of_month = datetime.now().replace(day=1).date()
-        
-        booking_stats = BookingModel.objects.aggregate(
-            active_bookings=Count('id', filter=Q(
-                check_in_date__lte=today,
-                check_out_date__gte=today,
-                status='confirmed'
-            )),
-            total_revenue=Sum('total_price', filter=Q(
-                check_in_date__gte=start_of_month,
-                status__in=['confirmed', 'completed']
-            ))
-        )
-        
-        metrics.update({
-            'active_bookings': booking_stats['active_bookings'] or 0,
-            'total_revenue': booking_stats['total_revenue'] or 0,
-            'recent_bookings': BookingModel.objects.select_related('client', 'room').order_by('-created_at')[:10]
-        })
-    except ImportError:
-        metrics.update({
-            'active_bookings': 15,
-            'total_revenue': 25000000,
-            'recent_bookings': []
-        })
-    
-    # Obtener estadísticas de clientes
-    try:
-        from app.clients.models import Client as ClientModel
-        metrics['total_clients'] = ClientModel.objects.count()
-    except ImportError:
-        metrics['total_clients'] = 120
+    recent_bookings = Booking.objects.select_related('client', 'room').order_by('-created_at')
+    if hotel:
+        recent_bookings = recent_bookings.filter(hotel=hotel)
+    metrics['recent_bookings'] = recent_bookings[:10]
     
     # Obtener alertas de mantenimiento
-    try:
-        from app.maintenance.models import MaintenanceRequest
-        metrics['maintenance_alerts'] = MaintenanceRequest.objects.select_related('room').filter(
-            status='pending'
-        ).order_by('-priority', '-created_at')[:5]
-    except ImportError:
+    if MaintenanceRequest:
+        alerts = MaintenanceRequest.objects.select_related('room').filter(status='pending')
+        if hotel:
+            alerts = alerts.filter(room__hotel=hotel)
+        metrics['maintenance_alerts'] = alerts.order_by('-priority', '-created_at')[:5]
+    else:
         metrics['maintenance_alerts'] = []
     
     return metrics
 
 
+def _requested_hotel(request):
+    """Hotel pedido en ?hotel=<id o slug>: (hotel o None, encontrado)"""
+    hotel_param = request.GET.get('hotel') or request.POST.get('hotel')
+    if not hotel_param:
+        return None, True
+    hotel = Hotel.objects.filter(id=int(hotel_param)).first() if str(hotel_param).isdigit() else None
+    if hotel is None:
+        hotel = Hotel.objects.filter(slug=hotel_param).first()
+    return hotel, hotel is not None
+
+
 @login_required
 def dashboard_metrics_api(request):
-    """API endpoint para obtener métricas del dashboard en tiempo real"""
+    """API endpoint para obtener métricas del dashboard en tiempo real (con ETag)"""
     try:
-        metrics = get_dashboard_metrics()
-        
-        # Formatear datos para JSON
-        response_data = {
-            'total_rooms': metrics['total_rooms'],
-            'available_rooms': metrics['available_rooms'],
-            'occupied_rooms': metrics['occupied_rooms'],
-            'cleaning_rooms': metrics['cleaning_rooms'],
-            'maintenance_rooms': metrics['maintenance_rooms'],
-            'total_revenue': float(metrics['total_revenue']),
-            'active_bookings': metrics['active_bookings'],
-            'total_clients': metrics['total_clients'],
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        return JsonResponse(response_data)
+        hotel, found = _requested_hotel(request)
+        if not found:
+            return JsonResponse({'error': 'hotel_not_found'}, status=404)
+        metrics = get_dashboard_counters(getattr(hotel, 'id', None))
+        etag = quote_etag(counters_etag(metrics))
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse(serialize_counters(metrics))
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def live_metrics_available(request):
+    """El flujo SSE sólo se sirve bajo ASGI: bajo WSGI ocuparía un hilo del worker por cliente"""
+    return isinstance(request, ASGIRequest)
+
+
+@login_required
+async def dashboard_metrics_stream(request):
+    """Server-Sent Events con las métricas del dashboard (ver app.core.live_metrics)"""
+    if not live_metrics_available(request):
+        # EventSource no reconecta ante un 204: el dashboard pasa a consultar dashboard_metrics_api
+        return HttpResponse(status=204)
+    hotel, found = await sync_to_async(_requested_hotel)(request)
+    if not found:
+        return JsonResponse({'error': 'hotel_not_found'}, status=404)
+    response = StreamingHttpResponse(metrics_event_stream(getattr(hotel, 'id', None)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def dashboard_view(request):
     """Vista del dashboard principal"""
@@ -254,8 +229,11 @@ def dashboard_view(request):
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
-    # Usar la función optimizada para obtener métricas
-    context = get_dashboard_metrics()
+    # Usar la función optimizada para obtener métricas del hotel activo (el mismo que el resto del panel)
+    hotel = get_hotel_activo(request)
+    context = get_dashboard_metrics(hotel)
+    context['active_hotel'] = hotel
+    context['live_metrics'] = live_metrics_available(request)
     
     # Agregar datos adicionales específicos para la vista
     if CleaningTask:
@@ -370,25 +348,58 @@ def administration_view(request):
 def reports_view(request):
     """Vista de reportes"""
     log_user_action(request.user, 'ver_reportes', 'Usuario accedió a reportes', request)
-    return render(request, 'reports/dashboard.html')
+    today = timezone.now().date()
+    try:
+        date_from = datetime.strptime(request.GET['desde'], '%Y-%m-%d').date() if request.GET.get('desde') else today.replace(day=1)
+        date_to = datetime.strptime(request.GET['hasta'], '%Y-%m-%d').date() if request.GET.get('hasta') else today
+    except ValueError:
+        date_from, date_to = today.replace(day=1), today
+    context = {'date_from': date_from.isoformat(), 'date_to': date_to.isoformat()}
+    if date_from <= date_to and (date_to - date_from).days < MAX_ANALYTICS_DAYS:
+        context['new_clients'] = Client.objects.filter(created_at__date__range=(date_from, date_to)).count()
+        if analytics_available():
+            totals = revenue_metrics(date_from, date_to, group_by=())['totals']
+            context.update({
+                'total_revenue': totals['revenue'],
+                'total_bookings': totals['arrivals'],
+                'occupancy_rate': totals['occupancy'] * 100,
+            })
+    return render(request, 'reports/dashboard.html', context)
 
 # ============================================================================
 # VISTAS DEL PORTAL DE CLIENTES
 # ============================================================================
 
+def tonight_rooms_left(hotel):
+    """Habitaciones libres esta noche por tipo: {tipo: cantidad}"""
+    today = timezone.now().date()
+    try:
+        left = rooms_left_by_type(getattr(hotel, 'id', None), today, today + timedelta(days=1))
+    except Exception:
+        return {}
+    return {room_type: counts['left'] for room_type, counts in left.items()}
+
 def client_index_view(request):
     """Vista principal del portal de clientes (pública)"""
+    rooms_left = {}
     if Room:
         # Habitaciones disponibles para mostrar
-        available_rooms = Room.objects.filter(
+        available_rooms = list(Room.objects.filter(
             status='available',
             active=True
-        ).order_by('price')[:6]
+        ).order_by('price')[:6])
         
         # Habitaciones destacadas
         featured_rooms = Room.objects.filter(
             active=True
         ).order_by('?')[:3]  # Aleatorio
+        
+        # Habitaciones libres esta noche por tipo (cupos por tipo)
+        hotel_activo = get_hotel_activo(request)
+        rooms_left = tonight_rooms_left(hotel_activo)
+        for room in available_rooms:
+            if room.hotel_id == getattr(hotel_activo, 'id', None):
+                room.rooms_left = rooms_left.get(room.type)
     else:
         available_rooms = []
         featured_rooms = []
@@ -396,6 +407,7 @@ def client_index_view(request):
     context = {
         'available_rooms': available_rooms,
         'featured_rooms': featured_rooms,
+        'rooms_left': rooms_left,
     }
     
     return render(request, 'client/index.html', context)
@@ -415,19 +427,12 @@ def hotel_reserve_view(request, hotel_slug):
             check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
         except Exception:
             return HttpResponse("Fechas inválidas", status=400)
-        rooms_qs = Room.objects.filter(hotel=hotel, active=True, status='available')
         try:
             g = int(guests or '1')
-            rooms_qs = rooms_qs.filter(capacity__gte=g)
         except Exception:
-            pass
-        overlapping = Booking.objects.filter(
-            room__in=rooms_qs,
-            status__in=['confirmed', 'pending'],
-            check_in_date__lt=check_out_date,
-            check_out_date__gt=check_in_date
-        ).values_list('room_id', flat=True)
-        available_rooms = rooms_qs.exclude(id__in=list(overlapping))[:30]
+            g = 1
+        room_ids = [r['id'] for r in search_available_rooms(check_in_date, check_out_date, g, hotel_id=hotel.id)[:30]]
+        available_rooms = Room.objects.filter(id__in=room_ids)
         return render(request, 'hotel/reserve_results.html', {
             'hotel': hotel,
             'rooms': available_rooms,
@@ -470,8 +475,7 @@ def hotel_confirm_reservation_view(request, hotel_slug):
         })
         client.hotel = hotel
         client.save()
-        nights = (check_out_date - check_in_date).days
-        total_price = room.price * nights
+        total_price = price_stay(room, check_in_date, check_out_date)
         booking = Booking.objects.create(
             hotel=hotel,
             client=client,
@@ -488,6 +492,8 @@ def hotel_confirm_reservation_view(request, hotel_slug):
         except Exception:
             pass
         return HttpResponse(f"Reserva creada #{booking.id}")
+    except BookingConflictError:
+        return HttpResponse("La habitación ya no está disponible para esas fechas", status=409)
     except Exception:
         return HttpResponse("Error al crear reserva", status=400)
 
@@ -562,9 +568,15 @@ def client_rooms_view(request):
         else:
             rooms = rooms.filter(status='available')
             
-        # Obtener estadísticas para mostrar
-        total_rooms = rooms.count()
-        available_rooms = rooms.filter(status='available').count()
+        # Materializar una sola vez y calcular las estadísticas en memoria
+        rooms = list(rooms)
+        total_rooms = len(rooms)
+        available_rooms = sum(1 for room in rooms if room.status == 'available')
+        
+        # Habitaciones libres esta noche por tipo (cupos por tipo)
+        rooms_left = tonight_rooms_left(hotel_activo)
+        for room in rooms:
+            room.rooms_left = rooms_left.get(room.type)
         
     else:
         rooms = Room.objects.none()
@@ -672,14 +684,7 @@ def client_booking_view(request, room_id=None):
                     })
                 
                 # Validar disponibilidad de la habitación en las fechas seleccionadas
-                overlapping_bookings = Booking.objects.filter(
-                    room=room,
-                    status__in=['confirmed', 'pending'],
-                    check_in_date__lt=check_out_date,
-                    check_out_date__gt=check_in_date
-                )
-                
-                if overlapping_bookings.exists():
+                if not is_room_free(room, check_in_date, check_out_date):
                     messages.error(request, 'La habitación no está disponible en las fechas seleccionadas. Por favor elige otras fechas.')
                     return render(request, 'client/booking.html', {
                         'room': room,
@@ -712,8 +717,7 @@ def client_booking_view(request, room_id=None):
                     )
                 
                 # Calcular precio total
-                nights = (check_out_date - check_in_date).days
-                total_price = room.price * nights
+                total_price = price_stay(room, check_in_date, check_out_date)
                 
                 # Crear la reserva
                 booking = Booking.objects.create(
@@ -789,46 +793,22 @@ def get_room_availability(request, room_id):
         start_date = date.today()
         end_date = start_date + timedelta(days=60)
     
-    # Obtener reservas que afectan este período
-    if Booking:
-        bookings = Booking.objects.filter(
-            room=room,
-            status__in=['confirmed', 'pending'],
-            check_in_date__lte=end_date,
-            check_out_date__gt=start_date
-        ).values('check_in_date', 'check_out_date', 'status')
-    else:
-        bookings = []
+    # Noches ocupadas en el período (índice RoomNight)
+    busy = occupied_dates(room, start_date, end_date) if Booking else set()
     
     # Crear diccionario de disponibilidad
     availability = {}
     current_date = start_date
     
     while current_date <= end_date:
+        is_busy = current_date in busy
         availability[current_date.isoformat()] = {
-            'available': True,
-            'status': 'available',
+            'available': not is_busy,
+            'status': 'occupied' if is_busy else 'available',
             'price': float(room.price)
         }
         current_date += timedelta(days=1)
     
-    # Marcar días ocupados
-    for booking in bookings:
-        booking_start = booking['check_in_date']
-        booking_end = booking['check_out_date']
-        
-        current_date = max(booking_start, start_date)
-        end_booking = min(booking_end, end_date + timedelta(days=1))
-        
-        while current_date < end_booking:
-            if current_date.isoformat() in availability:
-                availability[current_date.isoformat()] = {
-                    'available': False,
-                    'status': 'occupied',
-                    'price': float(room.price)
-                }
-            current_date += timedelta(days=1)
-    
     return JsonResponse({
         'room_id': room.id,
         'room_number': room.number,
@@ -838,6 +818,29 @@ def get_room_availability(request, room_id):
         'end_date': end_date.isoformat()
     })
 
+@login_required
+def panel_availability_grid(request):
+    """API de la grilla de disponibilidad del hotel (todas las habitaciones × N días)"""
+    hotel_activo = get_hotel_activo(request)
+    if not hotel_activo:
+        return JsonResponse({'error': 'Hotel no encontrado'}, status=404)
+
+    try:
+        start_str = request.GET.get('start_date')
+        start_date = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else timezone.now().date()
+        days = int(request.GET.get('days') or '30')
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros inválidos'}, status=400)
+    if days <= 0 or days > 366:
+        return JsonResponse({'error': 'El rango debe estar entre 1 y 366 días'}, status=400)
+
+    return JsonResponse({
+        'hotel_id': hotel_activo.id,
+        'start_date': start_date.isoformat(),
+        'days': days,
+        'rooms': availability_grid(hotel_activo.id, start_date, days),
+    })
+
 def client_booking_confirmation_view(request, booking_id):
     """Vista de confirmación de reserva"""
     if not request.user.is_authenticated:
@@ -1228,38 +1231,21 @@ def is_superadmin(user):
 def superadmin_dashboard_view(request):
     if not is_superadmin(request.user):
         return HttpResponseForbidden()
-    from django.utils import timezone
-    today = timezone.now().date()
-    hotels = Hotel.objects.all().order_by('name')
-    total_rooms = 0
-    occupied_rooms = 0
-    total_reservas_hoy = 0
-    pendientes_hoy = 0
-    confirmadas_hoy = 0
-    from app.rooms.models import Room
-    from app.bookings.models import Booking
-    for h in hotels:
-        total_rooms += Room.objects.filter(hotel=h).count()
-        ocupadas = Booking.objects.filter(hotel=h, status='confirmed', check_in_date__lte=today, check_out_date__gte=today).values('room').distinct().count()
-        occupied_rooms += ocupadas
-        reservas_hoy = Booking.objects.filter(hotel=h, check_in_date__lte=today, check_out_date__gte=today).count()
-        total_reservas_hoy += reservas_hoy
-        pendientes_hoy += Booking.objects.filter(hotel=h, status='pending', check_in_date__lte=today, check_out_date__gte=today).count()
-        confirmadas_hoy += Booking.objects.filter(hotel=h, status='confirmed', check_in_date__lte=today, check_out_date__gte=today).count()
-    ocupacion = 0
-    if total_rooms > 0:
-        from decimal import Decimal
-        ocupacion = round((Decimal(occupied_rooms) / Decimal(total_rooms)) * Decimal('100'), 2)
+    snapshot = cached_hotels_today_kpis()
+    totals = snapshot['totals']
     context = {
-        'hotels': hotels,
-        'total_rooms': total_rooms,
-        'occupied_rooms': occupied_rooms,
-        'total_reservas_hoy': total_reservas_hoy,
-        'pendientes_hoy': pendientes_hoy,
-        'confirmadas_hoy': confirmadas_hoy,
-        'ocupacion_percent': ocupacion,
+        'hotels': Hotel.objects.all().order_by('name'),
+        'hotel_kpis': snapshot['hotels'],
+        'total_rooms': totals['rooms'],
+        'occupied_rooms': totals['occupied'],
+        'total_reservas_hoy': totals['in_house'],
+        'llegadas_hoy': totals['arrivals'],
+        'pendientes_hoy': totals['pending'],
+        'confirmadas_hoy': totals['confirmed'],
+        'ocupacion_percent': totals['occupancy_percent'],
     }
     return render(request, 'superadmin/dashboard.html', context)
+MAX_ANALYTICS_DAYS = 731
 def _parse_date_params(request):
     try:
         to_str = request.GET.get('hasta')
@@ -1274,61 +1260,33 @@ def _parse_date_params(request):
     except Exception:
         return None, None, None
 def _kpis_for_hotel(hotel):
-    today = timezone.now().date()
-    from app.rooms.models import Room
-    total_rooms = Room.objects.filter(hotel=hotel).count()
-    occupied_rooms = Booking.objects.filter(hotel=hotel, status='confirmed', check_in_date__lte=today, check_out_date__gt=today).values('room_id').distinct().count()
-    occupancy_today = None if total_rooms == 0 else round(occupied_rooms / total_rooms, 4)
-    bookings_checkin_today_total = Booking.objects.filter(hotel=hotel, check_in_date=today).count()
-    return occupancy_today, bookings_checkin_today_total
+    kpis = today_kpis(hotel)
+    occupancy_today = None if kpis['occupancy'] is None else round(kpis['occupancy'], 4)
+    return occupancy_today, kpis['arrivals']
 def _kpis_for_global():
-    today = timezone.now().date()
-    from app.rooms.models import Room
-    total_rooms = Room.objects.count()
-    occupied_rooms = Booking.objects.filter(status='confirmed', check_in_date__lte=today, check_out_date__gt=today).values('room_id').distinct().count()
-    occupancy_today = None if total_rooms == 0 else round(occupied_rooms / total_rooms, 4)
-    bookings_checkin_today_total = Booking.objects.filter(check_in_date=today).count()
-    return occupancy_today, bookings_checkin_today_total
-def _series_daily_bookings(from_date, to_date, hotel=None):
-    base = Booking.objects.filter(check_in_date__gte=from_date, check_in_date__lte=to_date)
-    if hotel:
-        base = base.filter(hotel=hotel)
-    arr = []
-    cur = from_date
-    while cur <= to_date:
-        day = base.filter(check_in_date=cur)
-        arr.append({
-            'date': cur.strftime('%Y-%m-%d'),
-            'pending': day.filter(status='pending').count(),
-            'confirmed': day.filter(status='confirmed').count(),
-            'cancelled': day.filter(status='cancelled').count(),
-        })
-        cur += timezone.timedelta(days=1)
-    return arr
+    return _kpis_for_hotel(None)
+def _series_daily_bookings(from_date, to_date, hotel=None, granularity='day'):
+    return bookings_status_series(from_date, to_date, hotel, granularity=granularity)
 def _distribution_status(from_date, to_date, hotel=None):
-    qs = Booking.objects.filter(check_in_date__gte=from_date, check_in_date__lte=to_date)
-    if hotel:
-        qs = qs.filter(hotel=hotel)
-    agg = qs.aggregate(
-        pending=Count('id', filter=Q(status='pending')),
-        confirmed=Count('id', filter=Q(status='confirmed')),
-        cancelled=Count('id', filter=Q(status='cancelled')),
-    )
-    return {'pending': agg.get('pending') or 0, 'confirmed': agg.get('confirmed') or 0, 'cancelled': agg.get('cancelled') or 0}
+    totals = period_totals(from_date, to_date, hotel)
+    return {'pending': totals['pending'], 'confirmed': totals['confirmed'], 'cancelled': totals['cancelled']}
 @login_required
 def superadmin_api_dashboard_hotel(request, hotel_id):
     if not is_superadmin(request.user):
         return JsonResponse({'error': 'forbidden'}, status=403)
     from_date, to_date, days = _parse_date_params(request)
-    if from_date is None:
+    granularity = request.GET.get('granularity') or 'day'
+    if from_date is None or granularity not in GRANULARITIES:
         return JsonResponse({'error': 'invalid_params'}, status=400)
     try:
         hotel = Hotel.objects.get(id=hotel_id)
     except Hotel.DoesNotExist:
         return JsonResponse({'error': 'hotel_not_found'}, status=404)
     occupancy_today, bookings_today = _kpis_for_hotel(hotel)
-    reservations_period_count = Booking.objects.filter(hotel=hotel, check_in_date__gte=from_date, check_in_date__lte=to_date).count()
-    series = _series_daily_bookings(from_date, to_date, hotel)
+    reservations_period_count = period_totals(from_date, to_date, hotel)['arrivals']
+    series = {'daily_bookings': _series_daily_bookings(from_date, to_date, hotel)}
+    if granularity != 'day':
+        series[f'{granularity}ly_bookings'] = _series_daily_bookings(from_date, to_date, hotel, granularity)
     dist = _distribution_status(from_date, to_date, hotel)
     resp = {
         'meta': {
@@ -1343,9 +1301,7 @@ def superadmin_api_dashboard_hotel(request, hotel_id):
             'bookings_checkin_today_total': bookings_today,
             'reservations_period_count': reservations_period_count
         },
-        'series': {
-            'daily_bookings': series
-        },
+        'series': series,
         'distributions': {
             'status': dist
         }
@@ -1356,11 +1312,14 @@ def superadmin_api_dashboard_global(request):
     if not is_superadmin(request.user):
         return JsonResponse({'error': 'forbidden'}, status=403)
     from_date, to_date, days = _parse_date_params(request)
-    if from_date is None:
+    granularity = request.GET.get('granularity') or 'day'
+    if from_date is None or granularity not in GRANULARITIES:
         return JsonResponse({'error': 'invalid_params'}, status=400)
     occupancy_today, bookings_today = _kpis_for_global()
-    reservations_period_count = Booking.objects.filter(check_in_date__gte=from_date, check_in_date__lte=to_date).count()
-    series = _series_daily_bookings(from_date, to_date, None)
+    reservations_period_count = period_totals(from_date, to_date, None)['arrivals']
+    series = {'daily_bookings': _series_daily_bookings(from_date, to_date, None)}
+    if granularity != 'day':
+        series[f'{granularity}ly_bookings'] = _series_daily_bookings(from_date, to_date, None, granularity)
     dist = _distribution_status(from_date, to_date, None)
     resp = {
         'meta': {
@@ -1373,9 +1332,7 @@ def superadmin_api_dashboard_global(request):
             'bookings_checkin_today_total': bookings_today,
             'reservations_period_count': reservations_period_count
         },
-        'series': {
-            'daily_bookings': series
-        },
+        'series': series,
         'distributions': {
             'status': dist
         }
@@ -1624,49 +1581,166 @@ def superadmin_users_list_view(request):
         return redirect('superadmin_users')
     return render(request, 'superadmin/users_list.html', {'users': users})
 
+@login_required
+def superadmin_import_view(request):
+    """Carga masiva de habitaciones, clientes o reservas desde un archivo CSV / JSON"""
+    if not is_superadmin(request.user):
+        return HttpResponseForbidden()
+    context = {'kinds': IMPORT_KINDS, 'hotels': Hotel.objects.order_by('name')}
+    if request.method == 'POST':
+        kind = request.POST.get('kind')
+        upload = request.FILES.get('file')
+        hotel_id = request.POST.get('hotel')
+        hotel = Hotel.objects.filter(id=hotel_id).first() if hotel_id and hotel_id.isdigit() else None
+        if kind not in IMPORT_KINDS or upload is None:
+            messages.error(request, 'Elegí qué importar y el archivo')
+        else:
+            try:
+                result = import_file(kind, upload, detect_format(upload.name), hotel=hotel,
+                                     dry_run=request.POST.get('dry_run') == '1')
+            except ValueError as e:
+                messages.error(request, f'No se pudo leer el archivo: {e}')
+            else:
+                context['result'] = result.as_dict(max_errors=200)
+                context['dry_run'] = request.POST.get('dry_run') == '1'
+    return render(request, 'superadmin/import.html', context)
+
 @login_required
 def superadmin_export_bookings_csv(request):
+    """Reservas de todos los hoteles (o de ?hotel) en CSV, en streaming o en segundo plano (?background=1)"""
     if not is_superadmin(request.user):
         return HttpResponseForbidden()
-    from app.bookings.models import Booking
-    import csv
-    from io import StringIO
-    hotel_id = request.GET.get('hotel')
-    desde = request.GET.get('desde')
-    hasta = request.GET.get('hasta')
-    qs = Booking.objects.select_related('client', 'room', 'hotel')
-    if hotel_id:
-        try:
-            h = Hotel.objects.get(id=hotel_id)
-            qs = qs.filter(hotel=h)
-        except Hotel.DoesNotExist:
-            qs = qs.none()
-    if desde and hasta:
-        try:
-            from datetime import datetime
-            d1 = datetime.strptime(desde, '%Y-%m-%d').date()
-            d2 = datetime.strptime(hasta, '%Y-%m-%d').date()
-            qs = qs.filter(check_in_date__gte=d1, check_out_date__lte=d2)
-        except Exception:
-            qs = qs.none()
-    buffer = StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(['id', 'hotel', 'habitacion', 'cliente', 'check_in', 'check_out', 'estado', 'total_price'])
-    for b in qs.order_by('-created_at')[:1000]:
-        writer.writerow([b.id, getattr(b.hotel, 'name', ''), getattr(b.room, 'number', ''), getattr(b.client, 'full_name', ''), b.check_in_date, b.check_out_date, b.status, b.total_price])
-    resp = HttpResponse(buffer.getvalue(), content_type='text/csv')
-    resp['Content-Disposition'] = 'attachment; filename="reservas.csv"'
-    return resp
+    return export_response(request, 'superadmin_bookings')
+@login_required
+def export_job_create(request):
+    """Encola una exportación (POST kind + filtros del tipo)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'method_not_allowed'}, status=405)
+    kind = request.POST.get('kind')
+    if kind not in EXPORT_KINDS:
+        return JsonResponse({'error': 'invalid_params', 'message': 'Tipo de exportación desconocido'}, status=400)
+    if EXPORT_KINDS[kind][1] and not is_superadmin(request.user):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    try:
+        job = enqueue_export(kind, clean_filters(kind, request.POST), request.user)
+    except ValueError as e:
+        return JsonResponse({'error': 'invalid_params', 'message': str(e)}, status=400)
+    return JsonResponse(export_job_payload(job), status=202)
+def _export_job_for(request, job_id):
+    """Trabajo de exportación visible para el usuario (el que lo pidió o un superadmin)"""
+    job = ExportJob.objects.filter(pk=job_id).first()
+    if job is None or (job.requested_by_id != request.user.id and not is_superadmin(request.user)):
+        return None
+    return job
+@login_required
+def export_job_status(request, job_id):
+    """Estado y avance de una exportación"""
+    job = _export_job_for(request, job_id)
+    if job is None:
+        return JsonResponse({'error': 'not_found'}, status=404)
+    return JsonResponse(export_job_payload(job))
+@login_required
+def export_job_download(request, job_id):
+    """Descarga el archivo de una exportación terminada y vigente"""
+    from django.http import FileResponse, Http404
+    job = _export_job_for(request, job_id)
+    if job is None or job.status not in ('completed', 'expired'):
+        raise Http404("Exportación no disponible")
+    if job.status == 'expired' or (job.expires_at and job.expires_at <= timezone.now()):
+        return JsonResponse({'error': 'expired'}, status=410)
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.file.name.rsplit('/', 1)[-1].split('_', 1)[-1],
+                        content_type='application/gzip')
+@login_required
+def superadmin_api_analytics(request):
+    """ADR, RevPAR, ocupación y estadía media agrupados (JSON o ?format=csv)"""
+    if not is_superadmin(request.user):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    if not analytics_available():
+        return JsonResponse({'error': 'analytics_unavailable'}, status=503)
+    from_date, to_date, days = _parse_date_params(request)
+    granularity = request.GET.get('granularity') or 'month'
+    group_by = [dim for dim in (request.GET.get('group_by') or 'hotel,type,period').split(',') if dim]
+    if (from_date is None or from_date > to_date or (to_date - from_date).days >= MAX_ANALYTICS_DAYS
+            or granularity not in GRANULARITIES or not set(group_by) <= set(GROUP_DIMENSIONS)):
+        return JsonResponse({'error': 'invalid_params'}, status=400)
+    hotel, found = _requested_hotel(request)
+    if not found:
+        return JsonResponse({'error': 'hotel_not_found'}, status=404)
+    hotel_id = getattr(hotel, 'id', None)
+    result = revenue_metrics(from_date, to_date, hotel_id, group_by=group_by, granularity=granularity)
+    if request.GET.get('format') == 'csv':
+        import csv
+        resp = HttpResponse(content_type='text/csv')
+        resp['Content-Disposition'] = f'attachment; filename="analitica_{from_date:%Y%m%d}_{to_date:%Y%m%d}.csv"'
+        csv.writer(resp).writerows(metrics_csv_rows(result, group_by))
+        return resp
+    return JsonResponse({
+        'meta': {
+            'version': 1,
+            'hotel_id': hotel_id,
+            'group_by': group_by,
+            'granularity': granularity,
+            'date_range': {'from': from_date.strftime('%Y-%m-%d'), 'to': to_date.strftime('%Y-%m-%d')}
+        },
+        'rows': result['rows'],
+        'totals': result['totals'],
+    })
+MAX_PACE_DAYS = 366
+@login_required
+def superadmin_api_pace(request):
+    """Noches en cartera por fecha de estadía vs. el año anterior y pickup (desde las fotos diarias)"""
+    if not is_superadmin(request.user):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    try:
+        today = timezone.now().date()
+        from_date = timezone.datetime.strptime(request.GET['desde'], '%Y-%m-%d').date() if request.GET.get('desde') else today
+        to_date = timezone.datetime.strptime(request.GET['hasta'], '%Y-%m-%d').date() if request.GET.get('hasta') else from_date + timedelta(days=30)
+        as_of = timezone.datetime.strptime(request.GET['as_of'], '%Y-%m-%d').date() if request.GET.get('as_of') else today
+        pickup_days = int(request.GET.get('pickup_days') or '7')
+    except ValueError:
+        return JsonResponse({'error': 'invalid_params'}, status=400)
+    if from_date > to_date or (to_date - from_date).days >= MAX_PACE_DAYS or not 1 <= pickup_days <= 90:
+        return JsonResponse({'error': 'invalid_params'}, status=400)
+    hotel, found = _requested_hotel(request)
+    if not found:
+        return JsonResponse({'error': 'hotel_not_found'}, status=404)
+    hotel_id = getattr(hotel, 'id', None)
+    result = pace_report(from_date, to_date, as_of=as_of, hotel_id=hotel_id, pickup_days=pickup_days)
+    return JsonResponse({
+        'meta': {
+            'version': 1,
+            'hotel_id': hotel_id,
+            'as_of': as_of.strftime('%Y-%m-%d'),
+            'pickup_days': pickup_days,
+            'date_range': {'from': from_date.strftime('%Y-%m-%d'), 'to': to_date.strftime('%Y-%m-%d')}
+        },
+        'rows': result['rows'],
+        'totals': result['totals'],
+    })
+@login_required
+def superadmin_api_pickup_curve(request):
+    """Curva de pickup de una fecha de estadía (?fecha) y la del año anterior"""
+    if not is_superadmin(request.user):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    try:
+        stay_date = timezone.datetime.strptime(request.GET.get('fecha') or '', '%Y-%m-%d').date()
+        days = int(request.GET.get('days') or '90')
+    except ValueError:
+        return JsonResponse({'error': 'invalid_params'}, status=400)
+    if not 1 <= days <= MAX_PACE_DAYS:
+        return JsonResponse({'error': 'invalid_params'}, status=400)
+    hotel, found = _requested_hotel(request)
+    if not found:
+        return JsonResponse({'error': 'hotel_not_found'}, status=404)
+    hotel_id = getattr(hotel, 'id', None)
+    return JsonResponse({
+        'meta': {'version': 1, 'hotel_id': hotel_id, 'stay_date': stay_date.strftime('%Y-%m-%d'), 'days': days},
+        'points': pickup_curve(stay_date, days=days, hotel_id=hotel_id),
+    })
 def get_hotel_activo(request):
-    hotel_param = request.GET.get('hotel') or request.POST.get('hotel')
-    if hotel_param:
-        try:
-            return Hotel.objects.get(id=int(hotel_param))
-        except Exception:
-            try:
-                return Hotel.objects.get(slug=str(hotel_param))
-            except Hotel.DoesNotExist:
-                pass
+    hotel, _ = _requested_hotel(request)
+    if hotel is not None:
+        return hotel
     try:
         return Hotel.objects.order_by('id').first()
     except Exception:
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Room, RoomImage
+from .models import Room, RoomImage, RoomRate
 
 
 class RoomImageInline(admin.TabularInline):
@@ -128,3 +128,15 @@ class RoomImageAdmin(admin.ModelAdmin):
             )
         return "Sin imagen"
     image_preview.short_description = "Vista Previa"
+
+
+@admin.register(RoomRate)
+class RoomRateAdmin(admin.ModelAdmin):
+    """
+    Admin del calendario de tarifas por fecha
+    """
+    list_display = ['date', 'hotel', 'room_type', 'room', 'price']
+    list_filter = ['hotel', 'room_type', 'date']
+    search_fields = ['room__number']
+    list_editable = ['price']
+    date_hierarchy = 'date'
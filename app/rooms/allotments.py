@@ -0,0 +1,169 @@
+"""
+Cupos por hotel, tipo de habitación y noche (RoomTypeAllotment).
+
+- sold se ajusta dentro de la misma transacción que guarda la reserva, a
+  partir de las noches que sync_booking_nights ocupa o libera.
+- total (habitaciones reservables del tipo) se recalcula cuando cambia una
+  habitación.
+- Las filas se crean a demanda, recontando desde RoomNight, la primera vez
+  que se consulta un rango. Si cambia el tipo de una habitación, o se crea o
+  elimina una, se descartan las filas del hotel para que se regeneren.
+
+Los bloqueos temporales del asistente no cuentan como vendidos.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+from django.db.models import Count, F, Min, Q
+
+from .models import Room, RoomTypeAllotment
+
+
+def bookable_totals(hotel_id) -> Dict[str, int]:
+    """
+    Habitaciones vendibles por tipo (todas las categorías del hotel, aunque sean 0).
+    Ocupada, reservada o en limpieza son estados del día: la habitación sigue
+    contando como inventario; solo se excluyen las inactivas y en mantenimiento.
+    """
+    rows = Room.objects.filter(hotel_id=hotel_id).values('type').annotate(
+        total=Count('id', filter=Q(active=True) & ~Q(status='maintenance'))
+    ).order_by()
+    return {row['type']: row['total'] for row in rows}
+
+
+def ensure_allotments(hotel_id, start, end):
+    """Crea las filas que falten en [start, end) para todos los tipos del hotel"""
+    from app.bookings.models import RoomNight
+
+    totals = bookable_totals(hotel_id)
+    if not totals:
+        return
+    sold = Counter({
+        (row['room__type'], row['date']): row['n']
+        for row in RoomNight.objects.filter(
+            room__hotel_id=hotel_id, booking__isnull=False, date__gte=start, date__lt=end
+        ).values('room__type', 'date').annotate(n=Count('id')).order_by()
+    })
+    RoomTypeAllotment.objects.bulk_create([
+        RoomTypeAllotment(
+            hotel_id=hotel_id, room_type=room_type, date=start + timedelta(days=i),
+            total=total, sold=sold[(room_type, start + timedelta(days=i))],
+        )
+        for room_type, total in totals.items()
+        for i in range((end - start).days)
+    ], ignore_conflicts=True)
+
+
+def apply_sold_delta(released: Iterable = (), added: Iterable = ()):
+    """
+    Ajusta sold con las noches liberadas/ocupadas de reservas.
+
+    Args:
+        released: pares (room_id, fecha) liberados
+        added: pares (room_id, fecha) ocupados
+    """
+    deltas = Counter()
+    for room_id, d in released:
+        deltas[(room_id, d)] -= 1
+    for room_id, d in added:
+        deltas[(room_id, d)] += 1
+    if not any(deltas.values()):
+        return
+
+    room_keys = {
+        room_id: (hotel_id, room_type)
+        for room_id, hotel_id, room_type in Room.objects.filter(
+            id__in={room_id for room_id, _ in deltas}
+        ).values_list('id', 'hotel_id', 'type')
+    }
+    # Un UPDATE por (hotel, tipo, delta) sobre todas las noches afectadas
+    dates_by_change = defaultdict(set)
+    per_night = Counter()
+    for (room_id, d), delta in deltas.items():
+        if room_id in room_keys:
+            per_night[room_keys[room_id] + (d,)] += delta
+    for (hotel_id, room_type, d), delta in per_night.items():
+        if delta:
+            dates_by_change[(hotel_id, room_type, delta)].add(d)
+    for (hotel_id, room_type, delta), dates in dates_by_change.items():
+        RoomTypeAllotment.objects.filter(
+            hotel_id=hotel_id, room_type=room_type, date__in=dates
+        ).update(sold=F('sold') + delta)
+
+
+def refresh_allotment_totals(hotel_id):
+    """Actualiza total en las filas existentes tras un cambio de estado de habitaciones"""
+    for room_type, total in bookable_totals(hotel_id).items():
+        RoomTypeAllotment.objects.filter(hotel_id=hotel_id, room_type=room_type).exclude(total=total).update(total=total)
+
+
+def drop_allotments(hotel_id=None, all_hotels=False):
+    """Descarta las filas de un hotel (o todas) para regenerarlas en la próxima consulta"""
+    qs = RoomTypeAllotment.objects.all()
+    if not all_hotels:
+        qs = qs.filter(hotel_id=hotel_id)
+    return qs.delete()[0]
+
+
+def _ensure_all_hotels(check_in, check_out):
+    """Crea las filas que falten en el rango para cada hotel con habitaciones (y las que no tienen hotel)"""
+    nights = (check_out - check_in).days
+    types = defaultdict(set)
+    for hotel_id, room_type in Room.objects.values_list('hotel_id', 'type').distinct().order_by():
+        types[hotel_id].add(room_type)
+    counts = Counter({
+        (row['hotel_id'], row['room_type']): row['n']
+        for row in RoomTypeAllotment.objects.filter(date__gte=check_in, date__lt=check_out).values(
+            'hotel_id', 'room_type'
+        ).annotate(n=Count('id')).order_by()
+    })
+    for hotel_id, room_types in types.items():
+        if any(counts[(hotel_id, room_type)] < nights for room_type in room_types):
+            ensure_allotments(hotel_id, check_in, check_out)
+    return list(types)
+
+
+def rooms_left_by_type(hotel_id: Optional[int], check_in, check_out) -> Dict[str, dict]:
+    """
+    Habitaciones libres por tipo para todas las noches de [check_in, check_out).
+    Sin hotel se suman, noche por noche, los cupos de todos los hoteles.
+
+    Returns:
+        dict tipo -> {'left': mínimo libre en el rango, 'total': reservables}
+    """
+    nights = (check_out - check_in).days
+    if nights <= 0:
+        return {}
+    if hotel_id is None:
+        return _rooms_left_all_hotels(check_in, check_out)
+
+    def read():
+        return list(RoomTypeAllotment.objects.filter(
+            hotel_id=hotel_id, date__gte=check_in, date__lt=check_out
+        ).values('room_type').annotate(
+            left=Min(F('total') - F('sold')), total=Min('total'), nights=Count('id')
+        ).order_by())
+
+    rows = read()
+    if not rows or any(row['nights'] < nights for row in rows):
+        ensure_allotments(hotel_id, check_in, check_out)
+        rows = read()
+    return {row['room_type']: {'left': max(row['left'], 0), 'total': row['total']} for row in rows}
+
+
+def _rooms_left_all_hotels(check_in, check_out) -> Dict[str, dict]:
+    hotel_ids = _ensure_all_hotels(check_in, check_out)
+    in_hotels = Q(hotel_id__in=[hotel_id for hotel_id in hotel_ids if hotel_id is not None])
+    if None in hotel_ids:
+        in_hotels |= Q(hotel__isnull=True)
+    left, total = defaultdict(Counter), defaultdict(Counter)
+    for room_type, d, night_total, sold in RoomTypeAllotment.objects.filter(
+        in_hotels, date__gte=check_in, date__lt=check_out
+    ).values_list('room_type', 'date', 'total', 'sold'):
+        left[room_type][d] += max(night_total - sold, 0)
+        total[room_type][d] += night_total
+    return {
+        room_type: {'left': min(by_date.values()), 'total': min(total[room_type].values())}
+        for room_type, by_date in left.items()
+    }
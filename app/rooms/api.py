@@ -1,10 +1,14 @@
 from ninja import Router, Schema
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import date
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
 from django.db.models import Q
 from .models import Room
-from app.bookings.models import Booking
+from .availability import search_available_rooms, search_available_rooms_batch, flexible_windows
+from .allotments import rooms_left_by_type
+from app.bookings.occupancy import next_hold_expiry
+from app.core.resource_versions import add_headers, conditional_response
 
 router = Router()
 
@@ -29,8 +33,67 @@ class AvailableRoomsRequest(Schema):
     fecha_fin: date
     personas: int
 
+class AvailabilityQuery(Schema):
+    fecha_inicio: date
+    fecha_fin: date
+    personas: int
+    hotel: Optional[int] = None
+
+class AvailabilityBatchRequest(Schema):
+    consultas: List[AvailabilityQuery]
+
+class AvailabilityBatchResponse(Schema):
+    success: bool
+    message: str
+    resultados: Dict[str, AvailableRoomsResponse]
+
+class FlexibleWindowResult(Schema):
+    room: Optional[RoomSchema] = None
+    type: Optional[str] = None
+    type_label: Optional[str] = None
+    total_price: float
+    fechas_inicio: List[date]
+    precios: List[float]
+
+class FlexibleSearchResponse(Schema):
+    success: bool
+    message: str
+    resultados: List[FlexibleWindowResult]
+
+class RoomTypeLeft(Schema):
+    type: str
+    type_label: str
+    disponibles: int
+    total: int
+
+class RoomsLeftResponse(Schema):
+    success: bool
+    message: str
+    tipos: List[RoomTypeLeft]
+
+MAX_BATCH_QUERIES = 50
+MAX_FLEXIBLE_SPAN_DAYS = 120
+
+ROOM_TYPE_LABELS = dict(Room.TYPE_CHOICES)
+
+# Recursos de los que dependen las consultas de disponibilidad (ETag, junto con el próximo vencimiento de bloqueos)
+AVAILABILITY_RESOURCES = ('rooms', 'bookings')
+
+def serialize_room(room: dict) -> dict:
+    """Convierte una fila de habitación (dict) al formato de RoomSchema"""
+    return {
+        "id": room["id"],
+        "number": room["number"],
+        "type": ROOM_TYPE_LABELS.get(room["type"], room["type"]),
+        "capacity": room["capacity"],
+        "price": float(room["price"]),
+        "description": room["description"],
+        "floor": room["floor"]
+    }
+
 @router.get("/habitaciones-disponibles/", response=AvailableRoomsResponse)
-def get_available_rooms(request, fecha_inicio: date, fecha_fin: date, personas: int):
+def get_available_rooms(request, response: HttpResponse, fecha_inicio: date, fecha_fin: date, personas: int,
+                        hotel: Optional[int] = None):
     """
     Obtiene las habitaciones disponibles entre dos fechas para cierta cantidad de personas.
     
@@ -38,10 +101,17 @@ def get_available_rooms(request, fecha_inicio: date, fecha_fin: date, personas:
         fecha_inicio: Fecha de inicio de la búsqueda
         fecha_fin: Fecha de fin de la búsqueda
         personas: Número de personas para la reserva
+        hotel: ID del hotel (opcional, por defecto todos)
     
     Returns:
-        Lista de habitaciones disponibles con sus detalles
+        Lista de habitaciones disponibles con sus detalles (304 si el If-None-Match sigue vigente)
     """
+    not_modified, headers = conditional_response(
+        request, AVAILABILITY_RESOURCES, hotel, valid_until=next_hold_expiry(hotel, fecha_inicio, fecha_fin)
+    )
+    if not_modified is not None:
+        return not_modified
+    add_headers(response, headers)
     try:
         # Validaciones básicas
         if fecha_inicio >= fecha_fin:
@@ -60,35 +130,11 @@ def get_available_rooms(request, fecha_inicio: date, fecha_fin: date, personas:
                 "total_rooms": 0
             }
         
-        # Obtener habitaciones que cumplan los criterios básicos
-        available_rooms = Room.objects.filter(
-            status='available',  # Solo habitaciones libres
-            active=True,         # Solo habitaciones activas
-            capacity__gte=personas  # Que tengan capacidad suficiente
-        )
-        
-        # Filtrar habitaciones que no tengan reservas superpuestas
-        conflicting_bookings = Booking.objects.filter(
-            status__in=['pending', 'confirmed'],  # Solo reservas activas
-            check_in_date__lt=fecha_fin,
-            check_out_date__gt=fecha_inicio
-        ).values_list('room_id', flat=True)
-        
-        # Excluir habitaciones con reservas conflictivas
-        available_rooms = available_rooms.exclude(id__in=conflicting_bookings)
+        # Habitaciones libres, activas y con capacidad suficiente
+        available_rooms = search_available_rooms(fecha_inicio, fecha_fin, personas, hotel_id=hotel)
         
         # Preparar respuesta
-        rooms_data = []
-        for room in available_rooms:
-            rooms_data.append({
-                "id": room.id,
-                "number": room.number,
-                "type": room.get_type_display(),
-                "capacity": room.capacity,
-                "price": float(room.price),
-                "description": room.description,
-                "floor": room.floor
-            })
+        rooms_data = [serialize_room(room) for room in available_rooms]
         
         return {
             "success": True,
@@ -103,4 +149,151 @@ def get_available_rooms(request, fecha_inicio: date, fecha_fin: date, personas:
             "message": f"Error al obtener habitaciones disponibles: {str(e)}",
             "rooms": [],
             "total_rooms": 0
-        } 
\ No newline at end of file
+        }
+
+
+def availability_query_key(query: AvailabilityQuery) -> str:
+    """Clave de una consulta en la respuesta del lote: inicio_fin_personas_hotel"""
+    return f"{query.fecha_inicio}_{query.fecha_fin}_{query.personas}_{query.hotel if query.hotel is not None else 'all'}"
+
+@router.post("/habitaciones-disponibles/lote/", response=AvailabilityBatchResponse)
+def get_available_rooms_batch(request, payload: AvailabilityBatchRequest):
+    """
+    Variante por lotes de get_available_rooms.
+
+    Recibe varias consultas (fecha_inicio, fecha_fin, personas, hotel) y las
+    resuelve leyendo una sola vez habitaciones y noches ocupadas. Los
+    resultados se devuelven indexados por availability_query_key.
+    """
+    if len(payload.consultas) > MAX_BATCH_QUERIES:
+        return {
+            "success": False,
+            "message": f"Se admiten como máximo {MAX_BATCH_QUERIES} consultas por lote",
+            "resultados": {}
+        }
+
+    try:
+        resultados = {}
+        valid = []
+        for query in payload.consultas:
+            key = availability_query_key(query)
+            if query.fecha_inicio >= query.fecha_fin:
+                message = "La fecha de inicio debe ser anterior a la fecha de fin"
+            elif query.personas <= 0:
+                message = "El número de personas debe ser mayor a 0"
+            else:
+                valid.append((key, query))
+                continue
+            resultados[key] = {"success": False, "message": message, "rooms": [], "total_rooms": 0}
+
+        found = search_available_rooms_batch([
+            (query.fecha_inicio, query.fecha_fin, query.personas, query.hotel) for _, query in valid
+        ])
+        for (key, _), rooms in zip(valid, found):
+            rooms_data = [serialize_room(room) for room in rooms]
+            resultados[key] = {
+                "success": True,
+                "message": f"Se encontraron {len(rooms_data)} habitaciones disponibles",
+                "rooms": rooms_data,
+                "total_rooms": len(rooms_data)
+            }
+
+        return {
+            "success": True,
+            "message": f"Se resolvieron {len(resultados)} consultas",
+            "resultados": resultados
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Error al obtener habitaciones disponibles: {str(e)}",
+            "resultados": {}
+        }
+
+@router.get("/habitaciones-disponibles/flexible/", response=FlexibleSearchResponse)
+def get_flexible_availability(request, desde: date, hasta: date, noches: int, personas: int = 1,
+                              hotel: Optional[int] = None, agrupar: str = 'room', orden: str = 'fecha'):
+    """
+    Búsqueda con fechas flexibles: "N noches en cualquier momento entre desde y hasta".
+
+    Args:
+        desde: primera fecha de llegada posible
+        hasta: última fecha de salida posible
+        noches: cantidad de noches consecutivas
+        personas: número de personas
+        hotel: ID del hotel (opcional)
+        agrupar: 'room' (por habitación) o 'type' (por tipo)
+        orden: 'fecha' o 'precio' (precio total ascendente)
+
+    Returns:
+        Por habitación o tipo, todas las fechas de llegada posibles
+    """
+    def error(message):
+        return {"success": False, "message": message, "resultados": []}
+
+    if noches <= 0 or personas <= 0:
+        return error("Las noches y el número de personas deben ser mayores a 0")
+    if (hasta - desde).days < noches:
+        return error("El rango de fechas es menor a la cantidad de noches")
+    if (hasta - desde).days > MAX_FLEXIBLE_SPAN_DAYS:
+        return error(f"El rango de fechas no puede superar {MAX_FLEXIBLE_SPAN_DAYS} días")
+    if agrupar not in ('room', 'type'):
+        return error("agrupar debe ser 'room' o 'type'")
+
+    try:
+        windows = flexible_windows(desde, hasta, noches, personas, hotel_id=hotel,
+                                   group_by=agrupar, order_by_price=(orden == 'precio'))
+        resultados = []
+        for item in windows:
+            result = {
+                "total_price": float(item['total_price']),
+                "fechas_inicio": item['check_in_dates'],
+                "precios": [float(price) for price in item['prices']]
+            }
+            if agrupar == 'type':
+                result.update(type=item['type'], type_label=ROOM_TYPE_LABELS.get(item['type'], item['type']))
+            else:
+                result['room'] = serialize_room(item['room'])
+            resultados.append(result)
+
+        return {
+            "success": True,
+            "message": f"Se encontraron {len(resultados)} opciones",
+            "resultados": resultados
+        }
+
+    except Exception as e:
+        return error(f"Error en la búsqueda flexible: {str(e)}")
+
+@router.get("/habitaciones-disponibles/por-tipo/", response=RoomsLeftResponse)
+def get_rooms_left_by_type(request, response: HttpResponse, fecha_inicio: date, fecha_fin: date,
+                           hotel: Optional[int] = None):
+    """
+    Cantidad de habitaciones libres por tipo ("quedan 3 suites") para todas las noches del rango.
+    Se responde desde los cupos por tipo y noche (RoomTypeAllotment), con ETag; sin hotel, todos los hoteles.
+    """
+    not_modified, headers = conditional_response(
+        request, AVAILABILITY_RESOURCES, hotel, valid_until=next_hold_expiry(hotel, fecha_inicio, fecha_fin)
+    )
+    if not_modified is not None:
+        return not_modified
+    add_headers(response, headers)
+    if fecha_inicio >= fecha_fin:
+        return {"success": False, "message": "La fecha de inicio debe ser anterior a la fecha de fin", "tipos": []}
+
+    try:
+        left = rooms_left_by_type(hotel, fecha_inicio, fecha_fin)
+        tipos = [
+            {
+                "type": room_type,
+                "type_label": ROOM_TYPE_LABELS.get(room_type, room_type),
+                "disponibles": counts['left'],
+                "total": counts['total']
+            }
+            for room_type, counts in left.items()
+        ]
+        return {"success": True, "message": f"Disponibilidad de {len(tipos)} tipos de habitación", "tipos": tipos}
+
+    except Exception as e:
+        return {"success": False, "message": f"Error al obtener cupos por tipo: {str(e)}", "tipos": []}
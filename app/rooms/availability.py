@@ -0,0 +1,239 @@
+"""
+Servicio de búsqueda de disponibilidad compartido por la API y el portal.
+
+Usa el motor en memoria (availability_engine) cuando está habilitado y cubre
+el rango pedido; en caso contrario consulta el índice RoomNight, con los
+resultados cacheados por hotel, fechas y personas (availability_cache).
+"""
+from bisect import bisect_left
+from datetime import timedelta
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.utils import timezone
+
+from .availability_cache import cached_search
+from .availability_engine import engine, ROOM_FIELDS
+from .models import Room
+from .pricing import RateCalendar
+from app.bookings.models import Booking, InventoryHold, ACTIVE_STATUSES
+from app.bookings.occupancy import active_nights, booked_room_ids
+
+
+def search_available_rooms(check_in, check_out, guests: int = 1, hotel_id: Optional[int] = None) -> List[dict]:
+    """
+    Habitaciones libres para todas las noches de [check_in, check_out).
+
+    Args:
+        check_in: fecha de llegada
+        check_out: fecha de salida
+        guests: cantidad mínima de huéspedes que debe admitir la habitación
+        hotel_id: limitar la búsqueda a un hotel (None = todos)
+
+    Returns:
+        Lista de diccionarios con los campos de ROOM_FIELDS, ordenada por número
+    """
+    if engine.enabled:
+        hotel_ids = [hotel_id] if hotel_id is not None else engine.hotel_ids()
+        rooms = engine.search(check_in, check_out, guests, hotel_ids)
+        if rooms is not None:
+            return rooms
+
+    def compute():
+        qs = Room.objects.filter(status='available', active=True, capacity__gte=guests)
+        if hotel_id is not None:
+            qs = qs.filter(hotel_id=hotel_id)
+        qs = qs.exclude(id__in=booked_room_ids(check_in, check_out))
+        return list(qs.values(*ROOM_FIELDS))
+
+    return cached_search(check_in, check_out, guests, hotel_id, compute)
+
+
+def search_available_rooms_batch(queries: Sequence[Tuple]) -> List[List[dict]]:
+    """
+    Resuelve varias búsquedas de disponibilidad con dos consultas en total.
+
+    Carga una sola vez las habitaciones candidatas y las noches ocupadas del
+    rango que cubre todas las búsquedas, y responde cada una en memoria.
+
+    Args:
+        queries: secuencia de tuplas (check_in, check_out, guests, hotel_id)
+
+    Returns:
+        Lista de resultados en el mismo orden que queries (mismo formato que
+        search_available_rooms)
+    """
+    if not queries:
+        return []
+
+    if engine.enabled:
+        results = []
+        for check_in, check_out, guests, hotel_id in queries:
+            hotel_ids = [hotel_id] if hotel_id is not None else engine.hotel_ids()
+            rooms = engine.search(check_in, check_out, guests, hotel_ids)
+            if rooms is None:
+                break
+            results.append(rooms)
+        else:
+            return results
+
+    rooms_qs = Room.objects.filter(
+        status='available', active=True, capacity__gte=min(q[2] for q in queries)
+    )
+    hotel_ids = {q[3] for q in queries}
+    if None not in hotel_ids:
+        rooms_qs = rooms_qs.filter(hotel_id__in=hotel_ids)
+    rooms = list(rooms_qs.values(*ROOM_FIELDS))
+
+    # Noches ocupadas por habitación, ordenadas para búsqueda binaria
+    busy: Dict[int, List] = defaultdict(list)
+    nights = active_nights().filter(
+        room_id__in=rooms_qs.values('id'),
+        date__gte=min(q[0] for q in queries),
+        date__lt=max(q[1] for q in queries),
+    ).order_by('room_id', 'date').values_list('room_id', 'date')
+    for room_id, night in nights:
+        busy[room_id].append(night)
+
+    def is_free(room_id, check_in, check_out):
+        dates = busy.get(room_id)
+        if not dates:
+            return True
+        i = bisect_left(dates, check_in)
+        return i == len(dates) or dates[i] >= check_out
+
+    return [
+        [
+            room for room in rooms
+            if room['capacity'] >= guests
+            and (hotel_id is None or room['hotel_id'] == hotel_id)
+            and is_free(room['id'], check_in, check_out)
+        ]
+        for check_in, check_out, guests, hotel_id in queries
+    ]
+
+
+def _append_run(runs, start, length, state):
+    """Agrega un tramo [inicio, largo, estado] fusionándolo con el anterior si es contiguo"""
+    if length <= 0:
+        return
+    if runs and runs[-1][2] == state and runs[-1][0] + runs[-1][1] == start:
+        runs[-1][1] += length
+    else:
+        runs.append([start, length, state])
+
+
+def availability_grid(hotel_id, start, days: int) -> List[dict]:
+    """
+    Grilla de ocupación habitaciones × días codificada por tramos.
+
+    Cada habitación incluye runs: lista de [día inicial, cantidad de días, estado]
+    con estado 'available', 'pending' o 'confirmed'. Los días se cuentan desde
+    start. Se resuelve con una consulta de habitaciones y una de reservas
+    ordenadas por habitación.
+    """
+    end = start + timedelta(days=days)
+    rooms = list(
+        Room.objects.filter(hotel_id=hotel_id, active=True)
+        .values('id', 'number', 'type', 'capacity', 'price', 'status')
+    )
+    bookings = (
+        Booking.objects.filter(
+            room__hotel_id=hotel_id, status__in=ACTIVE_STATUSES,
+            check_in_date__lt=end, check_out_date__gt=start,
+        )
+        .order_by('room_id', 'check_in_date')
+        .values_list('room_id', 'check_in_date', 'check_out_date', 'status')
+    )
+
+    runs_by_room: Dict[int, list] = {}
+    cursor_by_room: Dict[int, int] = {}
+    for room_id, check_in, check_out, status in bookings:
+        runs = runs_by_room.setdefault(room_id, [])
+        cursor = cursor_by_room.get(room_id, 0)
+        first = max((check_in - start).days, cursor)
+        last = min((check_out - start).days, days)
+        _append_run(runs, cursor, first - cursor, 'available')
+        _append_run(runs, first, last - first, status)
+        cursor_by_room[room_id] = max(cursor, last)
+
+    for room in rooms:
+        runs = runs_by_room.get(room['id'], [])
+        cursor = cursor_by_room.get(room['id'], 0)
+        _append_run(runs, cursor, days - cursor, 'available')
+        room['price'] = float(room['price'])
+        room['runs'] = runs
+    return rooms
+
+
+def flexible_windows(span_start, span_end, nights: int, guests: int = 1, hotel_id: Optional[int] = None,
+                     group_by: str = 'room', order_by_price: bool = False) -> List[dict]:
+    """
+    Fechas de llegada con N noches consecutivas libres dentro de [span_start, span_end].
+
+    Recorre una sola vez las reservas activas (y bloqueos vigentes) ordenadas por habitación y fecha:
+    cada hueco libre [desde, hasta) entre reservas admite como llegada los días
+    desde .. hasta - N (ventana deslizante de N noches).
+
+    Args:
+        span_start: primera fecha de llegada posible
+        span_end: última fecha de salida posible
+        nights: noches consecutivas buscadas
+        guests: capacidad mínima de la habitación
+        hotel_id: limitar a un hotel (None = todos)
+        group_by: 'room' (una entrada por habitación) o 'type' (por tipo de habitación)
+        order_by_price: ordenar por precio total ascendente (el de la ventana más barata)
+
+    Returns:
+        Lista de dicts con 'room' o 'type', 'check_in_dates', 'prices' (total de
+        cada ventana) y 'total_price' (el menor)
+    """
+    rooms_qs = Room.objects.filter(status='available', active=True, capacity__gte=guests)
+    if hotel_id is not None:
+        rooms_qs = rooms_qs.filter(hotel_id=hotel_id)
+    rooms = list(rooms_qs.values(*ROOM_FIELDS))
+
+    span = dict(room_id__in=rooms_qs.values('id'), check_in_date__lt=span_end, check_out_date__gt=span_start)
+    fields = ('room_id', 'check_in_date', 'check_out_date')
+    bookings = Booking.objects.filter(status__in=ACTIVE_STATUSES, **span).order_by().values_list(*fields).union(
+        InventoryHold.objects.filter(expires_at__gt=timezone.now(), **span).order_by().values_list(*fields), all=True
+    ).order_by('room_id', 'check_in_date')
+
+    def window_starts(gap_start, gap_end):
+        return [gap_start + timedelta(days=i) for i in range((gap_end - gap_start).days - nights + 1)]
+
+    starts: Dict[int, list] = defaultdict(list)
+    free_from: Dict[int, object] = {}
+    for room_id, check_in, check_out in bookings:
+        gap_start = free_from.get(room_id, span_start)
+        starts[room_id].extend(window_starts(gap_start, min(check_in, span_end)))
+        free_from[room_id] = max(gap_start, check_out)
+
+    # Precio de cada ventana con las sumas prefijas del calendario de tarifas
+    calendar = RateCalendar(rooms, span_start, span_end)
+    stay = timedelta(days=nights)
+
+    results = []
+    for room in rooms:
+        room_starts = starts.get(room['id'], [])
+        room_starts.extend(window_starts(free_from.get(room['id'], span_start), span_end))
+        if room_starts:
+            prices = [calendar.total(room, d, d + stay) for d in room_starts]
+            results.append({'room': room, 'total_price': min(prices), 'check_in_dates': room_starts, 'prices': prices})
+
+    if group_by == 'type':
+        by_type: Dict[str, dict] = {}
+        for item in results:
+            best = by_type.setdefault(item['room']['type'], {})
+            for d, price in zip(item['check_in_dates'], item['prices']):
+                if d not in best or price < best[d]:
+                    best[d] = price
+        results = []
+        for room_type, best in by_type.items():
+            dates = sorted(best)
+            prices = [best[d] for d in dates]
+            results.append({'type': room_type, 'total_price': min(prices), 'check_in_dates': dates, 'prices': prices})
+
+    if order_by_price:
+        results.sort(key=lambda item: item['total_price'])
+    return results
@@ -0,0 +1,113 @@
+"""
+Caché de resultados de búsqueda de disponibilidad.
+
+Las entradas se guardan por (hotel, check_in, check_out, personas) junto con
+las versiones vigentes al calcularlas:
+
+- una versión por hotel, renovada cuando cambia una habitación (estado,
+  activa, capacidad, alta o baja);
+- una versión por hotel y noche, renovada por bookings_changed para cada
+  noche del rango afectado (reservas creadas, modificadas o canceladas y
+  bloqueos temporales).
+
+La entrada y sus versiones se leen juntas con un único get_many; si alguna
+versión cambió la entrada se descarta. Las búsquedas sin hotel usan las
+versiones "all", que se renuevan ante cualquier cambio.
+
+Los bloqueos temporales vencen sin que nada se guarde, así que cada entrada
+vale solo hasta el próximo vencimiento de un bloqueo de sus noches.
+
+Las versiones solo se comparten entre procesos si CACHES usa un backend
+compartido (REDIS_URL); por eso AVAILABILITY_CACHE_TTL es 0 por defecto sin él.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from app.bookings.occupancy import next_hold_expiry
+
+ALL_HOTELS = 'all'
+
+
+def _scope(hotel_id):
+    return ALL_HOTELS if hotel_id is None else hotel_id
+
+
+def _hotel_version_key(scope):
+    return f"availability:v:{scope}"
+
+
+def _night_version_key(scope, night):
+    return f"availability:v:{scope}:{night.isoformat()}"
+
+
+def _entry_key(scope, check_in, check_out, guests):
+    return f"availability:search:{scope}:{check_in.isoformat()}:{check_out.isoformat()}:{guests}"
+
+
+def _version_keys(scope, check_in, check_out):
+    nights = (check_out - check_in).days
+    return [_hotel_version_key(scope)] + [
+        _night_version_key(scope, check_in + timedelta(days=i)) for i in range(nights)
+    ]
+
+
+def cache_timeout():
+    """Duración de las entradas (AVAILABILITY_CACHE_TTL, 0 = caché deshabilitada)"""
+    return getattr(settings, 'AVAILABILITY_CACHE_TTL', 0)
+
+
+def cached_search(check_in, check_out, guests, hotel_id, compute):
+    """
+    Devuelve el resultado cacheado de la búsqueda o lo calcula con compute().
+
+    Las versiones se leen antes de calcular: si una reserva cambia mientras
+    tanto, la entrada guardada ya nace desactualizada y se recalcula en la
+    próxima lectura.
+    """
+    timeout = cache_timeout()
+    if not timeout:
+        return compute()
+
+    scope = _scope(hotel_id)
+    entry_key = _entry_key(scope, check_in, check_out, guests)
+    version_keys = _version_keys(scope, check_in, check_out)
+    values = cache.get_many([entry_key] + version_keys)
+
+    # Versiones desalojadas o nunca creadas: inicializarlas invalida cualquier entrada previa
+    missing = [key for key in version_keys if key not in values]
+    if missing:
+        token = time.time_ns()
+        cache.set_many({key: token for key in missing}, None)
+        values.update({key: token for key in missing})
+
+    versions = [values[key] for key in version_keys]
+    entry = values.get(entry_key)
+    if entry is not None and entry['versions'] == versions and (
+        entry['valid_until'] is None or timezone.now() < entry['valid_until']
+    ):
+        return entry['rooms']
+
+    rooms = compute()
+    valid_until = next_hold_expiry(hotel_id, check_in, check_out)
+    cache.set(entry_key, {'versions': versions, 'rooms': rooms, 'valid_until': valid_until}, timeout)
+    return rooms
+
+
+def invalidate_nights(hotel_id, start, end):
+    """Renueva las versiones de las noches [start, end) del hotel (y de las búsquedas sin hotel)"""
+    token = time.time_ns()
+    keys = {}
+    for scope in {_scope(hotel_id), ALL_HOTELS}:
+        for key in _version_keys(scope, start, end)[1:]:
+            keys[key] = token
+    cache.set_many(keys, None)
+
+
+def invalidate_hotel(hotel_id):
+    """Renueva la versión del hotel: descarta todas sus búsquedas cacheadas"""
+    token = time.time_ns()
+    cache.set_many({_hotel_version_key(scope): token for scope in {_scope(hotel_id), ALL_HOTELS}}, None)
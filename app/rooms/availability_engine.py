@@ -0,0 +1,150 @@
+"""
+Motor de disponibilidad en memoria (opcional).
+
+Mantiene por hotel una matriz booleana habitaciones × días (True = noche
+ocupada) cargada de forma perezosa desde el índice RoomNight y actualizada
+incrementalmente con la señal bookings_changed. Una búsqueda "habitaciones
+libres todas las noches de [check_in, check_out)" se resuelve con una única
+operación vectorizada sobre una porción de la matriz.
+
+Se activa con AVAILABILITY_ENGINE_ENABLED=True y requiere numpy. Cada proceso
+mantiene su propia copia: los cambios hechos por otros procesos se reflejan
+al vencer AVAILABILITY_ENGINE_TTL (segundos), momento en que la matriz se
+recarga completa.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se usa la consulta SQL
+    np = None
+
+from .models import Room
+
+ROOM_FIELDS = ('id', 'hotel_id', 'number', 'type', 'capacity', 'price', 'description', 'floor', 'status', 'active')
+
+
+class HotelAvailabilityMap:
+    """Matriz habitaciones × días de un hotel a partir de una fecha de origen"""
+
+    def __init__(self, hotel_id, origin, days):
+        self.hotel_id = hotel_id
+        self.origin = origin
+        self.days = days
+        self.loaded_at = time.monotonic()
+        self.rooms = list(Room.objects.filter(hotel_id=hotel_id).values(*ROOM_FIELDS))
+        self.index = {room['id']: i for i, room in enumerate(self.rooms)}
+        self.capacity = np.array([room['capacity'] for room in self.rooms], dtype=np.int32)
+        self.bookable = np.array([room['status'] == 'available' and room['active'] for room in self.rooms], dtype=bool)
+        self.busy = np.zeros((len(self.rooms), days), dtype=bool)
+        self._load_nights(list(self.index))
+
+    def _load_nights(self, room_ids):
+        from app.bookings.occupancy import active_nights
+
+        if not room_ids:
+            return
+        rows = active_nights().filter(
+            room_id__in=room_ids,
+            date__gte=self.origin,
+            date__lt=self.origin + timedelta(days=self.days),
+        ).values_list('room_id', 'date')
+        pairs = [(self.index[room_id], (d - self.origin).days) for room_id, d in rows]
+        if pairs:
+            rows_idx, days_idx = zip(*pairs)
+            self.busy[list(rows_idx), list(days_idx)] = True
+
+    def refresh_rooms(self, room_ids):
+        """Recarga las filas de las habitaciones indicadas desde RoomNight"""
+        known = [room_id for room_id in room_ids if room_id in self.index]
+        if known:
+            self.busy[[self.index[room_id] for room_id in known], :] = False
+            self._load_nights(known)
+
+    def covers(self, check_in, check_out):
+        """Indica si el rango cae dentro del horizonte cargado"""
+        return check_in >= self.origin and (check_out - self.origin).days <= self.days
+
+    def search(self, check_in, check_out, guests):
+        """Habitaciones reservables, con capacidad suficiente y libres todas las noches del rango"""
+        start = (check_in - self.origin).days
+        end = (check_out - self.origin).days
+        free = ~self.busy[:, start:end].any(axis=1)
+        mask = free & self.bookable & (self.capacity >= guests)
+        return [self.rooms[i] for i in np.flatnonzero(mask)]
+
+
+class AvailabilityEngine:
+    """Registro de matrices por hotel del proceso actual"""
+
+    def __init__(self):
+        self._maps = {}
+        self._hotel_ids = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return np is not None and getattr(settings, 'AVAILABILITY_ENGINE_ENABLED', False)
+
+    def _is_fresh(self, hotel_map, today):
+        ttl = getattr(settings, 'AVAILABILITY_ENGINE_TTL', 60)
+        return hotel_map.origin == today and (time.monotonic() - hotel_map.loaded_at) < ttl
+
+    def get_map(self, hotel_id):
+        """Obtiene (cargando si hace falta) la matriz del hotel"""
+        today = timezone.now().date()
+        with self._lock:
+            hotel_map = self._maps.get(hotel_id)
+            if hotel_map is None or not self._is_fresh(hotel_map, today):
+                days = getattr(settings, 'AVAILABILITY_ENGINE_HORIZON_DAYS', 400)
+                hotel_map = HotelAvailabilityMap(hotel_id, today, days)
+                self._maps[hotel_id] = hotel_map
+            return hotel_map
+
+    def hotel_ids(self):
+        """Hoteles con habitaciones (incluye None para habitaciones sin hotel)"""
+        with self._lock:
+            if self._hotel_ids is None:
+                self._hotel_ids = sorted(set(Room.objects.values_list('hotel_id', flat=True)), key=lambda h: (h is None, h))
+            return list(self._hotel_ids)
+
+    def search(self, check_in, check_out, guests, hotel_ids):
+        """
+        Busca habitaciones libres en los hoteles indicados.
+
+        Returns:
+            list[dict] | None: None si el rango queda fuera del horizonte cargado
+        """
+        results = []
+        for hotel_id in hotel_ids:
+            hotel_map = self.get_map(hotel_id)
+            if not hotel_map.covers(check_in, check_out):
+                return None
+            results.extend(hotel_map.search(check_in, check_out, guests))
+        if len(hotel_ids) > 1:
+            results.sort(key=lambda room: room['number'])
+        return results
+
+    def refresh_rooms(self, hotel_id, room_ids):
+        """Actualización incremental tras un cambio de reservas"""
+        with self._lock:
+            hotel_map = self._maps.get(hotel_id)
+            if hotel_map is not None:
+                hotel_map.refresh_rooms(room_ids)
+
+    def invalidate(self, hotel_id=None, all_hotels=False):
+        """Descarta la matriz de un hotel (o todas) para recargarla en la próxima búsqueda"""
+        with self._lock:
+            if all_hotels:
+                self._maps.clear()
+            else:
+                self._maps.pop(hotel_id, None)
+            self._hotel_ids = None
+
+
+engine = AvailabilityEngine()
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('rooms', '0003_room_hotel_alter_room_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(choices=[('individual', 'Individual'), ('double', 'Doble'), ('triple', 'Triple'), ('suite', 'Suite'), ('family', 'Familiar')], help_text='Tipo de habitación', max_length=20)),
+                ('date', models.DateField(help_text='Noche a la que aplica la tarifa')),
+                ('price', models.DecimalField(decimal_places=2, help_text='Precio por noche', max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hotel', models.ForeignKey(blank=True, help_text='Hotel de la tarifa', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='room_rates', to='administration.hotel')),
+                ('room', models.ForeignKey(blank=True, help_text='Habitación específica (opcional, tiene prioridad)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rates', to='rooms.room')),
+            ],
+            options={
+                'verbose_name': 'Tarifa por fecha',
+                'verbose_name_plural': 'Tarifas por fecha',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['hotel', 'room_type', 'date'], name='rooms_roomr_hotel_i_d921a6_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('room__isnull', True)), fields=('hotel', 'room_type', 'date'), name='uniq_roomrate_type_date'), models.UniqueConstraint(condition=models.Q(('room__isnull', False)), fields=('room', 'date'), name='uniq_roomrate_room_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('rooms', '0004_roomrate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomTypeAllotment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(choices=[('individual', 'Individual'), ('double', 'Doble'), ('triple', 'Triple'), ('suite', 'Suite'), ('family', 'Familiar')], help_text='Tipo de habitación', max_length=20)),
+                ('date', models.DateField(help_text='Noche')),
+                ('total', models.PositiveIntegerField(default=0, help_text='Habitaciones reservables del tipo')),
+                ('sold', models.IntegerField(default=0, help_text='Noches vendidas (reservas activas)')),
+                ('hotel', models.ForeignKey(blank=True, help_text='Hotel del cupo', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='allotments', to='administration.hotel')),
+            ],
+            options={
+                'verbose_name': 'Cupo por tipo',
+                'verbose_name_plural': 'Cupos por tipo',
+                'ordering': ['date', 'room_type'],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'date', 'room_type'), name='uniq_allotment_hotel_date_type')],
+            },
+        ),
+    ]
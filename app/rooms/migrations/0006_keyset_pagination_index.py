@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('rooms', '0005_roomtypeallotment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['number', 'id'], name='rooms_room_number_f0db53_idx'),
+        ),
+    ]
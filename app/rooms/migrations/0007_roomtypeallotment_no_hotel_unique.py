@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+def drop_allotments_without_hotel(apps, schema_editor):
+    """Los cupos sin hotel pueden estar duplicados; se regeneran en la próxima consulta"""
+    apps.get_model('rooms', 'RoomTypeAllotment').objects.filter(hotel__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_hotel_is_blocked'),
+        ('rooms', '0006_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_allotments_without_hotel, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='roomtypeallotment',
+            constraint=models.UniqueConstraint(condition=models.Q(('hotel__isnull', True)), fields=('date', 'room_type'), name='uniq_allotment_date_type_no_hotel'),
+        ),
+    ]
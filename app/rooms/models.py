@@ -43,6 +43,10 @@ class Room(models.Model):
         verbose_name = "Habitación"
         verbose_name_plural = "Habitaciones"
         ordering = ['number']
+        indexes = [
+            # Clave de la paginación por cursor de la API
+            models.Index(fields=['number', 'id']),
+        ]
         constraints = [
             models.UniqueConstraint(fields=['hotel', 'number'], name='uniq_room_hotel_number')
         ]
@@ -109,3 +113,66 @@ class RoomImage(models.Model):
         # Si esta imagen se marca como principal, desmarcar las demás
         if self.is_main:
             RoomImage.objects.filter(room=self.room, is_main=True).update(is_main=False)
+
+
+class RoomRate(models.Model):
+    """
+    Calendario de tarifas: precio por noche para un tipo de habitación de un hotel
+    en una fecha. Si se indica room, la tarifa aplica solo a esa habitación y tiene
+    prioridad sobre la del tipo. Sin tarifa cargada se usa Room.price.
+    """
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, null=True, blank=True, related_name='room_rates', help_text="Hotel de la tarifa")
+    room_type = models.CharField(max_length=20, choices=Room.TYPE_CHOICES, help_text="Tipo de habitación")
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, null=True, blank=True, related_name='rates', help_text="Habitación específica (opcional, tiene prioridad)")
+    date = models.DateField(help_text="Noche a la que aplica la tarifa")
+    price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Precio por noche")
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Tarifa por fecha"
+        verbose_name_plural = "Tarifas por fecha"
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['hotel', 'room_type', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'room_type', 'date'], condition=models.Q(room__isnull=True), name='uniq_roomrate_type_date'),
+            models.UniqueConstraint(fields=['room', 'date'], condition=models.Q(room__isnull=False), name='uniq_roomrate_room_date'),
+        ]
+    
+    def __str__(self):
+        target = f"Habitación {self.room.number}" if self.room_id else self.get_room_type_display()
+        return f"{target} - {self.date}: {self.price}"
+
+
+class RoomTypeAllotment(models.Model):
+    """
+    Cupo por hotel, tipo de habitación y noche: total de habitaciones reservables
+    y noches vendidas. Se mantiene desde las reservas (ver app.rooms.allotments)
+    para responder "quedan N habitaciones de tipo X" con una lectura indexada.
+    """
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, null=True, blank=True, related_name='allotments', help_text="Hotel del cupo")
+    room_type = models.CharField(max_length=20, choices=Room.TYPE_CHOICES, help_text="Tipo de habitación")
+    date = models.DateField(help_text="Noche")
+    total = models.PositiveIntegerField(default=0, help_text="Habitaciones reservables del tipo")
+    sold = models.IntegerField(default=0, help_text="Noches vendidas (reservas activas)")
+    
+    class Meta:
+        verbose_name = "Cupo por tipo"
+        verbose_name_plural = "Cupos por tipo"
+        ordering = ['date', 'room_type']
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'date', 'room_type'], name='uniq_allotment_hotel_date_type'),
+            models.UniqueConstraint(fields=['date', 'room_type'], condition=models.Q(hotel__isnull=True), name='uniq_allotment_date_type_no_hotel'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_room_type_display()} - {self.date}: {self.sold}/{self.total}"
+    
+    @property
+    def left(self):
+        """Habitaciones que quedan libres esa noche"""
+        return max(self.total - self.sold, 0)
@@ -0,0 +1,104 @@
+"""
+Servicio de precios por fecha a partir del calendario de tarifas (RoomRate).
+
+Para un rango de fechas se leen todas las tarifas necesarias en una sola
+consulta y se arma, por cada fila de tarifas (tipo de habitación de un hotel
+o habitación con tarifa propia), un vector de sumas prefijas. El total de una
+estadía es la resta de dos posiciones del prefijo (suma de la porción
+contigua de noches), sin recorrer noche por noche para cada habitación.
+
+Las noches sin tarifa cargada se cobran a Room.price: el prefijo lleva
+aparte la cantidad de noches sin tarifa para sumarlas al precio base de cada
+habitación.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable
+
+from django.db.models import Q
+
+from .models import RoomRate
+
+
+def _field(room, name):
+    """Permite recibir instancias de Room o dicts (resultados de búsqueda)"""
+    return room[name] if isinstance(room, dict) else getattr(room, name)
+
+
+class RateCalendar:
+    """Tarifas de un conjunto de habitaciones en [start, end) con sumas prefijas"""
+
+    def __init__(self, rooms: Iterable, start, end):
+        self.start = start
+        self.days = max((end - start).days, 0)
+        self.rooms = {_field(room, 'id'): room for room in rooms}
+        self._type_rows = {}
+        self._room_rows = {}
+        self._load()
+
+    def _prefix(self, rates):
+        """Sumas prefijas de (tarifas cargadas, noches sin tarifa) para un vector de noches"""
+        amounts = [Decimal('0')] * (self.days + 1)
+        missing = [0] * (self.days + 1)
+        for i, rate in enumerate(rates):
+            amounts[i + 1] = amounts[i] + (rate if rate is not None else 0)
+            missing[i + 1] = missing[i] + (rate is None)
+        return amounts, missing
+
+    def _load(self):
+        if not self.rooms or not self.days:
+            return
+        keys = {(_field(room, 'hotel_id'), _field(room, 'type')) for room in self.rooms.values()}
+        key_filter = Q()
+        for hotel_id, room_type in keys:
+            key_filter |= Q(hotel_id=hotel_id, room_type=room_type, room__isnull=True)
+        rates = RoomRate.objects.filter(
+            key_filter | Q(room_id__in=list(self.rooms)),
+            date__gte=self.start, date__lt=self.start + timedelta(days=self.days),
+        ).values_list('hotel_id', 'room_type', 'room_id', 'date', 'price')
+
+        type_rates = {}
+        room_rates = {}
+        for hotel_id, room_type, room_id, d, price in rates:
+            target = room_rates.setdefault(room_id, {}) if room_id else type_rates.setdefault((hotel_id, room_type), {})
+            target[(d - self.start).days] = price
+
+        for key, by_day in type_rates.items():
+            self._type_rows[key] = self._prefix([by_day.get(i) for i in range(self.days)])
+        for room_id, by_day in room_rates.items():
+            room = self.rooms[room_id]
+            base = type_rates.get((_field(room, 'hotel_id'), _field(room, 'type')), {})
+            self._room_rows[room_id] = self._prefix([by_day.get(i, base.get(i)) for i in range(self.days)])
+
+    def _row(self, room):
+        room_id = _field(room, 'id')
+        if room_id in self._room_rows:
+            return self._room_rows[room_id]
+        return self._type_rows.get((_field(room, 'hotel_id'), _field(room, 'type')))
+
+    def total(self, room, check_in, check_out) -> Decimal:
+        """Precio total de la estadía [check_in, check_out) de la habitación"""
+        first = (check_in - self.start).days
+        last = (check_out - self.start).days
+        if first < 0 or last > self.days:
+            raise ValueError('La estadía está fuera del rango del calendario')
+        price = _field(room, 'price')
+        row = self._row(room)
+        if row is None:
+            return price * (last - first)
+        amounts, missing = row
+        return amounts[last] - amounts[first] + price * (missing[last] - missing[first])
+
+
+def price_rooms(rooms: Iterable, check_in, check_out) -> Dict[int, Decimal]:
+    """Precio total de la misma estadía para varias habitaciones (una consulta)"""
+    rooms = list(rooms)
+    calendar = RateCalendar(rooms, check_in, check_out)
+    return {_field(room, 'id'): calendar.total(room, check_in, check_out) for room in rooms}
+
+
+def price_stay(room, check_in, check_out) -> Decimal:
+    """Precio total de una estadía en una habitación"""
+    if not (check_in and check_out) or check_out <= check_in:
+        return Decimal('0')
+    return price_rooms([room], check_in, check_out)[_field(room, 'id')]
@@ -0,0 +1,53 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Room
+from .availability_engine import engine
+from .availability_cache import invalidate_hotel, invalidate_nights
+from .allotments import drop_allotments, refresh_allotment_totals
+from app.bookings.signals import bookings_changed
+
+
+@receiver(bookings_changed)
+def refresh_availability_engine(sender, hotel_id, room_ids, **kwargs):
+    """Actualiza incrementalmente las filas del motor de disponibilidad"""
+    engine.refresh_rooms(hotel_id, room_ids)
+
+
+@receiver(bookings_changed)
+def invalidate_availability_cache(sender, hotel_id, start, end, **kwargs):
+    """Descarta las búsquedas cacheadas que incluyen alguna de las noches afectadas"""
+    invalidate_nights(hotel_id, start, end)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_changed(sender, instance, **kwargs):
+    """Estado, capacidad o alta/baja de habitaciones: recargar la matriz del hotel"""
+    engine.invalidate(instance.hotel_id)
+    invalidate_hotel(instance.hotel_id)
+
+
+@receiver(pre_save, sender=Room)
+def remember_room_type(sender, instance, **kwargs):
+    """Guarda el tipo y hotel previos para detectar si cambia la categoría de la habitación"""
+    instance._previous_type = None
+    if instance.pk:
+        instance._previous_type = Room.objects.filter(pk=instance.pk).values_list('hotel_id', 'type').first()
+
+
+@receiver(post_save, sender=Room)
+def room_saved_allotments(sender, instance, created, **kwargs):
+    """Estado o activa: recalcular totales; alta o cambio de tipo/hotel: regenerar cupos"""
+    previous = getattr(instance, '_previous_type', None)
+    if created or previous != (instance.hotel_id, instance.type):
+        drop_allotments(instance.hotel_id)
+        if previous:
+            drop_allotments(previous[0])
+    else:
+        refresh_allotment_totals(instance.hotel_id)
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted_allotments(sender, instance, **kwargs):
+    drop_allotments(instance.hotel_id)
@@ -1,3 +1,283 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from django.contrib.auth.models import User
+from .models import Room, RoomRate, RoomTypeAllotment
+from .pricing import price_rooms, price_stay
+from .allotments import rooms_left_by_type
+from .availability import search_available_rooms, search_available_rooms_batch, availability_grid, flexible_windows
+from .availability_engine import engine
+
+
+class AvailabilitySearchMixin:
+    """Datos comunes para los tests de disponibilidad"""
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.single = Room.objects.create(
+            hotel=self.hotel, number='101', type='individual', capacity=1,
+            price=Decimal('80.00'), status='available', active=True
+        )
+        self.double = Room.objects.create(
+            hotel=self.hotel, number='201', type='double', capacity=2,
+            price=Decimal('120.00'), status='available', active=True
+        )
+        self.guest = Client.objects.create(
+            first_name='Ana', last_name='López', email='ana@example.com', dni='12345678'
+        )
+        self.today = timezone.now().date()
+
+    def book(self, room, start_offset, nights, status='confirmed'):
+        check_in = self.today + timedelta(days=start_offset)
+        return Booking.objects.create(
+            hotel=self.hotel, client=self.guest, room=room,
+            check_in_date=check_in, check_out_date=check_in + timedelta(days=nights),
+            total_price=Decimal('0'), status=status
+        )
+
+    def search_ids(self, start_offset, nights, guests=1):
+        check_in = self.today + timedelta(days=start_offset)
+        rooms = search_available_rooms(check_in, check_in + timedelta(days=nights), guests, hotel_id=self.hotel.id)
+        return [room['id'] for room in rooms]
+
+
+class AvailabilitySearchTestCase(AvailabilitySearchMixin, TestCase):
+    """Búsqueda de disponibilidad con el índice RoomNight"""
+
+    def test_search_excludes_booked_rooms(self):
+        self.book(self.double, 2, 3)
+        self.assertEqual(self.search_ids(3, 1), [self.single.id])
+        self.assertEqual(self.search_ids(5, 2), [self.single.id, self.double.id])
+
+    def test_search_respects_capacity(self):
+        self.assertEqual(self.search_ids(1, 2, guests=2), [self.double.id])
+
+    def test_batch_matches_individual_searches(self):
+        """El lote devuelve lo mismo que cada búsqueda individual, con dos consultas"""
+        self.book(self.double, 2, 3)
+        queries = [
+            (self.today + timedelta(days=offset), self.today + timedelta(days=offset + nights), guests, self.hotel.id)
+            for offset, nights, guests in [(3, 1, 1), (5, 2, 1), (1, 2, 2), (0, 10, 1)]
+        ]
+        expected = [
+            [room['id'] for room in search_available_rooms(*query[:3], hotel_id=query[3])]
+            for query in queries
+        ]
+        with self.assertNumQueries(2):
+            results = search_available_rooms_batch(queries)
+        self.assertEqual([[room['id'] for room in rooms] for rooms in results], expected)
+
+    def test_batch_endpoint_keys_results_by_query(self):
+        self.book(self.double, 2, 3)
+        check_in = self.today + timedelta(days=3)
+        payload = {"consultas": [
+            {"fecha_inicio": str(check_in), "fecha_fin": str(check_in + timedelta(days=1)), "personas": 1, "hotel": self.hotel.id},
+            {"fecha_inicio": str(check_in), "fecha_fin": str(check_in), "personas": 1},
+        ]}
+        response = self.client.post('/api/habitaciones-disponibles/lote/', payload, content_type='application/json')
+        data = response.json()
+        self.assertTrue(data['success'])
+        ok = data['resultados'][f"{check_in}_{check_in + timedelta(days=1)}_1_{self.hotel.id}"]
+        self.assertEqual([room['id'] for room in ok['rooms']], [self.single.id])
+        self.assertFalse(data['resultados'][f"{check_in}_{check_in}_1_all"]['success'])
+
+
+class AvailabilityGridTestCase(AvailabilitySearchMixin, TestCase):
+    """Grilla de disponibilidad del hotel codificada por tramos"""
+
+    def test_grid_runs(self):
+        self.book(self.double, 2, 3)
+        self.book(self.double, 5, 2, status='pending')
+        self.book(self.single, -3, 5)
+        with self.assertNumQueries(2):
+            grid = {room['id']: room['runs'] for room in availability_grid(self.hotel.id, self.today, 10)}
+        self.assertEqual(grid[self.double.id], [[0, 2, 'available'], [2, 3, 'confirmed'], [5, 2, 'pending'], [7, 3, 'available']])
+        self.assertEqual(grid[self.single.id], [[0, 2, 'confirmed'], [2, 8, 'available']])
+
+    def test_grid_view_requires_login(self):
+        response = self.client.get('/panel/disponibilidad/', {'hotel': self.hotel.id})
+        self.assertEqual(response.status_code, 302)
+        User.objects.create_user('recepcion', password='secret')
+        self.client.login(username='recepcion', password='secret')
+        data = self.client.get('/panel/disponibilidad/', {'hotel': self.hotel.id, 'days': 7}).json()
+        self.assertEqual(data['days'], 7)
+        self.assertEqual(len(data['rooms']), 2)
+
+
+class FlexibleSearchTestCase(AvailabilitySearchMixin, TestCase):
+    """Búsqueda de N noches dentro de un rango de fechas"""
+
+    def test_windows_skip_booked_nights(self):
+        self.book(self.double, 3, 2)
+        results = flexible_windows(self.today, self.today + timedelta(days=8), 2, guests=2, hotel_id=self.hotel.id)
+        self.assertEqual(len(results), 1)
+        offsets = [(d - self.today).days for d in results[0]['check_in_dates']]
+        self.assertEqual(offsets, [0, 1, 5, 6])
+
+    def test_rank_by_price_and_group_by_type(self):
+        results = flexible_windows(self.today, self.today + timedelta(days=3), 3, hotel_id=self.hotel.id,
+                                   group_by='type', order_by_price=True)
+        self.assertEqual([item['type'] for item in results], ['individual', 'double'])
+        self.assertEqual(results[0]['total_price'], Decimal('240.00'))
+
+    def test_flexible_endpoint(self):
+        params = {'desde': self.today, 'hasta': self.today + timedelta(days=4), 'noches': 2, 'personas': 2, 'hotel': self.hotel.id}
+        data = self.client.get('/api/habitaciones-disponibles/flexible/', params).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['resultados'][0]['room']['id'], self.double.id)
+        self.assertEqual(len(data['resultados'][0]['fechas_inicio']), 3)
+
+
+class RateCalendarTestCase(AvailabilitySearchMixin, TestCase):
+    """Precios por fecha con el calendario de tarifas"""
+
+    def test_stay_sums_nightly_rates(self):
+        check_in = self.today + timedelta(days=1)
+        RoomRate.objects.create(hotel=self.hotel, room_type='double', date=check_in, price=Decimal('150.00'))
+        RoomRate.objects.create(hotel=self.hotel, room_type='double', date=check_in + timedelta(days=1), price=Decimal('200.00'))
+        # Tarifa propia de la habitación: prioridad sobre la del tipo
+        RoomRate.objects.create(hotel=self.hotel, room_type='double', room=self.double, date=check_in + timedelta(days=1), price=Decimal('90.00'))
+        # 150 (tipo) + 90 (habitación) + 120 (sin tarifa: precio base)
+        self.assertEqual(price_stay(self.double, check_in, check_in + timedelta(days=3)), Decimal('360.00'))
+
+    def test_price_rooms_in_one_query(self):
+        check_in = self.today + timedelta(days=1)
+        RoomRate.objects.create(hotel=self.hotel, room_type='individual', date=check_in, price=Decimal('50.00'))
+        with self.assertNumQueries(1):
+            prices = price_rooms([self.single, self.double], check_in, check_in + timedelta(days=2))
+        self.assertEqual(prices, {self.single.id: Decimal('130.00'), self.double.id: Decimal('240.00')})
+
+    def test_booking_total_uses_rates(self):
+        RoomRate.objects.create(hotel=self.hotel, room_type='individual', date=self.today + timedelta(days=2), price=Decimal('10.00'))
+        booking = self.book(self.single, 2, 2)
+        self.assertEqual(booking.total_price, Decimal('90.00'))
+
+
+@override_settings(AVAILABILITY_CACHE_TTL=300)
+class AvailabilityCacheTestCase(AvailabilitySearchMixin, TestCase):
+    """Caché de búsquedas con invalidación por noches y por habitación"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_repeated_search_hits_cache(self):
+        self.assertEqual(self.search_ids(3, 2), [self.single.id, self.double.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search_ids(3, 2), [self.single.id, self.double.id])
+
+    def test_booking_invalidates_only_touched_nights(self):
+        self.search_ids(3, 2)
+        self.search_ids(10, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.double, 4, 1)
+        self.assertEqual(self.search_ids(3, 2), [self.single.id])
+        with self.assertNumQueries(0):
+            self.search_ids(10, 2)
+
+    def test_room_change_invalidates_hotel(self):
+        self.search_ids(3, 2)
+        self.double.change_status('maintenance')
+        self.assertEqual(self.search_ids(3, 2), [self.single.id])
+
+    def test_entry_expires_with_the_next_hold(self):
+        from unittest import mock
+        from app.bookings.holds import place_hold
+        check_in = self.today + timedelta(days=3)
+        hold = place_hold(self.double, check_in, check_in + timedelta(days=2), 'sesion-a')
+        self.assertEqual(self.search_ids(3, 2), [self.single.id])
+        with mock.patch('django.utils.timezone.now', return_value=hold.expires_at + timedelta(seconds=1)):
+            self.assertEqual(self.search_ids(3, 2), [self.single.id, self.double.id])
+
+
+@override_settings(AVAILABILITY_ENGINE_ENABLED=True, AVAILABILITY_ENGINE_TTL=3600)
+class AvailabilityEngineTestCase(AvailabilitySearchMixin, TestCase):
+    """Motor en memoria: mismas respuestas que la consulta SQL"""
+
+    def setUp(self):
+        super().setUp()
+        engine.invalidate(all_hotels=True)
+        if not engine.enabled:
+            self.skipTest("numpy no disponible")
+
+    def tearDown(self):
+        engine.invalidate(all_hotels=True)
+
+    def test_engine_matches_sql(self):
+        self.book(self.double, 2, 3)
+        self.assertEqual(self.search_ids(3, 1), [self.single.id])
+        self.assertEqual(self.search_ids(5, 2), [self.single.id, self.double.id])
+
+    def test_engine_updates_incrementally(self):
+        """Una reserva nueva se refleja sin recargar el hotel completo"""
+        self.assertEqual(self.search_ids(1, 2), [self.single.id, self.double.id])
+        hotel_map = engine.get_map(self.hotel.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(self.single, 1, 2)
+        self.assertIs(engine.get_map(self.hotel.id), hotel_map)
+        self.assertEqual(self.search_ids(1, 2), [self.double.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.cancel_booking()
+        self.assertEqual(self.search_ids(1, 2), [self.single.id, self.double.id])
+
+    def test_room_status_change_reloads_map(self):
+        self.assertIn(self.double.id, self.search_ids(1, 1))
+        self.double.change_status('maintenance')
+        self.assertNotIn(self.double.id, self.search_ids(1, 1))
+
+
+class RoomTypeAllotmentTestCase(AvailabilitySearchMixin, TestCase):
+    """Cupos por tipo y noche mantenidos con las reservas"""
+
+    def left(self, start_offset=1, nights=2):
+        check_in = self.today + timedelta(days=start_offset)
+        return rooms_left_by_type(self.hotel.id, check_in, check_in + timedelta(days=nights))
+
+    def test_counters_follow_bookings(self):
+        Room.objects.create(hotel=self.hotel, number='202', type='double', capacity=2, price=Decimal('120.00'))
+        self.assertEqual(self.left()['double'], {'left': 2, 'total': 2})
+        booking = self.book(self.double, 2, 3)
+        self.assertEqual(self.left()['double']['left'], 1)
+        with self.assertNumQueries(1):
+            self.left()
+        booking.cancel_booking()
+        self.assertEqual(self.left()['double']['left'], 2)
+
+    def test_room_status_updates_total(self):
+        self.left()
+        self.single.change_status('maintenance')
+        self.assertEqual(self.left()['individual'], {'left': 0, 'total': 0})
+
+    def test_rooms_left_endpoint(self):
+        self.book(self.single, 1, 1)
+        check_in = self.today + timedelta(days=1)
+        params = {'fecha_inicio': check_in, 'fecha_fin': check_in + timedelta(days=1), 'hotel': self.hotel.id}
+        data = self.client.get('/api/habitaciones-disponibles/por-tipo/', params).json()
+        tipos = {t['type']: t['disponibles'] for t in data['tipos']}
+        self.assertEqual(tipos, {'individual': 0, 'double': 1})
+
+    def test_all_hotels_add_up_night_by_night(self):
+        other = Hotel.objects.create(name='Hotel Dos', slug='hotel-dos')
+        Room.objects.create(hotel=other, number='301', type='double', capacity=2, price=Decimal('120.00'))
+        Room.objects.create(number='401', type='double', capacity=2, price=Decimal('120.00'))
+        # Cada doble está ocupada una noche distinta: queda al menos una libre cada noche
+        self.book(self.double, 1, 1)
+        Booking.objects.create(client=self.guest, room=Room.objects.get(number='401'), total_price=Decimal('0'),
+                               check_in_date=self.today + timedelta(days=2), check_out_date=self.today + timedelta(days=3))
+        check_in = self.today + timedelta(days=1)
+        left = rooms_left_by_type(None, check_in, check_in + timedelta(days=2))
+        self.assertEqual(left['double'], {'left': 2, 'total': 3})
+        self.assertEqual(left['individual'], {'left': 1, 'total': 1})
+        rooms_left_by_type(None, check_in, check_in + timedelta(days=2))
+        self.assertEqual(RoomTypeAllotment.objects.filter(hotel__isnull=True).count(), 2)
+        data = self.client.get('/api/habitaciones-disponibles/por-tipo/', {
+            'fecha_inicio': check_in, 'fecha_fin': check_in + timedelta(days=2)
+        }).json()
+        self.assertEqual({t['type']: t['disponibles'] for t in data['tipos']}, {'individual': 1, 'double': 2})
@@ -9,6 +9,25 @@ from django.db.models import Q
 import json
 from .models import Room, RoomImage
 from .forms import RoomForm
+from app.core.resource_versions import conditional_on_versions, hotel_param
+from app.core.serializers import ProjectionSerializer, field, iso, list_json_response, or_empty
+
+# Orden de los listados de la API (clave de la paginación por cursor)
+ROOM_LIST_ORDERING = ('number', 'id')
+
+# Campos del listado de la API (?fields=...)
+ROOM_LIST_FIELDS = ProjectionSerializer({
+    'id': field('id'),
+    'number': field('number'),
+    'type': field('type'),
+    'capacity': field('capacity'),
+    'floor': field('floor'),
+    'price': field('price', convert=float),
+    'status': field('status'),
+    'description': field('description', convert=or_empty),
+    'active': field('active'),
+    'created_at': field('created_at', convert=iso),
+})
 
 @login_required
 def rooms_view(request):
@@ -133,9 +152,13 @@ def delete_room(request, room_id):
 # API Views para AJAX
 @login_required
 @require_http_methods(["GET"])
+@conditional_on_versions('rooms')
 def rooms_api(request):
-    """API para obtener habitaciones en formato JSON"""
-    rooms = Room.objects.all().order_by('number')
+    """API para obtener habitaciones en formato JSON (?fields para elegir campos, paginado con ?limit / ?cursor, con ETag)"""
+    rooms = Room.objects.all()
+    hotel_id = hotel_param(request)
+    if hotel_id:
+        rooms = rooms.filter(hotel_id=hotel_id)
     
     # Aplicar filtros
     status_filter = request.GET.get('status')
@@ -155,22 +178,7 @@ def rooms_api(request):
             Q(description__icontains=search)
         )
     
-    rooms_data = []
-    for room in rooms:
-        rooms_data.append({
-            'id': room.id,
-            'number': room.number,
-            'type': room.type,
-            'capacity': room.capacity,
-            'floor': room.floor,
-            'price': float(room.price),
-            'status': room.status,
-            'description': room.description or '',
-            'active': room.active,
-            'created_at': room.created_at.isoformat() if room.created_at else None,
-        })
-    
-    return JsonResponse(rooms_data, safe=False)
+    return list_json_response(request, rooms, ROOM_LIST_ORDERING, ROOM_LIST_FIELDS)
 
 @login_required
 @csrf_exempt
@@ -347,44 +355,6 @@ def rooms_statistics(request):
 # Nueva vista: exportación CSV de habitaciones
 @login_required
 def export_rooms_csv(request):
-    import csv
-    from django.http import HttpResponse
-
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="habitaciones.csv"'
-
-    writer = csv.writer(response)
-    # Encabezados
-    writer.writerow([
-        'Numero', 'Tipo', 'Capacidad', 'Piso', 'Precio', 'Estado', 'Activa', 'Descripcion'
-    ])
-
-    # Filtros opcionales (coherentes con la vista)
-    rooms_qs = Room.objects.all().order_by('number')
-    status_filter = request.GET.get('status')
-    type_filter = request.GET.get('type')
-    floor_filter = request.GET.get('floor')
-    search = request.GET.get('search')
-
-    if status_filter:
-        rooms_qs = rooms_qs.filter(status=status_filter)
-    if type_filter:
-        rooms_qs = rooms_qs.filter(type=type_filter)
-    if floor_filter:
-        rooms_qs = rooms_qs.filter(floor=floor_filter)
-    if search:
-        rooms_qs = rooms_qs.filter(Q(number__icontains=search) | Q(description__icontains=search))
-
-    for room in rooms_qs:
-        writer.writerow([
-            room.number,
-            room.get_type_display() if hasattr(room, 'get_type_display') else room.type,
-            room.capacity,
-            room.floor,
-            room.price,
-            room.get_status_display() if hasattr(room, 'get_status_display') else room.status,
-            'Sí' if room.active else 'No',
-            (room.description or '').replace('\n', ' ').strip()
-        ])
-
-    return response
+    """Exporta habitaciones a CSV (en streaming o, con ?background=1, en segundo plano)"""
+    from app.core.export_jobs import export_response
+    return export_response(request, 'rooms')
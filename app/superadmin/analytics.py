@@ -0,0 +1,186 @@
+"""
+Analítica de ingresos: ocupación, ADR, RevPAR y estadía media.
+
+Las estadías (reservas confirmadas o finalizadas) que tocan el rango se leen
+con una consulta y se pasan a arreglos numpy. Cada estadía se expande a sus
+noches de forma vectorizada (np.repeat) y las noches se acumulan con
+np.bincount en un cubo hotel × tipo × período. La oferta (habitaciones
+activas × días del período) se arma con el mismo cubo, así que cualquier
+agrupación (hotel, tipo, período o combinaciones) es una suma sobre ejes.
+
+- occupancy = noches vendidas / noches disponibles
+- adr = ingresos / noches vendidas
+- revpar = ingresos / noches disponibles
+- alos = noches promedio de las estadías que llegan en el período
+
+Los ingresos de cada estadía se prorratean por noche. Requiere numpy.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él la analítica no está disponible
+    np = None
+
+from app.bookings.models import Booking
+from app.rooms.models import Room
+from .services import GRANULARITIES, bucket_range, bucket_start
+
+STAY_STATUSES = ("confirmed", "completed")
+GROUP_DIMENSIONS = ("hotel", "type", "period")
+METRIC_FIELDS = ("rooms_available", "room_nights", "revenue", "occupancy", "adr", "revpar", "arrivals", "alos")
+
+
+def analytics_available() -> bool:
+    return np is not None
+
+
+def _codes(values, universe):
+    """Posición de cada valor en universe"""
+    index = {value: i for i, value in enumerate(universe)}
+    return np.fromiter((index[value] for value in values), dtype=np.int64, count=len(values))
+
+
+def _ratio(num, den):
+    return np.divide(num, den, out=np.zeros_like(num, dtype=float), where=den > 0)
+
+
+def revenue_metrics(desde: date, hasta: date, hotel_id: Optional[int] = None,
+                    group_by: Sequence[str] = ("hotel", "type", "period"),
+                    granularity: str = "month") -> Dict[str, Any]:
+    """
+    Métricas de ingresos de las noches [desde, hasta] (inclusive).
+
+    Args:
+        hotel_id: limitar a un hotel (opcional)
+        group_by: dimensiones de agrupación (subconjunto de GROUP_DIMENSIONS; vacío = total)
+        granularity: 'day', 'week' o 'month' cuando se agrupa por período
+
+    Returns:
+        {'rows': [{hotel_id?, room_type?, period?, rooms_available, room_nights, revenue,
+                   occupancy, adr, revpar, arrivals, alos}, ...],
+         'totals': {... mismas métricas para todo el rango ...}}
+    """
+    if np is None:
+        raise RuntimeError("La analítica de ingresos requiere numpy")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidad inválida: {granularity}")
+    unknown = set(group_by) - set(GROUP_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Dimensiones inválidas: {sorted(unknown)}")
+
+    days = (hasta - desde).days + 1
+    buckets = bucket_range(desde, hasta, granularity)
+    bucket_index = {bucket: i for i, bucket in enumerate(buckets)}
+    day_bucket = np.array([bucket_index[bucket_start(desde + timedelta(days=i), granularity)]
+                           for i in range(days)], dtype=np.int64)
+    days_per_bucket = np.bincount(day_bucket, minlength=len(buckets))
+
+    # Oferta: habitaciones activas por hotel y tipo
+    rooms = Room.objects.filter(active=True, hotel__isnull=False)
+    stays = Booking.objects.filter(
+        status__in=STAY_STATUSES, check_in_date__lte=hasta, check_out_date__gt=desde,
+    ).annotate(effective_hotel_id=Coalesce("hotel_id", "room__hotel_id")).exclude(effective_hotel_id=None)
+    if hotel_id is not None:
+        rooms = rooms.filter(hotel_id=hotel_id)
+        stays = stays.filter(effective_hotel_id=hotel_id)
+    room_rows = list(rooms.values_list("hotel_id", "type").annotate(n=Count("id")).order_by())
+    stay_rows = list(stays.values_list("effective_hotel_id", "room__type", "check_in_date", "check_out_date", "total_price"))
+
+    hotels = sorted({row[0] for row in room_rows} | {row[0] for row in stay_rows})
+    types = sorted({row[1] for row in room_rows} | {row[1] for row in stay_rows})
+    shape = (len(hotels), len(types), len(buckets))
+    cells = int(np.prod(shape))
+
+    supply = np.zeros(shape, dtype=np.int64)
+    if room_rows:
+        room_hotels, room_types, room_counts = zip(*room_rows)
+        supply[_codes(room_hotels, hotels), _codes(room_types, types), :] = np.array(room_counts)[:, None]
+    supply = supply * days_per_bucket[None, None, :]
+
+    sold = np.zeros(shape, dtype=np.int64)
+    revenue = np.zeros(shape, dtype=float)
+    arrivals = np.zeros(shape, dtype=np.int64)
+    arrival_nights = np.zeros(shape, dtype=np.int64)
+    if stay_rows and cells:
+        stay_hotels, stay_types, check_ins, check_outs, prices = zip(*stay_rows)
+        h = _codes(stay_hotels, hotels)
+        t = _codes(stay_types, types)
+        origin = desde.toordinal()
+        start = np.fromiter((d.toordinal() - origin for d in check_ins), dtype=np.int64, count=len(stay_rows))
+        end = np.fromiter((d.toordinal() - origin for d in check_outs), dtype=np.int64, count=len(stay_rows))
+        nights = np.maximum(end - start, 0)
+        nightly = np.array([float(p or 0) for p in prices]) / np.maximum(nights, 1)
+
+        # Expansión vectorizada de estadías a noches
+        stay_of_night = np.repeat(np.arange(len(stay_rows)), nights)
+        first_night = np.repeat(np.cumsum(nights) - nights, nights)
+        night_day = start[stay_of_night] + (np.arange(nights.sum()) - first_night)
+        in_range = (night_day >= 0) & (night_day < days)
+        stay_of_night = stay_of_night[in_range]
+        cell = np.ravel_multi_index(
+            (h[stay_of_night], t[stay_of_night], day_bucket[night_day[in_range]]), shape
+        )
+        sold = np.bincount(cell, minlength=cells).reshape(shape)
+        revenue = np.bincount(cell, weights=nightly[stay_of_night], minlength=cells).reshape(shape)
+
+        # Llegadas del rango para la estadía media
+        arriving = (start >= 0) & (start < days)
+        arrival_cell = np.ravel_multi_index((h[arriving], t[arriving], day_bucket[start[arriving]]), shape)
+        arrivals = np.bincount(arrival_cell, minlength=cells).reshape(shape)
+        arrival_nights = np.bincount(arrival_cell, weights=nights[arriving], minlength=cells).reshape(shape)
+
+    keep = tuple(i for i, dim in enumerate(GROUP_DIMENSIONS) if dim in group_by)
+    reduce_axes = tuple(i for i in range(3) if i not in keep)
+    grouped = {
+        name: cube.sum(axis=reduce_axes)
+        for name, cube in (("supply", supply), ("sold", sold), ("revenue", revenue),
+                           ("arrivals", arrivals), ("arrival_nights", arrival_nights))
+    }
+    labels = (
+        [{"hotel_id": x} for x in hotels],
+        [{"room_type": x} for x in types],
+        [{"period": b.isoformat()} for b in buckets],
+    )
+
+    rows = []
+    if keep:
+        metrics = _metrics(**grouped)
+        for position in zip(*np.nonzero((grouped["supply"] > 0) | (grouped["sold"] > 0))):
+            row = {}
+            for axis, index in zip(keep, position):
+                row.update(labels[axis][index])
+            row.update({field: values[position].item() for field, values in metrics.items()})
+            rows.append(row)
+    totals = _metrics(**{name: np.array(cube.sum()) for name, cube in grouped.items()})
+    return {"rows": rows, "totals": {field: values[()].item() for field, values in totals.items()}}
+
+
+def _metrics(supply, sold, revenue, arrivals, arrival_nights) -> Dict[str, Any]:
+    """Métricas por celda a partir de los cubos (o de sus sumas) agrupados"""
+    return {
+        "rooms_available": supply.astype(np.int64),
+        "room_nights": sold.astype(np.int64),
+        "revenue": np.round(revenue, 2),
+        "occupancy": np.round(_ratio(sold, supply), 4),
+        "adr": np.round(_ratio(revenue, sold), 2),
+        "revpar": np.round(_ratio(revenue, supply), 2),
+        "arrivals": arrivals.astype(np.int64),
+        "alos": np.round(_ratio(arrival_nights, arrivals), 2),
+    }
+
+
+def metrics_csv_rows(result: Dict[str, Any], group_by: Sequence[str]) -> List[List[Any]]:
+    """Filas para CSV: encabezado, una fila por grupo y la fila de totales"""
+    columns = [{"hotel": "hotel_id", "type": "room_type", "period": "period"}[dim]
+               for dim in GROUP_DIMENSIONS if dim in group_by]
+    lines = [columns + list(METRIC_FIELDS)]
+    for row in result["rows"]:
+        lines.append([row[c] for c in columns] + [row[f] for f in METRIC_FIELDS])
+    lines.append(["total"] * min(len(columns), 1) + [""] * max(len(columns) - 1, 0)
+                 + [result["totals"][f] for f in METRIC_FIELDS])
+    return lines
@@ -1,55 +1,148 @@
-from typing import Optional, Dict, Any
-from datetime import date
-from django.db.models import Count
-from django.db.models.functions import TruncDate
+from typing import Optional, Dict, Any, List
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Trunc
 from django.utils import timezone
+from app.administration.models import Hotel
 from app.bookings.models import Booking
+from app.core.daily_stats import period_totals, stats_rows, today_kpis
 from app.rooms.models import Room
-from app.administration.models import Hotel
+
+
+SERIES_STATUSES = ("pending", "confirmed", "cancelled")
+GRANULARITIES = ("day", "week", "month")
+HOTEL_KPI_FIELDS = ("rooms", "occupied", "arrivals", "in_house", "pending", "confirmed")
+
+
+def bucket_start(d: date, granularity: str) -> date:
+    """Inicio del período (día, semana ISO o mes) que contiene la fecha"""
+    if granularity == "week":
+        return d - timedelta(days=d.weekday())
+    if granularity == "month":
+        return d.replace(day=1)
+    return d
+
+
+def bucket_range(desde: date, hasta: date, granularity: str) -> List[date]:
+    """Inicios de todos los períodos entre desde y hasta (inclusive)"""
+    buckets = []
+    cur = bucket_start(desde, granularity)
+    while cur <= hasta:
+        buckets.append(cur)
+        if granularity == "month":
+            cur = (cur.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            cur += timedelta(days=7 if granularity == "week" else 1)
+    return buckets
+
+
+def bookings_status_series(desde: date, hasta: date, hotel: Optional[Hotel] = None,
+                           granularity: str = "day") -> List[Dict[str, Any]]:
+    """
+    Serie temporal de reservas por estado (según fecha de llegada), completada con ceros.
+
+    Se resuelve con un único GROUP BY por período sobre las estadísticas diarias
+    (DailyHotelStats).
+
+    Args:
+        desde, hasta: rango de fechas de llegada (inclusive)
+        hotel: limitar a un hotel (opcional)
+        granularity: 'day', 'week' o 'month'
+
+    Returns:
+        [{'date': 'YYYY-MM-DD' (inicio del período), 'pending': n, 'confirmed': n, 'cancelled': n}, ...]
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidad inválida: {granularity}")
+    series = {bucket: dict.fromkeys(SERIES_STATUSES, 0) for bucket in bucket_range(desde, hasta, granularity)}
+    rows = (
+        stats_rows(desde, hasta, hotel)
+        .annotate(period=Trunc("date", granularity, output_field=DateField()))
+        .values("period")
+        .annotate(**{f"{status}_total": Sum(status) for status in SERIES_STATUSES})
+        .order_by()
+    )
+    for row in rows:
+        counts = series.get(row["period"])
+        if counts is not None:
+            for status in SERIES_STATUSES:
+                counts[status] += row[f"{status}_total"] or 0
+    return [{"date": bucket.isoformat(), **counts} for bucket, counts in series.items()]
 
 
 def get_dashboard_data(scope: str, hotel: Optional[Hotel], desde: date, hasta: date) -> Dict[str, Any]:
-    bookings_qs = Booking.objects.filter(check_in_date__range=(desde, hasta))
-    rooms_qs = Room.objects.all()
-    if scope == "hotel" and hotel is not None:
-        bookings_qs = bookings_qs.filter(hotel=hotel)
-        rooms_qs = rooms_qs.filter(hotel=hotel)
-    today = timezone.now().date()
-    active_today_qs = Booking.objects.filter(check_in_date__lte=today, check_out_date__gt=today, status="confirmed")
-    if scope == "hotel" and hotel is not None:
-        active_today_qs = active_today_qs.filter(hotel=hotel)
-    occupied_rooms_count = active_today_qs.values("room").distinct().count()
-    total_rooms = rooms_qs.count()
-    occupancy_today = None if total_rooms == 0 else occupied_rooms_count / total_rooms
-    checkin_qs = Booking.objects.filter(check_in_date=today)
-    if scope == "hotel" and hotel is not None:
-        checkin_qs = checkin_qs.filter(hotel=hotel)
-    bookings_checkin_today_total = checkin_qs.count()
-    reservations_period_count = bookings_qs.count()
-    daily = bookings_qs.annotate(d=TruncDate("check_in_date")).values("d", "status").annotate(count=Count("id")).order_by("d")
-    daily_map: Dict[str, Dict[str, int]] = {}
-    for row in daily:
-        d = row["d"].isoformat()
-        s = row["status"]
-        c = row["count"]
-        if d not in daily_map:
-            daily_map[d] = {"pending": 0, "confirmed": 0, "cancelled": 0}
-        if s in daily_map[d]:
-            daily_map[d][s] += c
-    daily_bookings = [{"date": d, **daily_map[d]} for d in sorted(daily_map.keys())]
-    status_counts = bookings_qs.values("status").annotate(count=Count("id"))
-    status_dist = {"pending": 0, "confirmed": 0, "cancelled": 0}
-    for row in status_counts:
-        s = row["status"]
-        c = row["count"]
-        if s in status_dist:
-            status_dist[s] = c
+    """KPIs, serie diaria y distribución por estado leídos de las estadísticas diarias"""
+    if scope != "hotel":
+        hotel = None
+    today = today_kpis(hotel)
+    totals = period_totals(desde, hasta, hotel)
     return {
         "kpis": {
-            "occupancy_today": occupancy_today,
-            "bookings_checkin_today_total": bookings_checkin_today_total,
-            "reservations_period_count": reservations_period_count,
+            "occupancy_today": today["occupancy"],
+            "bookings_checkin_today_total": today["arrivals"],
+            "reservations_period_count": totals["arrivals"],
         },
-        "series": {"daily_bookings": daily_bookings},
-        "distributions": {"status": status_dist},
-    }
\ No newline at end of file
+        "series": {"daily_bookings": bookings_status_series(desde, hasta, hotel, granularity="day")},
+        "distributions": {"status": {status: totals[status] for status in SERIES_STATUSES}},
+    }
+
+
+def hotels_today_kpis(today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    KPIs del día de todos los hoteles con dos consultas agrupadas por hotel.
+
+    Reservas "en casa" son las que incluyen hoy entre llegada y salida (ambas
+    inclusive); ocupadas son las habitaciones con una de ellas confirmada.
+
+    Returns:
+        {'date': 'YYYY-MM-DD',
+         'hotels': [{'id', 'name', 'slug', 'rooms', 'occupied', 'arrivals', 'in_house',
+                     'pending', 'confirmed', 'occupancy_percent'}, ...],
+         'totals': {... mismas métricas sumadas ...}}
+    """
+    today = today or timezone.now().date()
+    rooms = dict(Room.objects.values("hotel_id").annotate(n=Count("id")).order_by().values_list("hotel_id", "n"))
+    bookings = {
+        row["hotel_id"]: row
+        for row in Booking.objects.filter(check_in_date__lte=today, check_out_date__gte=today)
+        .values("hotel_id")
+        .annotate(
+            occupied=Count("room_id", filter=Q(status="confirmed"), distinct=True),
+            arrivals=Count("id", filter=Q(check_in_date=today)),
+            in_house=Count("id"),
+            pending=Count("id", filter=Q(status="pending")),
+            confirmed=Count("id", filter=Q(status="confirmed")),
+        )
+        .order_by()
+    }
+    hotels = []
+    for hotel in Hotel.objects.order_by("name").values("id", "name", "slug"):
+        row = bookings.get(hotel["id"], {})
+        kpis = {field: row.get(field, 0) for field in HOTEL_KPI_FIELDS}
+        kpis["rooms"] = rooms.get(hotel["id"], 0)
+        hotels.append({**hotel, **kpis, "occupancy_percent": _occupancy_percent(kpis)})
+    totals = {field: sum(h[field] for h in hotels) for field in HOTEL_KPI_FIELDS}
+    totals["occupancy_percent"] = _occupancy_percent(totals)
+    return {"date": today.isoformat(), "hotels": hotels, "totals": totals}
+
+
+def _occupancy_percent(kpis: Dict[str, int]) -> float:
+    if not kpis["rooms"]:
+        return 0
+    return round(kpis["occupied"] * 100 / kpis["rooms"], 2)
+
+
+def cached_hotels_today_kpis() -> Dict[str, Any]:
+    """hotels_today_kpis() cacheado por SUPERADMIN_KPIS_CACHE_TTL segundos (0 = sin caché)"""
+    timeout = getattr(settings, "SUPERADMIN_KPIS_CACHE_TTL", 30)
+    if not timeout:
+        return hotels_today_kpis()
+    today = timezone.now().date()
+    key = f"superadmin:hotels_kpis:{today.isoformat()}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = hotels_today_kpis(today)
+        cache.set(key, snapshot, timeout)
+    return snapshot
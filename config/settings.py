@@ -236,5 +236,47 @@ CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', '').split(',') if os.environ.get('CORS_ALLOWED_ORIGINS') else []
 CORS_ALLOW_CREDENTIALS = True
 
+# Caché compartida entre procesos (Redis, requiere el paquete redis). Sin REDIS_URL
+# cada proceso usa su propia LocMemCache y las cachés invalidadas por señal
+# (disponibilidad, contadores del dashboard) quedan deshabilitadas por defecto.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+SHARED_CACHE_DEFAULT_TTL = '300' if REDIS_URL else '0'
+
+# Motor de disponibilidad en memoria (requiere numpy)
+AVAILABILITY_ENGINE_ENABLED = os.environ.get('AVAILABILITY_ENGINE_ENABLED', 'False') == 'True'
+AVAILABILITY_ENGINE_HORIZON_DAYS = int(os.environ.get('AVAILABILITY_ENGINE_HORIZON_DAYS', '400'))
+AVAILABILITY_ENGINE_TTL = int(os.environ.get('AVAILABILITY_ENGINE_TTL', '60'))
+
+# Caché de búsquedas de disponibilidad (segundos, 0 = deshabilitada; 300 con REDIS_URL)
+AVAILABILITY_CACHE_TTL = int(os.environ.get('AVAILABILITY_CACHE_TTL', SHARED_CACHE_DEFAULT_TTL))
+
+# Bloqueo temporal de la habitación durante el asistente de reserva (minutos)
+BOOKING_HOLD_TTL_MINUTES = int(os.environ.get('BOOKING_HOLD_TTL_MINUTES', '15'))
+
+# Caché de los KPIs por hotel del panel de superadmin (segundos, 0 = deshabilitada)
+SUPERADMIN_KPIS_CACHE_TTL = int(os.environ.get('SUPERADMIN_KPIS_CACHE_TTL', '30'))
+
+# Caché de los contadores del dashboard del personal (segundos, 0 = deshabilitada; 300 con REDIS_URL)
+DASHBOARD_METRICS_CACHE_TTL = int(os.environ.get('DASHBOARD_METRICS_CACHE_TTL', SHARED_CACHE_DEFAULT_TTL))
+
+# Segundos sin cambios antes de enviar un keepalive en el flujo SSE de métricas
+LIVE_METRICS_HEARTBEAT = int(os.environ.get('LIVE_METRICS_HEARTBEAT', '25'))
+
+# Exportaciones en segundo plano: carpeta de los archivos y horas que quedan disponibles
+EXPORT_JOBS_ROOT = os.environ.get('EXPORT_JOBS_ROOT', str(BASE_DIR / 'exports'))
+EXPORT_JOBS_RETENTION_HOURS = int(os.environ.get('EXPORT_JOBS_RETENTION_HOURS', '48'))
+# Minutos tras los que una exportación en curso cuyo worker se detuvo se marca como fallida
+EXPORT_JOBS_STALE_MINUTES = int(os.environ.get('EXPORT_JOBS_STALE_MINUTES', '120'))
+
+# Minutos tras los que un email tomado por un worker que no terminó vuelve a la cola
+EMAIL_CLAIM_TIMEOUT_MINUTES = int(os.environ.get('EMAIL_CLAIM_TIMEOUT_MINUTES', '15'))
+
 # IA Webhook (n8n)
 N8N_IA_WEBHOOK_URL = env_config('N8N_IA_WEBHOOK_URL', default='')
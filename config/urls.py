@@ -28,13 +28,14 @@ import json
 from enum import Enum
 from app.clients.views import clients_api_collection
 from app.bookings.views import bookings_api_collection, booking_api_detail, create_booking_api, update_booking_api
+from app.bookings.views import bookings_bulk_status_api
 
 # Importar vistas web
 from app.core.views import (
     login_view, register_view, logout_view, dashboard_view,
     profile_view, settings_view, bookings_view,
     clients_view, cleaning_view, maintenance_view,
-    administration_view, reports_view, dashboard_metrics_api,
+    administration_view, reports_view, dashboard_metrics_api, dashboard_metrics_stream,
     # Vistas del portal de clientes
     client_index_view, client_rooms_view, client_room_detail_view,
     client_booking_view, client_my_bookings_view, client_booking_detail_view,
@@ -42,7 +43,7 @@ from app.core.views import (
     client_cancel_booking_view, client_profile_view, client_login_view,
     client_register_view, client_logout_view, get_room_availability,
     hotel_reserve_view, hotel_confirm_reservation_view,
-    panel_change_booking_status,
+    panel_change_booking_status, panel_availability_grid,
     superadmin_dashboard_view,
     superadmin_hotels_list_view,
     superadmin_hotel_detail_view,
@@ -51,7 +52,14 @@ from app.core.views import (
     superadmin_audit_actions_view,
     superadmin_audit_emails_view,
     superadmin_users_list_view,
+    superadmin_import_view,
     superadmin_export_bookings_csv,
+    export_job_create,
+    export_job_status,
+    export_job_download,
+    superadmin_api_analytics,
+    superadmin_api_pace,
+    superadmin_api_pickup_curve,
     superadmin_api_dashboard_global,
     superadmin_api_dashboard_hotel,
     superadmin_api_ia_analisis,
@@ -381,10 +389,15 @@ urlpatterns = [
     # Endpoints REST de reservas para el dashboard
     path("api/bookings/", bookings_api_collection, name="bookings_api_collection"),
     path("api/bookings/<int:booking_id>/", booking_api_detail, name="booking_api_detail"),
+    path("api/bookings/bulk-status/", bookings_bulk_status_api, name="bookings_bulk_status_api"),
     
     # Rutas web
     path("", dashboard_view, name="dashboard"),
     path("api/dashboard-metrics/", dashboard_metrics_api, name="dashboard_metrics_api"),
+    path("api/dashboard-metrics/stream/", dashboard_metrics_stream, name="dashboard_metrics_stream"),
+    path("exports/", export_job_create, name="export_job_create"),
+    path("exports/<int:job_id>/", export_job_status, name="export_job_status"),
+    path("exports/<int:job_id>/download/", export_job_download, name="export_job_download"),
     path("login/", login_view, name="login"),
     path("register/", register_view, name="register"),
     path("logout/", logout_view, name="logout"),
@@ -472,6 +485,7 @@ urlpatterns = [
     path("panel/reservas/<int:booking_id>/", booking_detail, name="panel_booking_detail"),
     path("panel/reservas/<int:booking_id>/cambiar-estado/", panel_change_booking_status, name="panel_change_booking_status"),
     path("panel/habitaciones/", rooms_view, name="panel_rooms"),
+    path("panel/disponibilidad/", panel_availability_grid, name="panel_availability_grid"),
     path("panel/clientes/", clients_view, name="panel_clients"),
 
     # Superadmin
@@ -483,10 +497,14 @@ urlpatterns = [
     path("superadmin/auditoria/acciones/", superadmin_audit_actions_view, name="superadmin_audit_actions"),
     path("superadmin/auditoria/emails/", superadmin_audit_emails_view, name="superadmin_audit_emails"),
     path("superadmin/usuarios/", superadmin_users_list_view, name="superadmin_users"),
+    path("superadmin/importar/", superadmin_import_view, name="superadmin_import"),
     path("superadmin/reportes/reservas.csv", superadmin_export_bookings_csv, name="superadmin_export_bookings_csv"),
     path("superadmin/api/dashboard/global", superadmin_api_dashboard_global, name="superadmin_api_dashboard_global"),
     path("superadmin/api/dashboard/hotel/<int:hotel_id>", superadmin_api_dashboard_hotel, name="superadmin_api_dashboard_hotel"),
     path("superadmin/api/ia/analisis/", superadmin_api_ia_analisis, name="superadmin_api_ia_analisis"),
     path("superadmin/api/ia/chat/", superadmin_api_ia_chat, name="superadmin_api_ia_chat"),
     path("superadmin/api/hotels", superadmin_api_hotels, name="superadmin_api_hotels"),
+    path("superadmin/api/analytics", superadmin_api_analytics, name="superadmin_api_analytics"),
+    path("superadmin/api/pace", superadmin_api_pace, name="superadmin_api_pace"),
+    path("superadmin/api/pace/curva", superadmin_api_pickup_curve, name="superadmin_api_pickup_curve"),
 ]